@@ -5,6 +5,7 @@ Sistema seguro com Admin e Visualizador - Versão Aprimorada com bcrypt
 
 import streamlit as st
 import os
+import secrets
 from typing import Dict, Optional, List
 from dataclasses import dataclass
 from loguru import logger
@@ -14,7 +15,11 @@ from dotenv import load_dotenv
 # Carregar variáveis de ambiente
 load_dotenv()
 
-from utils.security_utils import PasswordManager, RateLimiter
+from utils.security_utils import PasswordManager, VerificationQueueFull, create_rate_limiter, password_verification_pool
+from auth.credential_store import credential_store
+from auth.session_token import session_tokens
+from utils.log_config import audit_log
+from config.settings import settings
 
 @dataclass
 class User:
@@ -29,23 +34,31 @@ class User:
 class AuthService:
     """Serviço de autenticação seguro com perfis Admin e Visualizador"""
     
+    # Parâmetro da URL que guarda o token de sessão (sobrevive ao recarregar a página)
+    SESSION_QUERY_PARAM = "sessao"
+    
     def __init__(self):
         # Inicializar componentes de segurança
-        self.rate_limiter = RateLimiter(max_requests=5, window_minutes=15)  # 5 tentativas por 15 min
+        self.rate_limiter = create_rate_limiter(max_requests=5, window_minutes=15)  # 5 falhas por usuário+cliente a cada 15 min
         self.password_manager = PasswordManager()
         
         # ✅ SENHAS SEGURAS COM VARIÁVEIS DE AMBIENTE
         admin_password = os.getenv('ADMIN_PASSWORD', 'admin123_CHANGE_ME')
         viewer_password = os.getenv('VIEWER_PASSWORD', 'view123_CHANGE_ME')
-        
+
         # ⚠️ AVISO DE SEGURANÇA
         if admin_password == 'admin123_CHANGE_ME' or viewer_password == 'view123_CHANGE_ME':
             logger.warning("🔒 ATENÇÃO: Usando senhas padrão! Configure as variáveis de ambiente.")
-        
-        # ✅ USUÁRIOS COM HASHES SEGUROS
+
+        # ✅ HASHES COMPARTILHADOS PELO PROCESSO (pré-calculados no ambiente ou no arquivo de credenciais)
+        self._credentials = {
+            "admin": (admin_password, os.getenv('ADMIN_PASSWORD_HASH') or None),
+            "visualizador": (viewer_password, os.getenv('VIEWER_PASSWORD_HASH') or None)
+        }
+
+        # ✅ USUÁRIOS (o hash é resolvido sob demanda pelo credential_store)
         self.users_db = {
             "admin": {
-                "password_hash": self._get_or_create_password_hash("admin", admin_password),
                 "profile": "administrador",
                 "display_name": "Administrador",
                 "permissions": [
@@ -57,7 +70,6 @@ class AuthService:
                 "created_at": datetime.now()
             },
             "visualizador": {
-                "password_hash": self._get_or_create_password_hash("visualizador", viewer_password),
                 "profile": "visualizador", 
                 "display_name": "Visualizador",
                 "permissions": [
@@ -72,31 +84,18 @@ class AuthService:
         
         logger.info("🔐 AuthService inicializado com segurança aprimorada")
     
-    def _get_or_create_password_hash(self, username: str, password: str) -> str:
+    def _get_password_hash(self, username: str) -> str:
         """
-        Obtém ou cria hash da senha de forma segura
+        Obtém o hash da senha do armazenamento compartilhado do processo
         
         Args:
             username: Nome do usuário
-            password: Senha em texto plano
             
         Returns:
             Hash seguro da senha
         """
-        # Verifica se já existe hash no session_state (cache)
-        cache_key = f"password_hash_{username}"
-        
-        if cache_key in st.session_state:
-            return st.session_state[cache_key]
-        
-        # Gera novo hash
-        password_hash = self.password_manager.hash_password(password)
-        
-        # Salva no cache da sessão
-        st.session_state[cache_key] = password_hash
-        
-        logger.info(f"🔐 Hash de senha gerado para usuário: {username}")
-        return password_hash
+        password, precomputed_hash = self._credentials[username]
+        return credential_store.get_hash(username, password, precomputed_hash)
     
     def authenticate(self, username: str, password: str) -> Optional[User]:
         """
@@ -108,21 +107,27 @@ class AuthService:
             
         Returns:
             Objeto User se autenticado, None caso contrário
+            
+        Raises:
+            VerificationQueueFull: Se houver logins simultâneos demais
         """
         try:
             # Sanitizar entrada
             username = username.lower().strip() if username else ""
             
-            # ✅ VERIFICAR RATE LIMITING
-            client_ip = self._get_client_identifier()
-            if not self.rate_limiter.is_allowed(f"login_{client_ip}"):
-                logger.warning(f"🚨 Rate limit excedido para IP: {client_ip}")
+            # ✅ VERIFICAR RATE LIMITING (por usuário + cliente; só falhas contam)
+            client_id = self._get_client_identifier()
+            rate_key = f"login_{username}_{client_id}"
+            if self.rate_limiter.get_remaining_requests(rate_key) <= 0:
+                logger.warning(f"🚨 Rate limit excedido para {username} em {client_id}")
+                audit_log.registrar('login_bloqueado', usuario=username, motivo='rate_limit', cliente=client_id)
                 return None
             
             # Verificar se usuário existe
             if username not in self.users_db:
                 logger.warning(f"🚨 Tentativa de login com usuário inexistente: {username}")
                 self._log_failed_attempt(username, "user_not_found")
+                self.rate_limiter.is_allowed(rate_key)  # Registra a falha
                 return None
             
             user_data = self.users_db[username]
@@ -132,8 +137,8 @@ class AuthService:
                 logger.warning(f"🚨 Usuário bloqueado por muitas tentativas: {username}")
                 return None
             
-            # ✅ VERIFICAR SENHA COM BCRYPT
-            if self.password_manager.verify_password(password, user_data["password_hash"]):
+            # ✅ VERIFICAR SENHA COM BCRYPT (pool limitado; recusa cedo se a fila estiver cheia)
+            if password_verification_pool.verify(password, self._get_password_hash(username)):
                 # ✅ LOGIN BEM-SUCEDIDO
                 logger.info(f"✅ Login bem-sucedido: {username} ({user_data['profile']})")
                 
@@ -142,13 +147,7 @@ class AuthService:
                 self.users_db[username]["last_login"] = datetime.now()
                 
                 # Criar objeto User
-                user = User(
-                    username=username,
-                    profile=user_data["profile"],
-                    display_name=user_data["display_name"],
-                    permissions=user_data["permissions"],
-                    last_login=user_data["last_login"]
-                )
+                user = self._build_user(username)
                 
                 # Log de auditoria
                 self._log_successful_login(user)
@@ -158,36 +157,144 @@ class AuthService:
                 # ❌ SENHA INCORRETA
                 logger.warning(f"🚨 Senha incorreta para usuário: {username}")
                 self._log_failed_attempt(username, "wrong_password")
+                self.rate_limiter.is_allowed(rate_key)  # Registra a falha
                 
                 # Incrementar tentativas
                 self.users_db[username]["login_attempts"] += 1
                 
                 return None
                 
+        except VerificationQueueFull:
+            # Sobrecarga não conta como tentativa falhada; a página informa o usuário
+            raise
         except Exception as e:
             logger.error(f"❌ Erro na autenticação: {str(e)}")
             return None
     
+    def _build_user(self, username: str) -> User:
+        """Cria o objeto User com perfil e permissões atuais do cadastro"""
+        user_data = self.users_db[username]
+        return User(
+            username=username,
+            profile=user_data["profile"],
+            display_name=user_data["display_name"],
+            permissions=user_data["permissions"],
+            last_login=user_data["last_login"]
+        )
+    
+    def start_session(self, user: User, remember_me: bool = False) -> None:
+        """
+        Registra o usuário na sessão e emite o token que restaura o login
+        
+        O token vai para a URL (?sessao=), então pode vazar pelo histórico
+        do navegador, capturas de tela, links copiados ou cabeçalho Referer.
+        Mitigações: o token é vinculado ao IP do cliente quando o Streamlit o
+        informa, é trocado por um novo a cada restauração (o anterior é
+        revogado) e o logout o revoga de forma persistente. Risco restante:
+        sem IP conhecido (acesso local, alguns proxies) o token não é
+        vinculado e um link vazado vale até ser trocado, revogado ou expirar;
+        atrás do mesmo NAT/proxy o vínculo não distingue os clientes.
+        
+        Args:
+            user: Usuário autenticado
+            remember_me: Usa a validade longa (SESSION_TOKEN_REMEMBER_DAYS)
+        """
+        ttl_minutes = (
+            settings.SESSION_TOKEN_REMEMBER_DAYS * 24 * 60 if remember_me
+            else settings.SESSION_TOKEN_TTL_MINUTES
+        )
+        token = session_tokens.issue(user.username, ttl_minutes, client=self._get_client_ip())
+        
+        st.session_state.authenticated_user = user
+        st.session_state.session_token = token
+        st.session_state.login_timestamp = datetime.now()
+        st.session_state.login_time = st.session_state.login_timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            st.query_params[self.SESSION_QUERY_PARAM] = token
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível gravar o token de sessão na URL: {str(e)}")
+    
+    def restore_session(self) -> bool:
+        """
+        Restaura o login a partir do token da URL (após recarregar a página)
+        
+        Só confere a assinatura HMAC, a validade, o cliente e a revogação,
+        sem bcrypt. Perfil e permissões vêm do cadastro atual, não do token.
+        O token usado é revogado e trocado por um novo (mesma expiração) na
+        URL: um link copiado antes da restauração deixa de valer. Outra aba
+        aberta com o token antigo precisará de novo login.
+        
+        Returns:
+            True se a sessão foi restaurada
+        """
+        try:
+            token = st.query_params.get(self.SESSION_QUERY_PARAM)
+            if not token:
+                return False
+            
+            client_ip = self._get_client_ip()
+            claims = session_tokens.verify(token, client=client_ip)
+            if claims is None or claims['u'] not in self.users_db:
+                # Token inválido, expirado, revogado ou de outro cliente: remove para não conferir a cada rerun
+                logger.warning(f"🚨 Token de sessão recusado, IP: {self._get_client_identifier()}")
+                del st.query_params[self.SESSION_QUERY_PARAM]
+                return False
+            
+            # Troca: o token da URL é de uso único
+            session_tokens.revoke(token)
+            token = session_tokens.issue(
+                claims['u'], client=client_ip, expires_at=claims['exp'], issued_at=claims['iat']
+            )
+            st.query_params[self.SESSION_QUERY_PARAM] = token
+            
+            st.session_state.authenticated_user = self._build_user(claims['u'])
+            st.session_state.session_token = token
+            st.session_state.login_timestamp = datetime.fromtimestamp(claims['iat'])
+            st.session_state.login_time = st.session_state.login_timestamp.strftime("%Y-%m-%d %H:%M:%S")
+            logger.info(f"🔄 Sessão restaurada por token: {claims['u']}")
+            audit_log.registrar('sessao_restaurada', usuario=claims['u'], cliente=self._get_client_identifier())
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao restaurar sessão: {str(e)}")
+            return False
+    
+    def revoke_sessions(self, username: str) -> None:
+        """Invalida todos os tokens de sessão do usuário (função administrativa)"""
+        session_tokens.revoke_user(username)
+        audit_log.registrar('sessoes_revogadas', usuario=username)
+    
+    def _get_client_ip(self) -> Optional[str]:
+        """IP do cliente informado pelo Streamlit (None em acessos locais/sem proxy confiável)"""
+        try:
+            ip_address = getattr(getattr(st, 'context', None), 'ip_address', None)
+            return ip_address if isinstance(ip_address, str) and ip_address else None
+        except Exception:
+            return None
+    
     def _get_client_identifier(self) -> str:
         """
-        Obtém identificador único do cliente para rate limiting
+        Obtém identificador do cliente para rate limiting
+        
+        Usa o IP do cliente quando o Streamlit o informa (estável entre
+        recarregamentos). Sem IP (acesso local, alguns proxies) cada sessão
+        recebe um identificador próprio: um balde compartilhado deixaria um
+        usuário errando a senha bloquear todos os outros. Como a chave do
+        limite também leva o usuário, clientes atrás do mesmo NAT/proxy não
+        se bloqueiam entre si; o bloqueio por usuário (login_attempts)
+        continua valendo mesmo se a página for recarregada.
         
         Returns:
             Identificador do cliente
         """
-        # Em produção, usar IP real do cliente
-        # Por enquanto, usar session_id do Streamlit
         try:
-            # Tentar obter session_id
-            if hasattr(st, 'session_state') and hasattr(st.session_state, 'session_id'):
-                return f"session_{st.session_state.session_id}"
-            else:
-                # Fallback para identificador baseado em timestamp
-                if 'client_identifier' not in st.session_state:
-                    st.session_state.client_identifier = f"client_{datetime.now().timestamp()}"
-                return st.session_state.client_identifier
-        except:
-            return "unknown_client"
+            if 'client_identifier' not in st.session_state:
+                ip_address = self._get_client_ip()
+                st.session_state.client_identifier = (
+                    f"ip_{ip_address}" if ip_address else f"sessao_{secrets.token_hex(8)}"
+                )
+            return st.session_state.client_identifier
+        except Exception:
+            return f"sessao_{secrets.token_hex(8)}"
     
     def _log_failed_attempt(self, username: str, reason: str) -> None:
         """
@@ -197,7 +304,9 @@ class AuthService:
             username: Nome do usuário
             reason: Motivo da falha
         """
-        logger.warning(f"🚨 Login falhado - Usuário: {username}, Motivo: {reason}, IP: {self._get_client_identifier()}")
+        client = self._get_client_identifier()
+        logger.warning(f"🚨 Login falhado - Usuário: {username}, Motivo: {reason}, IP: {client}")
+        audit_log.registrar('login_falhou', usuario=username, motivo=reason, cliente=client)
     
     def _log_successful_login(self, user: User) -> None:
         """
@@ -206,11 +315,15 @@ class AuthService:
         Args:
             user: Objeto do usuário
         """
-        logger.info(f"✅ Auditoria - Login: {user.username} ({user.profile}), IP: {self._get_client_identifier()}, Timestamp: {datetime.now()}")
+        client = self._get_client_identifier()
+        logger.info(f"✅ Auditoria - Login: {user.username} ({user.profile}), IP: {client}, Timestamp: {datetime.now()}")
+        audit_log.registrar('login', usuario=user.username, perfil=user.profile, cliente=client)
     
     def is_authenticated(self) -> bool:
-        """Verifica se usuário está autenticado"""
-        return 'authenticated_user' in st.session_state and st.session_state.authenticated_user is not None
+        """Verifica se usuário está autenticado (restaurando a sessão pelo token, se houver)"""
+        if st.session_state.get('authenticated_user') is not None:
+            return True
+        return self.restore_session()
     
     def get_current_user(self) -> Optional[User]:
         """Retorna usuário atual ou None"""
@@ -242,11 +355,21 @@ class AuthService:
         user = self.get_current_user()
         if user:
             logger.info(f"🚪 Logout: {user.username}")
+            audit_log.registrar('logout', usuario=user.username, cliente=self._get_client_identifier())
+        
+        # Revogar o token no servidor e removê-lo da URL
+        session_tokens.revoke(st.session_state.get('session_token'))
+        try:
+            if self.SESSION_QUERY_PARAM in st.query_params:
+                del st.query_params[self.SESSION_QUERY_PARAM]
+        except Exception:
+            pass
         
         # Limpar dados da sessão
         keys_to_clear = [
             'authenticated_user', 
             'login_timestamp',
+            'login_time',
             'session_token'
         ]
         
@@ -281,6 +404,7 @@ class AuthService:
         if username in self.users_db:
             self.users_db[username]["login_attempts"] = 0
             logger.info(f"🔄 Tentativas de login resetadas para: {username}")
+            audit_log.registrar('tentativas_resetadas', usuario=username)
             return True
         return False
     
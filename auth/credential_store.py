@@ -0,0 +1,151 @@
+"""
+Armazenamento de hashes de senha compartilhado por todas as sessões do processo
+"""
+
+import os
+import json
+import hmac
+import hashlib
+import secrets
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+from loguru import logger
+
+from utils.security_utils import PasswordVerificationPool, password_verification_pool
+
+class CredentialStore:
+    """
+    Hashes bcrypt calculados no máximo uma vez por processo
+
+    Ordem de resolução do hash de cada usuário:
+    1. Hash pré-calculado vindo do ambiente (ex.: ADMIN_PASSWORD_HASH)
+    2. Arquivo de credenciais protegido (permissão 600), validado contra a
+       senha configurada; se a senha mudou, é gerado e gravado um novo hash
+    3. Hash gerado a partir da senha configurada e gravado no arquivo
+
+    A resolução acontece no primeiro login de cada usuário (nunca antes da
+    primeira renderização) e o resultado fica em memória para o processo
+    inteiro: novas sessões do Streamlit e novas instâncias de AuthService
+    não executam bcrypt para preparar hashes.
+
+    O bcrypt roda fora do lock, no pool limitado de verificação (mesma fila e
+    back-pressure dos logins): o lock só protege a troca do dicionário em
+    memória, e logins de outros usuários não esperam por um hash em cálculo.
+    """
+
+    def __init__(self, credentials_file: Optional[str] = None,
+                 pool: Optional[PasswordVerificationPool] = None):
+        self.credentials_file = credentials_file or os.getenv('CREDENTIALS_FILE', '.credentials.json')
+        self.pool = pool or password_verification_pool
+        self._lock = threading.Lock()
+        # Um lock por usuário: logins simultâneos do mesmo usuário calculam o hash uma vez
+        self._user_locks: Dict[str, threading.Lock] = {}
+        # Serializa a leitura-modificação-gravação do arquivo entre threads
+        self._file_lock = threading.Lock()
+        # Chave aleatória do processo: identifica a senha em memória sem guardá-la
+        self._process_key = secrets.token_bytes(32)
+        self._hashes: Dict[str, Tuple[bytes, str]] = {}
+        self.stats = {'hashes_gerados': 0, 'hashes_validados': 0, 'hashes_do_ambiente': 0}
+
+    def _fingerprint(self, password: str) -> bytes:
+        return hmac.new(self._process_key, password.encode('utf-8'), hashlib.sha256).digest()
+
+    def get_hash(self, username: str, password: str, precomputed_hash: Optional[str] = None) -> str:
+        """
+        Retorna o hash bcrypt da senha do usuário
+
+        Args:
+            username: Nome do usuário
+            password: Senha configurada em texto plano
+            precomputed_hash: Hash bcrypt já pronto (tem prioridade)
+
+        Returns:
+            Hash bcrypt da senha
+
+        Raises:
+            VerificationQueueFull: Se o pool de bcrypt estiver sobrecarregado
+        """
+        fingerprint = self._fingerprint(precomputed_hash or password)
+
+        with self._lock:
+            cached = self._hashes.get(username)
+            if cached and hmac.compare_digest(cached[0], fingerprint):
+                return cached[1]
+            user_lock = self._user_locks.setdefault(username, threading.Lock())
+
+        # bcrypt fora do lock global; só outros logins do mesmo usuário aguardam
+        with user_lock:
+            with self._lock:
+                cached = self._hashes.get(username)
+                if cached and hmac.compare_digest(cached[0], fingerprint):
+                    return cached[1]
+
+            if precomputed_hash:
+                password_hash = precomputed_hash
+            else:
+                password_hash = self._load_or_create(username, password)
+
+            with self._lock:
+                if precomputed_hash:
+                    self.stats['hashes_do_ambiente'] += 1
+                self._hashes[username] = (fingerprint, password_hash)
+                return password_hash
+
+    def _load_or_create(self, username: str, password: str) -> str:
+        """Reaproveita o hash do arquivo se ainda corresponder à senha; senão gera e grava"""
+        stored = self._read_file().get(username)
+        if stored and self.pool.verify(password, stored):
+            with self._lock:
+                self.stats['hashes_validados'] += 1
+            return stored
+
+        password_hash = self.pool.hash(password)
+        with self._lock:
+            self.stats['hashes_gerados'] += 1
+        self._write_hash(username, password_hash)
+        logger.info(f"🔐 Hash de senha gerado para usuário: {username}")
+        return password_hash
+
+    def _read_file(self) -> Dict[str, str]:
+        try:
+            with open(self.credentials_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ Arquivo de credenciais ilegível ({self.credentials_file}): {str(e)}")
+            return {}
+
+    def _write_hash(self, username: str, password_hash: str) -> None:
+        """
+        Grava o hash com permissão 600 (substituição atômica)
+
+        O arquivo temporário tem nome único no mesmo diretório (mkstemp já cria
+        com permissão 600), para que processos gravando ao mesmo tempo não
+        compartilhem o mesmo temporário.
+        """
+        directory = os.path.dirname(os.path.abspath(self.credentials_file))
+        tmp_file = None
+        try:
+            with self._file_lock:
+                data = self._read_file()
+                data[username] = password_hash
+                with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory,
+                                                 prefix='.credentials-', suffix='.tmp', delete=False) as f:
+                    tmp_file = f.name
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_file, self.credentials_file)
+                tmp_file = None
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível gravar o arquivo de credenciais: {str(e)}")
+        finally:
+            if tmp_file is not None:
+                try:
+                    os.remove(tmp_file)
+                except OSError:
+                    pass
+
+# Instância global (uma por processo)
+credential_store = CredentialStore()
@@ -0,0 +1,216 @@
+"""
+Tokens de sessão assinados (HMAC) para restaurar o login após recarregar a página
+"""
+
+import os
+import json
+import hmac
+import time
+import base64
+import hashlib
+import secrets
+import sqlite3
+import threading
+from typing import Dict, Any, Optional
+from loguru import logger
+
+from config.settings import settings
+
+PLACEHOLDER_SECRET_KEY = 'your-secret-key-here-CHANGE-ME'
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+class SessionTokenManager:
+    """
+    Emite e valida tokens de sessão no formato <payload>.<assinatura>
+
+    O payload (JSON em base64url) leva usuário, emissão, expiração, um
+    identificador único (jti) e, quando o IP do cliente é conhecido, uma
+    impressão HMAC desse IP (c); a assinatura é HMAC-SHA256 com SECRET_KEY e
+    é comparada em tempo constante. Validar um token custa microssegundos,
+    enquanto um login completo executa bcrypt.
+
+    Revogação no servidor, persistida em SQLite (SESSION_REVOCATION_DB_PATH)
+    para valer após reinícios e em todos os processos:
+    - revoke(token): invalida um token (logout, troca), até a sua expiração
+    - revoke_user(username): invalida todos os tokens emitidos antes de agora
+    Com SESSION_REVOCATION_DB_PATH vazio, ou se o SQLite falhar, a revogação
+    fica só na memória do processo.
+    """
+
+    def __init__(self, secret_key: Optional[str] = None, db_path: Optional[str] = None):
+        secret_key = secret_key or os.getenv('SECRET_KEY', '')
+        if not secret_key or secret_key == PLACEHOLDER_SECRET_KEY:
+            # Sem chave configurada os tokens valem só enquanto o processo viver
+            logger.warning("🔒 ATENÇÃO: SECRET_KEY não configurada! Sessões não sobrevivem a reinícios.")
+            secret_key = secrets.token_hex(32)
+
+        # Chave derivada: SECRET_KEY pode ser usada para outros fins
+        self._key = hmac.new(secret_key.encode('utf-8'), b'session-token', hashlib.sha256).digest()
+        self._lock = threading.Lock()
+        self._revoked: Dict[str, float] = {}      # jti -> expiração
+        self._not_before: Dict[str, float] = {}   # usuário -> tokens anteriores inválidos
+        self.stats = {'emitidos': 0, 'validados': 0, 'recusados': 0, 'revogados': 0}
+
+        self.db_path = settings.SESSION_REVOCATION_DB_PATH if db_path is None else db_path
+        self._local = threading.local()
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("CREATE TABLE IF NOT EXISTS revoked_tokens (jti TEXT PRIMARY KEY, exp REAL)")
+                    conn.execute("CREATE TABLE IF NOT EXISTS user_not_before (username TEXT PRIMARY KEY, ts REAL)")
+            except Exception as e:
+                logger.error(f"❌ Revogação de sessões em SQLite indisponível, usando memória: {str(e)}")
+                self.db_path = ""
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexão por thread (sqlite3 não compartilha conexões entre threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self._key, payload.encode('ascii'), hashlib.sha256).digest())
+
+    def _client_fingerprint(self, client: str) -> str:
+        """Impressão do cliente no token (o IP não fica legível na URL)"""
+        return _b64encode(hmac.new(self._key, f"cliente:{client}".encode('utf-8'), hashlib.sha256).digest()[:12])
+
+    def issue(self, username: str, ttl_minutes: Optional[int] = None, client: Optional[str] = None,
+              expires_at: Optional[float] = None, issued_at: Optional[float] = None) -> str:
+        """
+        Emite um token para o usuário
+
+        Args:
+            username: Nome do usuário
+            ttl_minutes: Validade em minutos (padrão: SESSION_TOKEN_TTL_MINUTES)
+            client: IP do cliente; o token só valida para o mesmo cliente
+            expires_at: Expiração absoluta (troca de token mantém a da sessão)
+            issued_at: Momento do login (troca de token mantém o original)
+
+        Returns:
+            Token assinado
+        """
+        now = time.time()
+        ttl_minutes = settings.SESSION_TOKEN_TTL_MINUTES if ttl_minutes is None else ttl_minutes
+        claims = {
+            'u': username,
+            'iat': now if issued_at is None else issued_at,
+            'exp': int(now + ttl_minutes * 60) if expires_at is None else int(expires_at),
+            'jti': secrets.token_urlsafe(12)
+        }
+        if client:
+            claims['c'] = self._client_fingerprint(client)
+        payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+
+        with self._lock:
+            self.stats['emitidos'] += 1
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token: Optional[str], client: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Valida assinatura, expiração, cliente e revogação
+
+        Args:
+            token: Token recebido do navegador
+            client: IP do cliente atual (obrigatório para tokens vinculados)
+
+        Returns:
+            Payload do token se válido, None caso contrário
+        """
+        claims = self._decode(token)
+        now = time.time()
+
+        valid = (
+            claims is not None
+            and claims['exp'] > now
+            and ('c' not in claims or (client is not None and hmac.compare_digest(
+                claims['c'], self._client_fingerprint(client))))
+            and not self._is_revoked(claims)
+        )
+        with self._lock:
+            self.stats['validados' if valid else 'recusados'] += 1
+
+        return claims if valid else None
+
+    def _is_revoked(self, claims: Dict[str, Any]) -> bool:
+        """
+        Consulta a revogação do token e o marco do usuário (memória, depois SQLite)
+
+        Falha ao consultar o SQLite conta como revogado: sem confirmar que o
+        token segue válido, o usuário volta para o login completo.
+        """
+        with self._lock:
+            if claims['jti'] in self._revoked or claims['iat'] < self._not_before.get(claims['u'], 0.0):
+                return True
+        if not self.db_path:
+            return False
+        try:
+            conn = self._connect()
+            if conn.execute("SELECT 1 FROM revoked_tokens WHERE jti = ?", (claims['jti'],)).fetchone():
+                return True
+            row = conn.execute("SELECT ts FROM user_not_before WHERE username = ?", (claims['u'],)).fetchone()
+            return row is not None and claims['iat'] < row[0]
+        except Exception as e:
+            logger.error(f"❌ Erro ao consultar revogação de sessões (token recusado): {str(e)}")
+            return True
+
+    def _decode(self, token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Confere a assinatura (tempo constante) antes de interpretar o payload"""
+        try:
+            payload, signature = (token or '').split('.')
+            if not hmac.compare_digest(signature.encode('ascii'), self._sign(payload).encode('ascii')):
+                return None
+            claims = json.loads(_b64decode(payload))
+            if not isinstance(claims, dict) or not {'u', 'iat', 'exp', 'jti'} <= claims.keys():
+                return None
+            return claims
+        except Exception:
+            return None
+
+    def revoke(self, token: Optional[str]) -> None:
+        """Invalida o token até a sua expiração (ex.: logout)"""
+        claims = self._decode(token)
+        if claims is None:
+            return
+
+        now = time.time()
+        with self._lock:
+            # Descarta revogações de tokens que já expiraram
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            self._revoked[claims['jti']] = claims['exp']
+            self.stats['revogados'] += 1
+
+        if self.db_path:
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM revoked_tokens WHERE exp <= ?", (now,))
+                conn.execute("INSERT OR REPLACE INTO revoked_tokens VALUES (?, ?)", (claims['jti'], claims['exp']))
+            except Exception as e:
+                logger.error(f"❌ Erro ao gravar revogação de sessão: {str(e)}")
+
+    def revoke_user(self, username: str) -> None:
+        """Invalida todos os tokens já emitidos para o usuário"""
+        now = time.time()
+        with self._lock:
+            self._not_before[username] = now
+        if self.db_path:
+            try:
+                self._connect().execute("INSERT OR REPLACE INTO user_not_before VALUES (?, ?)", (username, now))
+            except Exception as e:
+                logger.error(f"❌ Erro ao gravar revogação de sessões: {str(e)}")
+        logger.info(f"🔒 Sessões revogadas para: {username}")
+
+# Instância global (a revogação vale para todas as sessões do processo)
+session_tokens = SessionTokenManager()
@@ -40,6 +40,58 @@ class Settings(BaseSettings):
     MIN_VALOR: float = 0.01
     MAX_OBSERVACOES: int = 500
     
+    # Cache persistente em disco (L2 do CacheManager)
+    CACHE_DISK_ENABLED: bool = True
+    CACHE_DISK_DIR: str = ".cache/dashboard"
+    CACHE_DISK_MAX_MB: int = 256
+    CACHE_DISK_WARM_KEYS: int = 50
+    
+    # Replay do estoque a partir das movimentações (eventos entre checkpoints)
+    ESTOQUE_CHECKPOINT_EVENTOS: int = 5000
+    
+    # Previsão de consumo (alertas de reposição)
+    PREVISAO_JANELAS_DIAS: List[int] = [30, 90]
+    PREVISAO_LEAD_TIME_DIAS: int = 14
+    PREVISAO_FATOR_SEGURANCA: float = 1.65
+    ESTOQUE_MINIMO_PADRAO: int = 5  # Itens sem histórico de saída
+    # Limite por categoria; o limite por produto fica na coluna estoque_minimo do estoque
+    ESTOQUE_MINIMO_CATEGORIA: Dict[str, int] = {}
+    
+    # Verificação de senhas (pool limitado de threads bcrypt)
+    AUTH_VERIFY_WORKERS: int = 0  # 0 = número de CPUs
+    AUTH_VERIFY_MAX_QUEUE: int = 32
+    AUTH_VERIFY_TIMEOUT_SECONDS: float = 30.0
+    
+    # Rate limiting (vazio = memória do processo; caminho = SQLite compartilhado entre processos)
+    RATE_LIMIT_DB_PATH: str = ""
+    RATE_LIMIT_MAX_KEYS: int = 10000
+    
+    # Logging (sink configurado uma vez por processo) e auditoria em JSON Lines
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE: str = "logs/dashboard.log"
+    LOG_ENQUEUE: bool = True  # Escrita em disco fora da thread que registra
+    AUDIT_LOG_FILE: str = "logs/audit.jsonl"
+    AUDIT_BATCH_SIZE: int = 100
+    AUDIT_FLUSH_SECONDS: float = 1.0
+    LOG_SAMPLE_EVERY: int = 100  # Debug em laços: uma linha a cada N
+    
+    # Figuras Plotly memoizadas (LRU do processo)
+    PLOTLY_FIGURE_CACHE_SIZE: int = 64
+    # Séries longas: redução por LTTB e traço WebGL
+    PLOTLY_LINHA_MAX_PONTOS: int = 500
+    PLOTLY_WEBGL_MIN_PONTOS: int = 1000
+    
+    # Fragmentos (reruns parciais): exibir o tempo de cada execução abaixo do painel
+    FRAGMENT_TIMING_VISIVEL: bool = False
+    
+    # Orçamento do primeiro run até a página de login (python -m utils.startup_profile --check)
+    STARTUP_LOGIN_MAX_MS: int = 1500
+    
+    # Tokens de sessão assinados (restauram o login ao recarregar a página)
+    SESSION_TOKEN_TTL_MINUTES: int = 480
+    SESSION_TOKEN_REMEMBER_DAYS: int = 7  # Com "Lembrar-me"
+    SESSION_REVOCATION_DB_PATH: str = ".cache/sessoes.sqlite3"  # Vazio = revogação só em memória
+    
     # Sistema de cores profissional moderno
     THEME_COLORS: Dict[str, str] = {
         # === CORES PRIMÁRIAS CORPORATIVAS ===
@@ -37,6 +37,7 @@ class Equipamento(BaseModel):
     fornecedor: str = Field(..., min_length=1, max_length=100)
     status: str = "Disponível"
     condicao: CondicionEquipamento = Field(default=CondicionEquipamento.NOVO, description="Condição do equipamento: Novo ou Usado")
+    estoque_minimo: Optional[int] = Field(default=None, ge=0, le=1000, description="Limite de baixo estoque do produto (vazio = categoria/previsão)")
     
     @field_validator('codigo_produto')
     @classmethod
@@ -67,6 +68,11 @@ class Movimentacao(BaseModel):
     observacoes: Optional[str] = Field(None, max_length=500)
     codigo_produto: Optional[str] = None
     condicao: CondicionEquipamento = Field(default=CondicionEquipamento.NOVO, description="Condição do equipamento movimentado: Novo ou Usado")
+    codigo_saida: Optional[str] = Field(None, max_length=50, description="Código de rastreamento informado na saída")
+    # Atributos do equipamento no momento da movimentação (preservados se o item for alterado ou removido)
+    equipamento: Optional[str] = None
+    categoria: Optional[str] = None
+    marca: Optional[str] = None
     
     @field_validator('observacoes')
     @classmethod
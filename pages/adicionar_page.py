@@ -14,6 +14,7 @@ import io
 from services.estoque_service import EstoqueService
 from models.schemas import Equipamento, CondicionEquipamento
 from config.settings import settings
+from utils.fragment_utils import fragmento_medido
 from utils.ui_utils import (
     create_form_section, show_success_message, show_error_message, 
     show_warning_message, show_toast, create_action_buttons,
@@ -167,6 +168,7 @@ class AdicionarEquipamentoProfessional:
         # Formulário moderno com validação em tempo real
         self._render_formulario_moderno(produto_encontrado, codigo_input)
     
+    @fragmento_medido("adicionar_lote")
     def _render_adicao_lote(self) -> None:
         """Renderiza interface para adição em lote usando data_editor"""
         st.markdown("### 📦 Adição em Lote - Data Editor Profissional")
@@ -687,6 +689,19 @@ class AdicionarEquipamentoProfessional:
                 placeholder="Ex: Dell Brasil",
                 key="campo_fornecedor"
             )
+            
+            # Limite de baixo estoque do produto (vazio = limite da categoria/previsão)
+            st.number_input(
+                "🚨 Estoque Mínimo",
+                min_value=0,
+                max_value=1000,
+                value=produto_existente.get('estoque_minimo') if produto_existente else None,
+                step=1,
+                placeholder="Padrão da categoria",
+                help="Alerta de baixo estoque quando o total (Novo + Usado) ficar neste valor ou abaixo. "
+                     "Deixe vazio para usar o limite da categoria ou a previsão de consumo.",
+                key="campo_estoque_minimo"
+            )
         
         # Cálculos em tempo real com condição
         if quantidade > 0 and valor_unitario > 0:
@@ -778,6 +793,7 @@ class AdicionarEquipamentoProfessional:
         valor_unitario = st.session_state.get('campo_valor', 100.0)
         fornecedor = st.session_state.get('campo_fornecedor', '')
         condicao = st.session_state.get('campo_condicao', CondicionEquipamento.NOVO.value)
+        estoque_minimo = st.session_state.get('campo_estoque_minimo')
         
         # Validar dados
         erros = self._validar_dados_moderno(
@@ -798,14 +814,16 @@ class AdicionarEquipamentoProfessional:
         # Processar adição
         self._executar_adicao(
             equipamento, categoria, marca, modelo, codigo_produto,
-            quantidade, valor_unitario, fornecedor, condicao, is_produto_existente, produto_existente
+            quantidade, valor_unitario, fornecedor, condicao, is_produto_existente, produto_existente,
+            estoque_minimo
         )
     
     def _executar_adicao(self, equipamento: str, categoria: str, marca: str,
                         modelo: str, codigo_produto: str, quantidade: int,
                         valor_unitario: float, fornecedor: str, condicao: str,
-                        is_produto_existente: bool, produto_existente: Optional[Dict]) -> None:
-        """Executa a adição do equipamento"""
+                        is_produto_existente: bool, produto_existente: Optional[Dict],
+                        estoque_minimo: Optional[int] = None) -> None:
+        """Executa a adição do equipamento (estoque_minimo None = limite da categoria/previsão)"""
         try:
             if is_produto_existente and produto_existente:
                 # Buscar equipamento específico da condição selecionada
@@ -830,11 +848,18 @@ class AdicionarEquipamentoProfessional:
                         quantidade=quantidade,
                         valor_unitario=valor_unitario,
                         fornecedor=fornecedor.strip(),
-                        condicao=condicao_enum
+                        condicao=condicao_enum,
+                        estoque_minimo=estoque_minimo
                     )
                     
                     response = self.estoque_service.adicionar_equipamento(novo_equipamento)
                 
+                # Limite alterado no formulário vale para todas as condições do código
+                if response.success and estoque_minimo != produto_existente.get('estoque_minimo'):
+                    response_minimo = self.estoque_service.definir_estoque_minimo(codigo_produto, estoque_minimo)
+                    if not response_minimo.success:
+                        show_error_message(f"❌ Estoque mínimo não atualizado: {response_minimo.message}")
+                
                 if response.success:
                     # Atualizar estatísticas
                     st.session_state.adicionar_stats['total_added_today'] += quantidade
@@ -869,7 +894,8 @@ class AdicionarEquipamentoProfessional:
                     quantidade=quantidade,
                     valor_unitario=valor_unitario,
                     fornecedor=fornecedor.strip(),
-                    condicao=condicao_enum
+                    condicao=condicao_enum,
+                    estoque_minimo=estoque_minimo
                 )
                 
                 response = self.estoque_service.adicionar_equipamento(novo_equipamento)
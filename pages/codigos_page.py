@@ -44,7 +44,7 @@ class CodigosPage:
         df_filtrado = self._aplicar_filtros(df_estoque, filtros)
         
         # Gráficos de análise
-        self._render_charts(df_filtrado)
+        self._render_charts(df_filtrado, self._filtros_do_cubo(df_estoque, filtros))
         
         # Tabela de códigos
         self._render_codes_table(df_filtrado)
@@ -197,8 +197,35 @@ class CodigosPage:
         
         return df_filtrado
     
-    def _render_charts(self, df: pd.DataFrame) -> None:
-        """Renderiza gráficos de análise"""
+    def _filtros_do_cubo(self, df: pd.DataFrame, filtros: dict) -> Optional[dict]:
+        """
+        Filtros expressos nas dimensões do cubo
+        
+        Returns:
+            Dicionário categoria/marca/status para CuboEstoque.fatia, ou None se
+            busca ou faixas de valor/quantidade restringirem os dados
+        """
+        if filtros.get('busca'):
+            return None
+        
+        faixas = {'valor_range': 'valor_unitario', 'quantidade_range': 'quantidade'}
+        for filtro, coluna in faixas.items():
+            if filtros.get(filtro) and tuple(filtros[filtro]) != (df[coluna].min(), df[coluna].max()):
+                return None
+        
+        return {
+            'categoria': filtros['categoria'] if filtros.get('categoria') not in (None, "Todas") else None,
+            'marca': filtros['marca'] if filtros.get('marca') not in (None, "Todas") else None,
+            'status': filtros['status'] if filtros.get('status') not in (None, "Todos") else None
+        }
+    
+    def _render_charts(self, df: pd.DataFrame, filtros_cubo: Optional[dict] = None) -> None:
+        """
+        Renderiza gráficos de análise
+        
+        Com filtros apenas de categoria/marca/status os gráficos são fatias do
+        cubo de agregados; com busca ou faixas usa os registros filtrados.
+        """
         if df.empty:
             st.info("📊 Nenhum produto encontrado com os filtros aplicados.")
             return
@@ -206,11 +233,20 @@ class CodigosPage:
         st.markdown("---")
         st.markdown("### 📊 Análises dos Códigos")
         
+        if filtros_cubo is not None:
+            cubo = self.estoque_service.obter_cubo()
+            df_categoria = cubo.fatia(['categoria'], **filtros_cubo)[['categoria', 'registros']]
+            df_marca = cubo.fatia(['marca'], **filtros_cubo)[['marca', 'registros']]
+            df_categoria = df_categoria.rename(columns={'registros': 'quantidade'})
+            df_marca = df_marca.rename(columns={'registros': 'quantidade'})
+        else:
+            df_categoria = df.groupby('categoria').size().reset_index(name='quantidade')
+            df_marca = df.groupby('marca').size().reset_index(name='quantidade')
+        
         col1, col2 = st.columns(2)
         
         with col1:
             # Gráfico por categoria
-            df_categoria = df.groupby('categoria').size().reset_index(name='quantidade')
             fig_categoria = create_pie_chart(
                 df_categoria,
                 'quantidade',
@@ -221,7 +257,6 @@ class CodigosPage:
         
         with col2:
             # Gráfico por marca
-            df_marca = df.groupby('marca').size().reset_index(name='quantidade')
             df_marca = df_marca.sort_values('quantidade', ascending=False).head(10)
             
             fig_marca = create_bar_chart(
@@ -306,15 +341,19 @@ class CodigosPage:
                 st.info("Códigos de produto não disponíveis para análise")
                 return
             
-            # Análise de prefixos
-            prefixos = df['codigo_produto'].str.split('-').str[0].value_counts()
+            # Estatísticas mantidas incrementalmente pelo serviço
+            estrutura = self.estoque_service.obter_estrutura_codigos()
+            total_produtos = estrutura.total
+            if total_produtos == 0:
+                st.info("Códigos de produto não disponíveis para análise")
+                return
             
             col1, col2 = st.columns(2)
             
             with col1:
                 st.markdown("#### 🏷️ Prefixos Mais Utilizados")
-                for i, (prefixo, count) in enumerate(prefixos.head(5).items()):
-                    percentage = (count / len(df)) * 100
+                for i, (prefixo, count) in enumerate(estrutura.prefixos_mais_usados(5)):
+                    percentage = (count / total_produtos) * 100
                     st.metric(
                         f"{i+1}º {prefixo}",
                         f"{count} códigos",
@@ -325,15 +364,13 @@ class CodigosPage:
                 st.markdown("#### 📊 Estatísticas dos Códigos")
                 
                 # Comprimento médio dos códigos
-                comprimento_medio = df['codigo_produto'].str.len().mean()
                 st.metric(
                     "Comprimento Médio",
-                    f"{comprimento_medio:.1f} caracteres"
+                    f"{estrutura.comprimento_medio:.1f} caracteres"
                 )
                 
                 # Códigos únicos
-                codigos_unicos = df['codigo_produto'].nunique()
-                total_produtos = len(df)
+                codigos_unicos = estrutura.codigos_unicos
                 st.metric(
                     "Códigos Únicos",
                     f"{codigos_unicos}/{total_produtos}",
@@ -341,20 +378,25 @@ class CodigosPage:
                 )
                 
                 # Padrões mais comuns
-                if not df.empty:
-                    padrao_mais_comum = df['codigo_produto'].str.extract(r'([A-Z]+-[A-Z]+)').iloc[:, 0].mode()
-                    if not padrao_mais_comum.empty:
-                        st.metric(
-                            "Padrão Mais Comum",
-                            padrao_mais_comum.iloc[0]
-                        )
+                padrao_mais_comum = estrutura.padrao_mais_comum()
+                if padrao_mais_comum:
+                    st.metric(
+                        "Padrão Mais Comum",
+                        padrao_mais_comum
+                    )
+                
+                # Códigos fora do padrão CAT-MARCA-NNN
+                st.metric(
+                    "Fora do Padrão",
+                    f"{estrutura.fora_do_padrao} registros"
+                )
             
-            # Códigos duplicados (se houver)
-            codigos_duplicados = df[df['codigo_produto'].duplicated(keep=False)]
+            # Código + condição duplicados (o mesmo código em Novo e Usado é esperado)
+            codigos_duplicados = estrutura.duplicados()
             if not codigos_duplicados.empty:
                 st.warning(f"⚠️ Encontrados {len(codigos_duplicados)} códigos duplicados!")
                 with st.expander("Ver códigos duplicados"):
-                    st.dataframe(codigos_duplicados[['codigo_produto', 'equipamento']])
+                    st.dataframe(codigos_duplicados[['codigo_produto', 'condicao', 'equipamento']])
             else:
                 st.success("✅ Todos os códigos são únicos!")
             
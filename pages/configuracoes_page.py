@@ -7,6 +7,7 @@ from typing import Dict, Any
 from loguru import logger
 
 from config.settings import settings
+from utils.fragment_utils import get_fragment_stats
 from utils.ui_utils import (
     create_form_section, show_success_message, show_info_message,
     create_action_buttons
@@ -157,6 +158,8 @@ class ConfiguracoesPage:
             st.markdown("• Validação de dados")
             st.markdown("• Logs estruturados")
         
+        self._render_custo_fragmentos()
+        
         # Ações rápidas
         st.markdown("---")
         st.markdown("### 🔧 Ações Rápidas")
@@ -190,6 +193,31 @@ class ConfiguracoesPage:
                 show_success_message("Configurações resetadas para padrão!")
                 st.rerun()
 
+    def _render_custo_fragmentos(self) -> None:
+        """Tempo de execução por painel (fragmento), em reruns completos e parciais"""
+        st.markdown("### ⏱️ Custo de Rerun por Painel")
+        
+        linhas = get_fragment_stats()
+        if not linhas:
+            st.caption("Nenhum painel executado ainda neste processo.")
+            return
+        
+        st.dataframe(
+            linhas,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "fragmento": st.column_config.TextColumn("Painel"),
+                "completas": st.column_config.NumberColumn("Reruns completos", format="%d"),
+                "media_completa_ms": st.column_config.NumberColumn("Média completo (ms)", format="%.1f"),
+                "parciais": st.column_config.NumberColumn("Reruns parciais", format="%d"),
+                "media_parcial_ms": st.column_config.NumberColumn("Média parcial (ms)", format="%.1f"),
+                "ultimo_ms": st.column_config.NumberColumn("Último (ms)", format="%.1f"),
+                "max_ms": st.column_config.NumberColumn("Máximo (ms)", format="%.1f")
+            }
+        )
+        st.caption("Reruns parciais reexecutam só o painel; ative FRAGMENT_TIMING_VISIVEL para ver o tempo abaixo de cada painel.")
+
 def render_configuracoes_page() -> None:
     """Função para renderizar a página de configurações"""
     page = ConfiguracoesPage()
@@ -4,9 +4,13 @@ Página principal do dashboard modernizada
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 from typing import Dict, Any
 
 from services.estoque_service import EstoqueService
+from services.cubo_service import CuboEstoque
+from services.alerta_service import contar_por_severidade
+from utils.fragment_utils import fragmento_medido
 from utils.plotly_utils import create_pie_chart, create_bar_chart, create_line_chart, create_treemap
 from utils.ui_utils import (
     create_form_section, create_info_cards, create_data_table,
@@ -27,8 +31,7 @@ class DashboardPage:
             # Recarregar dados
             self.estoque_service.recarregar_dados()
             
-            # Obter dados originais para gráfico temporal e agrupados para o resto
-            df_estoque_original = self.estoque_service.obter_equipamentos()
+            # Agregados por código para tabela/alertas (os gráficos leem o cubo no próprio fragmento)
             df_estoque_agrupado = self.estoque_service.obter_equipamentos_agrupados()
             stats = self.estoque_service.obter_estatisticas()
             
@@ -37,20 +40,12 @@ class DashboardPage:
             
             st.markdown("---")
             
-            if df_estoque_original.empty:
+            if df_estoque_agrupado.empty:
                 st.warning("Nenhum equipamento cadastrado no estoque.")
                 return
             
-            # Layout dos gráficos
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                self._render_pie_chart_agrupado(df_estoque_agrupado)
-                self._render_bar_chart_marca_agrupado(df_estoque_agrupado)
-            
-            with col2:
-                self._render_line_chart(df_estoque_original)  # Mantém dados originais para temporal
-                self._render_treemap_value_agrupado(df_estoque_agrupado)
+            # Layout dos gráficos (fragmento: interações nos gráficos não reexecutam a página)
+            self._render_graficos()
             
             st.markdown("---")
             
@@ -64,17 +59,38 @@ class DashboardPage:
             logger.error(f"Erro ao renderizar dashboard: {str(e)}")
             st.error(f"Erro ao carregar dashboard: {str(e)}")
     
+    @fragmento_medido("dashboard_graficos")
+    def _render_graficos(self) -> None:
+        """Grade de gráficos do cubo; interações aqui não reexecutam o restante do app"""
+        if st.button("🔄 Atualizar dados", key="dashboard_atualizar_graficos"):
+            versao_anterior = self.estoque_service.movimentacao_service.versao_dados
+            self.estoque_service.recarregar_dados()
+            # Cards e tabela ficam fora do fragmento: dados novos exigem rerun do app
+            if self.estoque_service.movimentacao_service.versao_dados != versao_anterior:
+                st.rerun()
+        
+        cubo = self.estoque_service.obter_cubo()
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            self._render_pie_chart_agrupado(cubo)
+            self._render_bar_chart_marca_agrupado(cubo)
+        
+        with col2:
+            self._render_line_chart_agrupado(cubo)
+            self._render_treemap_value_agrupado(cubo)
+    
     # ===== MÉTODOS OTIMIZADOS PARA DADOS AGRUPADOS =====
     
-    def _render_pie_chart_agrupado(self, df_agrupado: pd.DataFrame) -> None:
-        """Renderiza gráfico de pizza por categoria (dados já agrupados)"""
+    def _render_pie_chart_agrupado(self, cubo: CuboEstoque) -> None:
+        """Renderiza gráfico de pizza por categoria (fatia do cubo)"""
         try:
-            if df_agrupado.empty:
+            if cubo.df.empty:
                 st.info("Sem dados para exibir gráfico de categorias")
                 return
                 
-            # Dados já estão agrupados, apenas agrupar por categoria
-            df_categoria = df_agrupado.groupby('categoria')['quantidade'].sum().reset_index()
+            df_categoria = cubo.fatia(['categoria'])[['categoria', 'quantidade']]
             
             fig = create_pie_chart(
                 df_categoria, 
@@ -87,15 +103,14 @@ class DashboardPage:
             logger.error(f"Erro ao criar gráfico de pizza: {str(e)}")
             st.error("Erro ao carregar gráfico de categorias")
     
-    def _render_bar_chart_marca_agrupado(self, df_agrupado: pd.DataFrame) -> None:
-        """Renderiza gráfico de barras por marca (dados já agrupados)"""
+    def _render_bar_chart_marca_agrupado(self, cubo: CuboEstoque) -> None:
+        """Renderiza gráfico de barras por marca (fatia do cubo)"""
         try:
-            if df_agrupado.empty:
+            if cubo.df.empty:
                 st.info("Sem dados para exibir gráfico de marcas")
                 return
                 
-            # Dados já estão agrupados, apenas agrupar por marca
-            df_marca = df_agrupado.groupby('marca')['quantidade'].sum().reset_index()
+            df_marca = cubo.fatia(['marca'])[['marca', 'quantidade']]
             df_marca = df_marca.sort_values('quantidade', ascending=False)
             
             fig = create_bar_chart(
@@ -109,15 +124,35 @@ class DashboardPage:
             logger.error(f"Erro ao criar gráfico de barras: {str(e)}")
             st.error("Erro ao carregar gráfico de marcas")
     
-    def _render_treemap_value_agrupado(self, df_agrupado: pd.DataFrame) -> None:
-        """Renderiza treemap de valor por categoria (dados já agrupados)"""
+    def _render_line_chart_agrupado(self, cubo: CuboEstoque) -> None:
+        """Renderiza gráfico de registros recebidos por mês (fatia do cubo)"""
         try:
-            if df_agrupado.empty:
+            chegadas_por_mes = cubo.fatia(['mes']).sort_values('mes')
+            
+            if not chegadas_por_mes.empty:
+                fig = create_line_chart(
+                    chegadas_por_mes['mes'].dt.strftime('%Y-%m').tolist(),
+                    chegadas_por_mes['registros'].tolist(),
+                    '📅 Equipamentos Recebidos por Mês',
+                    'Mês',
+                    'Quantidade'
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("Dados temporais insuficientes para gráfico")
+        except Exception as e:
+            logger.error(f"Erro ao criar gráfico temporal: {str(e)}")
+            st.error("Erro ao carregar gráfico temporal")
+    
+    def _render_treemap_value_agrupado(self, cubo: CuboEstoque) -> None:
+        """Renderiza treemap de valor por categoria (fatia do cubo)"""
+        try:
+            if cubo.df.empty:
                 st.info("Sem dados para exibir treemap de valores")
                 return
                 
-            # Usar valor_total já calculado e agrupar por categoria
-            df_valor = df_agrupado.groupby('categoria')['valor_total'].sum().reset_index()
+            # Valor real (quantidade × valor unitário de cada condição)
+            df_valor = cubo.fatia(['categoria'])[['categoria', 'valor']].rename(columns={'valor': 'valor_total'})
             
             fig = create_treemap(
                 df_valor,
@@ -157,27 +192,50 @@ class DashboardPage:
             logger.error(f"Erro ao renderizar tabela: {str(e)}")
             st.error("Erro ao carregar tabela de estoque")
     
-    def _render_low_stock_alert_agrupado(self, df_agrupado: pd.DataFrame, limite: int = 5) -> None:
-        """Renderiza alerta de baixo estoque (dados já agrupados)"""
+    def _render_low_stock_alert_agrupado(self, df_agrupado: pd.DataFrame) -> None:
+        """
+        Renderiza alerta de baixo estoque em uma única tabela ordenável
+        
+        Limites por produto (estoque_minimo), por categoria ou pelo ponto de
+        reposição projetado pela taxa de consumo.
+        """
         try:
             if df_agrupado.empty:
                 return
-                
-            baixo_estoque = df_agrupado[df_agrupado['quantidade'] <= limite]
             
-            if not baixo_estoque.empty:
-                st.markdown("### ⚠️ Alertas de Baixo Estoque")
-                
-                for _, item in baixo_estoque.iterrows():
-                    st.warning(
-                        f"**{item['equipamento']}** - "
-                        f"Código: {item.get('codigo_produto', 'N/A')} - "
-                        f"Quantidade Total: {item['quantidade']} unidades"
-                    )
-                
-                # Toast para alertas críticos
-                if len(baixo_estoque) > 0:
-                    show_toast(f"⚠️ {len(baixo_estoque)} equipamento(s) com baixo estoque!")
+            alertas = self.estoque_service.avaliar_baixo_estoque()
+            if alertas.empty:
+                return
+            
+            st.markdown("### ⚠️ Alertas de Baixo Estoque")
+            
+            contagem = contar_por_severidade(alertas)
+            icones = {'Crítico': '🔴', 'Alto': '🟠', 'Atenção': '🟡'}
+            st.markdown(" · ".join(f"{icones[sev]} **{sev}:** {total}" for sev, total in contagem.items()))
+            
+            df_display = alertas.assign(
+                severidade=alertas['severidade'].astype(str),
+                dias_cobertura=alertas['dias_cobertura'].replace(np.inf, np.nan)
+            )
+            st.dataframe(
+                df_display,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "severidade": st.column_config.TextColumn("Severidade"),
+                    "codigo_produto": st.column_config.TextColumn("Código"),
+                    "equipamento": st.column_config.TextColumn("Equipamento"),
+                    "categoria": st.column_config.TextColumn("Categoria"),
+                    "quantidade": st.column_config.NumberColumn("Quantidade Total", format="%d"),
+                    "limite": st.column_config.NumberColumn("Limite", format="%d"),
+                    "origem_limite": st.column_config.TextColumn("Origem do Limite"),
+                    "taxa_diaria": st.column_config.NumberColumn("Saída/dia", format="%.2f"),
+                    "dias_cobertura": st.column_config.NumberColumn("Cobertura (dias)", format="%.0f")
+                }
+            )
+            
+            # Toast para alertas críticos
+            show_toast(f"⚠️ {len(alertas)} equipamento(s) com baixo estoque!")
             
         except Exception as e:
             logger.error(f"Erro ao verificar baixo estoque: {str(e)}")
@@ -5,10 +5,13 @@ Página modernizada para histórico de movimentações com cache inteligente
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from loguru import logger
 
 from services.estoque_service import EstoqueService
+from services.rollup_service import RollupMovimentacoes
+from services.indice_service import PaginaMovimentacoes
+from utils.fragment_utils import fragmento_medido, rerun_painel
 from utils.plotly_utils import create_bar_chart, create_line_chart
 from utils.ui_utils import (
     create_form_section, create_data_table, format_dataframe_for_display,
@@ -38,6 +41,17 @@ class HistoricoMovimentacoesPageProfessional:
             self._render_empty_state()
             return
         
+        # Estatísticas do histórico completo na sidebar (fora do fragmento)
+        self._render_estatisticas_sidebar()
+        
+        # Controles, filtros e tabs: fragmento reexecutado sozinho a cada interação
+        self._render_painel()
+    
+    @fragmento_medido("historico_painel")
+    def _render_painel(self) -> None:
+        """Controles, filtros e tabs do histórico (rerun parcial)"""
+        df_movimentacoes = self._get_movimentacoes_cache()
+        
         # Renderizar controles superiores
         self._render_controles_superiores()
         
@@ -47,8 +61,11 @@ class HistoricoMovimentacoesPageProfessional:
         # Aplicar filtros
         df_filtrado = self._aplicar_filtros_avancados(df_movimentacoes, filtros)
         
+        # Agregados diários para métricas e gráficos (None quando a busca textual exige as linhas)
+        buckets = self._obter_buckets_filtrados(filtros)
+        
         # Tabs organizadas
-        self._render_tabs_organizadas(df_filtrado, df_movimentacoes)
+        self._render_tabs_organizadas(df_filtrado, df_movimentacoes, buckets, filtros)
     
     @st.cache_data(ttl=15, show_spinner=False)  # Cache reduzido para 15 segundos para mais responsividade
     def _get_movimentacoes_cache(_self) -> pd.DataFrame:
@@ -155,7 +172,7 @@ class HistoricoMovimentacoesPageProfessional:
         st.session_state['historico_cache_invalidated'] = True
         self._invalidate_cache()
         show_toast("🔄 Dados recarregados!", "✅")
-        st.rerun()
+        rerun_painel()
     
     def _export_data(self) -> None:
         """Exporta dados"""
@@ -181,36 +198,28 @@ class HistoricoMovimentacoesPageProfessional:
         """Limpa todos os filtros"""
         filter_keys = [
             'hist_tipo_filter', 'hist_periodo_filter', 'hist_data_inicio', 
-            'hist_data_fim', 'hist_busca_equipamento', 'hist_busca_codigo'
+            'hist_data_fim', 'hist_busca_equipamento', 'hist_busca_codigo', 'hist_condicao_filter',
+            'hist_pagina_cursor', 'hist_pagina_assinatura'
         ]
         for key in filter_keys:
             if key in st.session_state:
                 del st.session_state[key]
         show_toast("🧹 Filtros limpos!", "✅")
-        st.rerun()
+        rerun_painel()
     
     def _render_filtros_dinamicos(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Renderiza filtros dinâmicos na sidebar"""
-        st.sidebar.markdown("## 🔍 **Filtros Inteligentes**")
+        """
+        Renderiza filtros dinâmicos no painel
         
+        Ficam dentro do fragmento do histórico (e não na sidebar) para que
+        alterar um filtro reexecute só o painel.
+        """
         filtros = {}
         
-        # Filtro por tipo com contadores
-        tipos_count = df['tipo_movimentacao'].value_counts()
+        # Totais por tipo a partir dos agregados diários
+        tipos_count = self._totais_por_tipo_historico()['movimentacoes_brutas']
         tipos_options = ["🔄 Todos"] + [f"{tipo} ({count})" for tipo, count in tipos_count.items()]
         
-        tipo_selecionado = st.sidebar.selectbox(
-            "📊 Tipo de Movimentação", 
-            tipos_options,
-            key="hist_tipo_filter"
-        )
-        
-        if tipo_selecionado != "🔄 Todos":
-            filtros['tipo'] = tipo_selecionado.split(' (')[0]
-        
-        # Filtros de período otimizados
-        st.sidebar.markdown("### 📅 **Período**")
-        
         periodo_opcoes = {
             "📅 Hoje": 0,
             "📅 Últimos 3 dias": 3,
@@ -221,120 +230,198 @@ class HistoricoMovimentacoesPageProfessional:
             "🎯 Personalizado": -1
         }
         
-        periodo_selecionado = st.sidebar.selectbox(
-            "🕐 Período",
-            list(periodo_opcoes.keys()),
-            index=3,  # Default: últimos 30 dias
-            key="hist_periodo_filter"
-        )
-        
-        if periodo_selecionado == "🎯 Personalizado":
-            col1, col2 = st.sidebar.columns(2)
-            with col1:
-                filtros['data_inicio'] = st.date_input(
-                    "De:",
-                    value=datetime.now() - timedelta(days=30),
-                    key="hist_data_inicio"
+        with st.expander("🔍 **Filtros Inteligentes**", expanded=True):
+            col_tipo, col_periodo, col_condicao = st.columns(3)
+            
+            with col_tipo:
+                # Filtro por tipo com contadores
+                tipo_selecionado = st.selectbox(
+                    "📊 Tipo de Movimentação", 
+                    tipos_options,
+                    key="hist_tipo_filter"
                 )
-            with col2:
-                filtros['data_fim'] = st.date_input(
-                    "Até:",
-                    value=datetime.now(),
-                    key="hist_data_fim"
+            
+            with col_periodo:
+                # Filtros de período otimizados
+                periodo_selecionado = st.selectbox(
+                    "🕐 Período",
+                    list(periodo_opcoes.keys()),
+                    index=3,  # Default: últimos 30 dias
+                    key="hist_periodo_filter"
+                )
+            
+            with col_condicao:
+                condicao_selecionada = st.selectbox(
+                    "🔄 Condição",
+                    ["🔄 Todas", "Novo", "Usado"],
+                    key="hist_condicao_filter"
+                )
+            
+            if periodo_selecionado == "🎯 Personalizado":
+                col1, col2 = st.columns(2)
+                with col1:
+                    filtros['data_inicio'] = st.date_input(
+                        "De:",
+                        value=datetime.now() - timedelta(days=30),
+                        key="hist_data_inicio"
+                    )
+                with col2:
+                    filtros['data_fim'] = st.date_input(
+                        "Até:",
+                        value=datetime.now(),
+                        key="hist_data_fim"
+                    )
+            else:
+                dias = periodo_opcoes[periodo_selecionado]
+                if dias >= 0:
+                    filtros['data_inicio'] = datetime.now() - timedelta(days=dias)
+                    filtros['data_fim'] = datetime.now()
+            
+            # Busca inteligente
+            col_equipamento, col_codigo = st.columns(2)
+            
+            with col_equipamento:
+                filtros['busca_equipamento'] = st.text_input(
+                    "🔍 Nome do Equipamento",
+                    placeholder="Ex: Notebook, Monitor...",
+                    key="hist_busca_equipamento"
+                )
+            
+            with col_codigo:
+                filtros['busca_codigo'] = st.text_input(
+                    "🏷️ Código do Produto",
+                    placeholder="Ex: NB-DELL-001...",
+                    key="hist_busca_codigo"
                 )
-        else:
-            dias = periodo_opcoes[periodo_selecionado]
-            if dias >= 0:
-                filtros['data_inicio'] = datetime.now() - timedelta(days=dias)
-                filtros['data_fim'] = datetime.now()
-        
-        # Busca inteligente
-        st.sidebar.markdown("### 🔍 **Busca Inteligente**")
-        
-        filtros['busca_equipamento'] = st.sidebar.text_input(
-            "🔍 Nome do Equipamento",
-            placeholder="Ex: Notebook, Monitor...",
-            key="hist_busca_equipamento"
-        )
         
-        filtros['busca_codigo'] = st.sidebar.text_input(
-            "🏷️ Código do Produto",
-            placeholder="Ex: NB-DELL-001...",
-            key="hist_busca_codigo"
-        )
+        if tipo_selecionado != "🔄 Todos":
+            filtros['tipo'] = tipo_selecionado.split(' (')[0]
+        if condicao_selecionada != "🔄 Todas":
+            filtros['condicao'] = condicao_selecionada
         
-        # Estatísticas na sidebar - melhoradas e mais precisas
-        st.sidebar.markdown("---")
+        return filtros
+    
+    def _render_estatisticas_sidebar(self) -> None:
+        """Estatísticas rápidas do histórico completo na sidebar"""
         st.sidebar.markdown("### 📊 **Estatísticas Rápidas**")
         
-        # Normalizar todos os tipos antes de contar
-        df_stats = df.copy()
-        df_stats['tipo_normalizado'] = df_stats['tipo_movimentacao'].apply(
-            lambda x: self._normalizar_tipo_movimentacao(x)
-        )
+        # Tipos já normalizados nos totais
+        por_tipo = self._totais_por_tipo_historico()['normalizado']
         
-        total = len(df_stats)
-        entradas = len(df_stats[df_stats['tipo_normalizado'] == 'Entrada'])
-        saidas = len(df_stats[df_stats['tipo_normalizado'] == 'Saída'])
+        total = int(por_tipo['movimentacoes'].sum())
+        entradas = int(por_tipo['movimentacoes'].get('Entrada', 0))
+        saidas = int(por_tipo['movimentacoes'].get('Saída', 0))
         
         # Calcular quantidades também
-        qtd_entradas = df_stats[df_stats['tipo_normalizado'] == 'Entrada']['quantidade'].sum() if entradas > 0 else 0
-        qtd_saidas = df_stats[df_stats['tipo_normalizado'] == 'Saída']['quantidade'].sum() if saidas > 0 else 0
+        qtd_entradas = int(por_tipo['quantidade'].get('Entrada', 0))
+        qtd_saidas = int(por_tipo['quantidade'].get('Saída', 0))
         
         st.sidebar.metric("📊 Total", f"{total:,}")
         st.sidebar.metric("📈 Entradas", f"{entradas:,}", delta=f"+{qtd_entradas:,} itens")
         st.sidebar.metric("📉 Saídas", f"{saidas:,}", delta=f"-{qtd_saidas:,} itens")
+    
+    def _totais_por_tipo_historico(self) -> Dict[str, Any]:
+        """Contagens do histórico completo por tipo (brutas e normalizadas) a partir do rollup"""
+        buckets = self.estoque_service.movimentacao_service.rollup.obter_buckets()
         
-        return filtros
+        movimentacoes_brutas = buckets.groupby('tipo_movimentacao')['movimentacoes'].sum().sort_values(ascending=False)
+        
+        buckets['tipo_movimentacao'] = self._normalizar_tipos_buckets(buckets['tipo_movimentacao'])
+        normalizado = buckets.groupby('tipo_movimentacao')[['movimentacoes', 'quantidade']].sum()
+        
+        return {
+            'movimentacoes_brutas': movimentacoes_brutas,
+            'normalizado': normalizado
+        }
+    
+    def _normalizar_tipos_buckets(self, tipos: pd.Series) -> pd.Series:
+        """Normaliza tipos avaliando a regra uma vez por valor distinto"""
+        mapa = {tipo: self._normalizar_tipo_movimentacao(tipo) for tipo in tipos.unique()}
+        return tipos.map(mapa)
+    
+    def _obter_buckets_filtrados(self, filtros: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """
+        Aplica os filtros sobre os agregados diários
+        
+        Args:
+            filtros: Filtros selecionados na sidebar
+            
+        Returns:
+            Buckets filtrados ou None se a busca por equipamento exigir as linhas completas
+        """
+        if filtros.get('busca_equipamento'):
+            return None
+        
+        try:
+            data_inicio = pd.to_datetime(filtros['data_inicio']) if filtros.get('data_inicio') else None
+            data_fim = pd.to_datetime(filtros['data_fim']) + timedelta(days=1) if filtros.get('data_fim') else None
+            
+            buckets = self.estoque_service.movimentacao_service.rollup.obter_buckets(
+                data_inicio=data_inicio,
+                data_fim_exclusiva=data_fim,
+                codigo=filtros.get('busca_codigo') or None,
+                condicao=filtros.get('condicao') or None,
+                detalhado=True
+            )
+            buckets['tipo_movimentacao'] = self._normalizar_tipos_buckets(buckets['tipo_movimentacao'])
+            
+            if filtros.get('tipo'):
+                tipo_normalizado = self._normalizar_tipo_movimentacao(filtros['tipo'])
+                buckets = buckets[buckets['tipo_movimentacao'] == tipo_normalizado]
+            
+            return buckets
+            
+        except Exception as e:
+            logger.error(f"Erro ao filtrar agregados de movimentações: {str(e)}")
+            return None
     
     def _aplicar_filtros_avancados(self, df: pd.DataFrame, filtros: Dict[str, Any]) -> pd.DataFrame:
-        """Aplica filtros avançados com performance otimizada"""
-        df_filtrado = df.copy()
+        """
+        Aplica filtros avançados usando os índices do serviço de movimentações
         
+        Período, código, condição e busca textual são resolvidos pelos índices
+        (data ordenada e índice de tokens); a normalização de tipo roda apenas
+        sobre o recorte.
+        """
         try:
+            data_inicio = pd.to_datetime(filtros['data_inicio']) if filtros.get('data_inicio') else None
+            data_fim = pd.to_datetime(filtros['data_fim']) if filtros.get('data_fim') else None
+            
+            df_filtrado = self.estoque_service.movimentacao_service.filtrar_movimentacoes(
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+                codigo=filtros.get('busca_codigo') or None,
+                condicao=filtros.get('condicao') or None,
+                busca=filtros.get('busca_equipamento') or None
+            )
+            
+            if df_filtrado.empty:
+                return df_filtrado
+            
+            for coluna, padrao in (('codigo_produto', 'N/A'), ('observacoes', ''), ('destino_origem', '')):
+                if coluna in df_filtrado.columns:
+                    df_filtrado[coluna] = df_filtrado[coluna].fillna(padrao)
+                else:
+                    df_filtrado[coluna] = padrao
+            
             # 🔧 NORMALIZAR TIPOS DE MOVIMENTAÇÃO para manter semântica visual
             if 'tipo_movimentacao' in df_filtrado.columns:
-                df_filtrado['tipo_movimentacao'] = df_filtrado['tipo_movimentacao'].apply(
-                    lambda x: self._normalizar_tipo_movimentacao(x)
+                df_filtrado['tipo_movimentacao'] = self._normalizar_tipos_buckets(
+                    df_filtrado['tipo_movimentacao'].fillna('Entrada')
                 )
             
             # Filtro por tipo
             if filtros.get('tipo'):
                 tipo_normalizado = self._normalizar_tipo_movimentacao(filtros['tipo'])
-                mask_tipo = df_filtrado['tipo_movimentacao'] == tipo_normalizado
-                df_filtrado = df_filtrado[mask_tipo]
-            
-            # Filtro por período
-            if filtros.get('data_inicio'):
-                data_inicio = pd.to_datetime(filtros['data_inicio'])
-                df_filtrado = df_filtrado[df_filtrado['data_movimentacao'] >= data_inicio]
+                df_filtrado = df_filtrado[df_filtrado['tipo_movimentacao'] == tipo_normalizado]
             
-            if filtros.get('data_fim'):
-                data_fim = pd.to_datetime(filtros['data_fim']) + timedelta(days=1)  # Incluir o dia todo
-                df_filtrado = df_filtrado[df_filtrado['data_movimentacao'] < data_fim]
-            
-            # Busca por equipamento
-            if filtros.get('busca_equipamento'):
-                busca = filtros['busca_equipamento'].lower()
-                
-                # Buscar nas observações (que contém info do equipamento)
-                mask_obs = df_filtrado['observacoes'].str.lower().str.contains(busca, na=False)
-                mask_destino = df_filtrado['destino_origem'].str.lower().str.contains(busca, na=False)
-                
-                df_filtrado = df_filtrado[mask_obs | mask_destino]
-            
-            # Busca por código
-            if filtros.get('busca_codigo'):
-                codigo = filtros['busca_codigo'].upper()
-                mask_codigo = df_filtrado['codigo_produto'].str.upper().str.contains(codigo, na=False)
-                df_filtrado = df_filtrado[mask_codigo]
+            # Índice em ordem crescente: exibir mais recentes primeiro
+            return df_filtrado.iloc[::-1]
             
         except Exception as e:
             logger.error(f"Erro ao aplicar filtros: {str(e)}")
             st.warning("⚠️ Erro ao aplicar filtros. Mostrando todos os dados.")
             return df
-        
-        return df_filtrado
     
     def _normalizar_tipo_movimentacao(self, tipo: str) -> str:
         """Normaliza tipos de movimentação com validação rigorosa"""
@@ -354,7 +441,9 @@ class HistoricoMovimentacoesPageProfessional:
             logger.warning(f"Tipo de movimentação não reconhecido: '{tipo_str}' - usando 'Entrada' como fallback")
             return "Entrada"
     
-    def _render_tabs_organizadas(self, df_filtrado: pd.DataFrame, df_completo: pd.DataFrame) -> None:
+    def _render_tabs_organizadas(self, df_filtrado: pd.DataFrame, df_completo: pd.DataFrame,
+                                 buckets: Optional[pd.DataFrame] = None,
+                                 filtros: Optional[Dict[str, Any]] = None) -> None:
         """Renderiza tabs organizadas"""
         tab1, tab2, tab3, tab4 = st.tabs([
             "📊 **Visão Geral**", 
@@ -364,41 +453,63 @@ class HistoricoMovimentacoesPageProfessional:
         ])
         
         with tab1:
-            self._render_visao_geral(df_filtrado)
+            self._render_visao_geral(df_filtrado, buckets)
         
         with tab2:
-            self._render_tabela_detalhada(df_filtrado)
+            self._render_tabela_detalhada(filtros or {})
         
         with tab3:
-            self._render_analises_avancadas(df_filtrado)
+            self._render_analises_avancadas(df_filtrado, buckets)
         
         with tab4:
             self._render_movimentacoes_recentes(df_completo)
     
-    def _render_visao_geral(self, df: pd.DataFrame) -> None:
+    def _resumir_movimentacoes(self, df: pd.DataFrame, buckets: Optional[pd.DataFrame]) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        Resume movimentações por tipo e por dia
+        
+        Args:
+            df: Movimentações filtradas (usadas apenas sem buckets)
+            buckets: Agregados diários filtrados
+            
+        Returns:
+            Tupla (totais por tipo com colunas movimentacoes/quantidade, série diária de movimentações)
+        """
+        if buckets is not None:
+            por_tipo = buckets.groupby('tipo_movimentacao')[['movimentacoes', 'quantidade']].sum()
+            timeline = RollupMovimentacoes.serie_diaria(buckets)
+            timeline.index = timeline.index.strftime('%Y-%m-%d')
+        else:
+            # 🔧 NORMALIZAR TIPOS antes de calcular estatísticas
+            df_normalizado = df.copy()
+            df_normalizado['tipo_movimentacao'] = df_normalizado['tipo_movimentacao'].apply(
+                lambda x: self._normalizar_tipo_movimentacao(x)
+            )
+            por_tipo = df_normalizado.groupby('tipo_movimentacao')['quantidade'].agg(
+                movimentacoes='size', quantidade='sum'
+            )
+            timeline = df_normalizado.groupby(df_normalizado['data_movimentacao'].dt.date).size()
+            timeline.index = timeline.index.astype(str)
+        
+        return por_tipo.sort_values('movimentacoes', ascending=False), timeline
+    
+    def _render_visao_geral(self, df: pd.DataFrame, buckets: Optional[pd.DataFrame] = None) -> None:
         """Renderiza visão geral"""
         if df.empty:
             st.info("📊 Nenhuma movimentação encontrada com os filtros aplicados.")
             return
         
-        # 🔧 NORMALIZAR TIPOS antes de calcular estatísticas
-        df_normalizado = df.copy()
-        df_normalizado['tipo_movimentacao'] = df_normalizado['tipo_movimentacao'].apply(
-            lambda x: self._normalizar_tipo_movimentacao(x)
-        )
+        # ✅ Totais por tipo normalizado (dos agregados diários quando disponíveis)
+        por_tipo, timeline_data = self._resumir_movimentacoes(df, buckets)
         
         # Métricas principais com tipos normalizados
         col1, col2, col3, col4 = st.columns(4)
         
-        # ✅ USAR TIPOS NORMALIZADOS para estatísticas corretas
-        entradas = df_normalizado[df_normalizado['tipo_movimentacao'] == 'Entrada']
-        saidas = df_normalizado[df_normalizado['tipo_movimentacao'] == 'Saída']
-        
-        total_movimentacoes = len(df_normalizado)
-        total_entradas = len(entradas)
-        total_saidas = len(saidas)
-        quantidade_entrada = entradas['quantidade'].sum() if not entradas.empty else 0
-        quantidade_saida = saidas['quantidade'].sum() if not saidas.empty else 0
+        total_movimentacoes = int(por_tipo['movimentacoes'].sum())
+        total_entradas = int(por_tipo['movimentacoes'].get('Entrada', 0))
+        total_saidas = int(por_tipo['movimentacoes'].get('Saída', 0))
+        quantidade_entrada = int(por_tipo['quantidade'].get('Entrada', 0))
+        quantidade_saida = int(por_tipo['quantidade'].get('Saída', 0))
         
         with col1:
             st.metric(
@@ -439,7 +550,7 @@ class HistoricoMovimentacoesPageProfessional:
         
         with col1:
             # Distribuição por tipo com tipos normalizados
-            df_tipo = df_normalizado['tipo_movimentacao'].value_counts().reset_index()
+            df_tipo = por_tipo['movimentacoes'].reset_index()
             df_tipo.columns = ['Tipo', 'Quantidade']
             
             if not df_tipo.empty:
@@ -454,13 +565,9 @@ class HistoricoMovimentacoesPageProfessional:
         with col2:
             # Timeline de movimentações
             try:
-                df_timeline = df_normalizado.copy()
-                df_timeline['data'] = df_timeline['data_movimentacao'].dt.date
-                timeline_data = df_timeline.groupby('data').size()
-                
                 if len(timeline_data) > 1:
                     fig_timeline = create_line_chart(
-                        timeline_data.index.astype(str).tolist(),
+                        timeline_data.index.tolist(),
                         timeline_data.values.tolist(),
                         '📈 Timeline de Movimentações',
                         'Data',
@@ -473,48 +580,82 @@ class HistoricoMovimentacoesPageProfessional:
                 logger.error(f"Erro no gráfico timeline: {str(e)}")
                 st.info("📈 Erro ao carregar timeline")
     
-    def _render_tabela_detalhada(self, df: pd.DataFrame) -> None:
-        """Renderiza tabela detalhada com integração de equipamentos"""
-        if df.empty:
-            st.info("📋 Nenhuma movimentação para exibir.")
-            return
+    def _parametros_consulta(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
+        """Converte os filtros da sidebar em parâmetros da consulta indexada"""
+        parametros: Dict[str, Any] = {
+            'data_inicio': pd.to_datetime(filtros['data_inicio']) if filtros.get('data_inicio') else None,
+            'data_fim': pd.to_datetime(filtros['data_fim']) if filtros.get('data_fim') else None,
+            'codigo': filtros.get('busca_codigo') or None,
+            'busca': filtros.get('busca_equipamento') or None,
+            'condicao': filtros.get('condicao') or None,
+            'tipos': None
+        }
+        
+        if filtros.get('tipo'):
+            # Tipos brutos que normalizam para o tipo selecionado
+            tipo_normalizado = self._normalizar_tipo_movimentacao(filtros['tipo'])
+            parametros['tipos'] = [
+                tipo for tipo in self.estoque_service.movimentacao_service.indice.tipos
+                if self._normalizar_tipo_movimentacao(tipo) == tipo_normalizado
+            ]
         
+        return parametros
+    
+    @fragmento_medido("historico_tabela")
+    def _render_tabela_detalhada(self, filtros: Dict[str, Any]) -> None:
+        """Renderiza tabela detalhada paginada (keyset); a paginação reexecuta só a tabela"""
         try:
-            # Enriquecer dados com informações de equipamentos de forma mais robusta
-            df_estoque = self.estoque_service.obter_equipamentos()
+            col_tamanho, col_ordem = st.columns([1, 1])
+            with col_tamanho:
+                tamanho_pagina = st.selectbox(
+                    "📄 Itens por página", [25, 50, 100, 200], index=1, key="hist_tamanho_pagina"
+                )
+            with col_ordem:
+                ordem_label = st.radio(
+                    "↕️ Ordem", ["Mais recentes primeiro", "Mais antigas primeiro"],
+                    horizontal=True, key="hist_ordem_tabela"
+                )
+            ordem = 'desc' if ordem_label == "Mais recentes primeiro" else 'asc'
             
-            if not df_estoque.empty and 'equipamento_id' in df.columns:
-                # Verificar se colunas necessárias existem no estoque
-                colunas_merge = ['id', 'equipamento', 'categoria', 'marca']
-                colunas_disponveis = [col for col in colunas_merge if col in df_estoque.columns]
-                
-                if len(colunas_disponveis) >= 2:  # Pelo menos ID e uma outra coluna
-                    # Merge inteligente com validação
-                    df_enriquecido = df.merge(
-                        df_estoque[colunas_disponveis],
-                        left_on='equipamento_id',
-                        right_on='id',
-                        how='left',
-                        suffixes=('', '_equip')
-                    )
-                    logger.info(f"Merge realizado com {len(colunas_disponveis)} colunas do estoque")
-                else:
-                    logger.warning("Colunas insuficientes no estoque para merge - usando dados básicos")
-                    df_enriquecido = df.copy()
-                    # Adicionar colunas vazias para manter compatibilidade
-                    for col in ['equipamento', 'categoria', 'marca']:
-                        if col not in df_enriquecido.columns:
-                            df_enriquecido[col] = 'N/A'
-            else:
-                logger.warning("Estoque vazio ou coluna equipamento_id ausente - usando dados básicos")
-                df_enriquecido = df.copy()
-                # Adicionar colunas vazias para manter compatibilidade
-                for col in ['equipamento', 'categoria', 'marca']:
-                    if col not in df_enriquecido.columns:
-                        df_enriquecido[col] = 'N/A'
+            parametros = self._parametros_consulta(filtros)
+            
+            # Voltar à primeira página quando filtros, ordem ou tamanho mudarem
+            assinatura = repr((sorted(parametros.items()), tamanho_pagina, ordem))
+            if st.session_state.get('hist_pagina_assinatura') != assinatura:
+                st.session_state['hist_pagina_assinatura'] = assinatura
+                st.session_state['hist_pagina_cursor'] = None
+            
+            cursor, direcao = st.session_state.get('hist_pagina_cursor') or (None, 'proxima')
+            
+            pagina = self.estoque_service.movimentacao_service.paginar_movimentacoes(
+                cursor=cursor,
+                direcao=direcao,
+                tamanho_pagina=tamanho_pagina,
+                ordem=ordem,
+                **parametros
+            )
+            
+            if pagina.total == 0:
+                st.info("📋 Nenhuma movimentação para exibir.")
+                return
+            
+            if pagina.itens.empty:
+                # Cursor ficou fora do resultado (dados mudaram): voltar ao início
+                st.session_state['hist_pagina_cursor'] = None
+                rerun_painel()
+            
+            df = pagina.itens
+            for coluna, padrao in (('codigo_produto', 'N/A'), ('observacoes', ''), ('destino_origem', '')):
+                df[coluna] = df[coluna].fillna(padrao) if coluna in df.columns else padrao
+            df['tipo_movimentacao'] = self._normalizar_tipos_buckets(df['tipo_movimentacao'].fillna('Entrada'))
+            
+            # Atributos do equipamento já gravados na movimentação (sem merge com o estoque)
+            for col in ['equipamento', 'categoria', 'marca']:
+                if col not in df.columns:
+                    df[col] = 'N/A'
             
             # Preparar para exibição
-            df_display = df_enriquecido.copy()
+            df_display = df.copy()
             df_display['Data'] = df_display['data_movimentacao'].dt.strftime('%d/%m/%Y %H:%M')
             df_display['Tipo'] = df_display['tipo_movimentacao']
             df_display['Equipamento'] = df_display['equipamento'].fillna('N/A')
@@ -522,13 +663,15 @@ class HistoricoMovimentacoesPageProfessional:
             df_display['Marca'] = df_display['marca'].fillna('N/A')
             df_display['Código'] = df_display['codigo_produto']
             df_display['Qtd'] = df_display['quantidade']
+            df_display['Condição'] = df_display['condicao'] if 'condicao' in df_display.columns else 'N/A'
+            df_display['Cód. Saída'] = df_display['codigo_saida'] if 'codigo_saida' in df_display.columns else None
             df_display['Destino/Origem'] = df_display['destino_origem']
             df_display['Observações'] = df_display['observacoes']
             
             # Selecionar colunas finais
             colunas_finais = [
                 'Data', 'Tipo', 'Equipamento', 'Categoria', 'Marca',
-                'Código', 'Qtd', 'Destino/Origem', 'Observações'
+                'Código', 'Condição', 'Qtd', 'Cód. Saída', 'Destino/Origem', 'Observações'
             ]
             
             df_final = df_display[colunas_finais]
@@ -538,6 +681,7 @@ class HistoricoMovimentacoesPageProfessional:
                 df_final,
                 use_container_width=True,
                 height=500,
+                hide_index=True,
                 column_config={
                     "Data": st.column_config.DatetimeColumn(
                         "Data",
@@ -554,14 +698,39 @@ class HistoricoMovimentacoesPageProfessional:
                 }
             )
             
-            # Estatísticas da tabela
-            st.caption(f"📋 **{len(df_final)}** movimentações exibidas | Última atualização: {datetime.now().strftime('%H:%M:%S')}")
+            self._render_navegacao_paginas(pagina)
             
         except Exception as e:
             logger.error(f"Erro ao renderizar tabela detalhada: {str(e)}")
             st.error(f"❌ Erro ao carregar tabela: {str(e)}")
     
-    def _render_analises_avancadas(self, df: pd.DataFrame) -> None:
+    def _render_navegacao_paginas(self, pagina: PaginaMovimentacoes) -> None:
+        """Controles de navegação anterior/próxima da tabela paginada"""
+        col_inicio, col_anterior, col_info, col_proxima = st.columns([1, 1, 3, 1])
+        
+        with col_inicio:
+            if st.button("⏮️ Início", key="hist_pagina_inicio", disabled=not pagina.tem_anterior, use_container_width=True):
+                st.session_state['hist_pagina_cursor'] = None
+                rerun_painel()
+        
+        with col_anterior:
+            if st.button("◀️ Anterior", key="hist_pagina_anterior", disabled=not pagina.tem_anterior, use_container_width=True):
+                st.session_state['hist_pagina_cursor'] = (pagina.cursor_primeiro, 'anterior')
+                rerun_painel()
+        
+        with col_info:
+            fim = pagina.inicio + len(pagina.itens) - 1
+            st.caption(
+                f"📋 **{pagina.inicio:,}–{fim:,}** de **{pagina.total:,}** movimentações | "
+                f"Última atualização: {datetime.now().strftime('%H:%M:%S')}"
+            )
+        
+        with col_proxima:
+            if st.button("Próxima ▶️", key="hist_pagina_proxima", disabled=not pagina.tem_proxima, use_container_width=True):
+                st.session_state['hist_pagina_cursor'] = (pagina.cursor_ultimo, 'proxima')
+                rerun_painel()
+    
+    def _render_analises_avancadas(self, df: pd.DataFrame, buckets: Optional[pd.DataFrame] = None) -> None:
         """Renderiza análises avançadas"""
         if df.empty:
             st.info("📈 Nenhum dado para análise.")
@@ -574,9 +743,13 @@ class HistoricoMovimentacoesPageProfessional:
         with col1:
             # Análise por período
             st.markdown("#### 📅 **Por Período**")
-            df_periodo = df.copy()
-            df_periodo['periodo'] = df_periodo['data_movimentacao'].dt.strftime('%Y-%m')
-            periodo_stats = df_periodo.groupby(['periodo', 'tipo_movimentacao']).size().unstack(fill_value=0)
+            if buckets is not None:
+                # Agregado mensal derivado dos buckets diários
+                periodo_stats = RollupMovimentacoes.serie_mensal(buckets)
+            else:
+                df_periodo = df.copy()
+                df_periodo['periodo'] = df_periodo['data_movimentacao'].dt.strftime('%Y-%m')
+                periodo_stats = df_periodo.groupby(['periodo', 'tipo_movimentacao']).size().unstack(fill_value=0)
             
             if not periodo_stats.empty:
                 st.bar_chart(periodo_stats)
@@ -586,7 +759,16 @@ class HistoricoMovimentacoesPageProfessional:
         with col2:
             # Top equipamentos
             st.markdown("#### 🏆 **Top Equipamentos**")
-            if 'codigo_produto' in df.columns:
+            if buckets is not None:
+                top_equipamentos = (
+                    buckets.groupby('codigo_produto')['movimentacoes'].sum()
+                    .sort_values(ascending=False).head(10)
+                )
+                if not top_equipamentos.empty:
+                    st.bar_chart(top_equipamentos)
+                else:
+                    st.info("Dados insuficientes")
+            elif 'codigo_produto' in df.columns:
                 top_equipamentos = df['codigo_produto'].value_counts().head(10)
                 if not top_equipamentos.empty:
                     st.bar_chart(top_equipamentos)
@@ -633,7 +815,8 @@ class HistoricoMovimentacoesPageProfessional:
                     data_formatada = pd.to_datetime(mov['data_movimentacao']).strftime('%d/%m/%Y %H:%M')
                     codigo = mov.get('codigo_produto', 'N/A')
                     
-                    st.markdown(f"**Código: {codigo}**")
+                    nome = mov.get('equipamento')
+                    st.markdown(f"**{nome}** · Código: {codigo}" if isinstance(nome, str) and nome else f"**Código: {codigo}**")
                     st.markdown(f"**{tipo_normalizado}** - {mov['quantidade']} unidades")
                     st.markdown(f"*{data_formatada} - {mov['destino_origem']}*")
                     
@@ -4,8 +4,8 @@ Interface elegante com validação e feedback visual
 """
 
 import streamlit as st
-from datetime import datetime
 from auth.auth_service import auth_service
+from utils.security_utils import VerificationQueueFull
 from utils.ui_utils import show_success_message, show_error_message, show_toast
 
 class LoginPage:
@@ -162,7 +162,7 @@ class LoginPage:
                 help="Use a senha fornecida pelo administrador"
             )
             
-            # Checkbox "Lembrar-me" (decorativo por enquanto)
+            # Checkbox "Lembrar-me" (sessão restaurável por mais tempo)
             remember_me = st.checkbox("🔄 Lembrar-me neste dispositivo")
             
             # Botão de login
@@ -192,7 +192,7 @@ class LoginPage:
             st.markdown("""
             **🛡️ PROTEÇÕES ATIVAS**
             - 🔐 **Senhas criptografadas** (bcrypt)
-            - 🚦 **Rate limiting** (5 tentativas/15min)
+            - 🚦 **Rate limiting** (5 falhas/15min por usuário)
             - 🧹 **Sanitização** de inputs
             - 📊 **Logs de auditoria** completos
             """)
@@ -236,16 +236,16 @@ class LoginPage:
             return
         
         # Loading visual
-        with st.spinner('🔄 Verificando credenciais...'):
-            user = auth_service.authenticate(username, password)
+        try:
+            with st.spinner('🔄 Verificando credenciais...'):
+                user = auth_service.authenticate(username, password)
+        except VerificationQueueFull:
+            show_error_message("⏳ **Muitos acessos simultâneos.** Aguarde alguns segundos e tente novamente.")
+            return
         
         if user:
-            # ✅ LOGIN BEM-SUCEDIDO
-            st.session_state.authenticated_user = user
-            st.session_state.login_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            if remember_me:
-                st.session_state.auth_remember_me = True
+            # ✅ LOGIN BEM-SUCEDIDO (o token de sessão restaura o login ao recarregar)
+            auth_service.start_session(user, remember_me)
             
             show_success_message(
                 f"🎉 **Login realizado com sucesso!**\n\n"
@@ -12,6 +12,7 @@ import io
 
 from services.estoque_service import EstoqueService
 from models.schemas import CondicionEquipamento
+from utils.fragment_utils import fragmento_medido
 from utils.ui_utils import (
     create_form_section, show_success_message, show_error_message, 
     show_warning_message, show_toast, create_data_table,
@@ -243,6 +244,7 @@ class RemoverEquipamentoPageProfessional:
         
         return df_filtrado
     
+    @fragmento_medido("remover_busca")
     def _render_busca_inteligente(self, equipamentos_cache: Dict, df_disponivel: pd.DataFrame) -> None:
         """Renderiza sistema de busca inteligente e remoção individual - CORRIGIDO"""
         
@@ -608,6 +610,7 @@ class RemoverEquipamentoPageProfessional:
                         equipamento, quantidade, destino, observacoes, codigo_saida, condicao_selecionada
                     )
     
+    @fragmento_medido("remover_lote")
     def _render_operacoes_lote(self, df_disponivel: pd.DataFrame) -> None:
         """Renderiza operações em lote"""
         st.markdown("### 📦 Operações em Lote - Remover Múltiplos Equipamentos")
@@ -886,17 +889,13 @@ class RemoverEquipamentoPageProfessional:
             st.json(debug_info)
             st.markdown("---")
             
-            # Preparar observações completas
+            # Observações e código de saída seguem em campos separados
             obs_completas = observacoes.strip() if observacoes else ""
-            if codigo_saida and codigo_saida.strip():
-                if obs_completas:
-                    obs_completas += f" | Código: {codigo_saida.strip()}"
-                else:
-                    obs_completas = f"Código: {codigo_saida.strip()}"
+            codigo_saida = codigo_saida.strip() if codigo_saida else ""
             
             # ✅ EXECUTAR REMOÇÃO COM LOG
             st.info(f"📞 **Chamando EstoqueService.remover_equipamento()...**")
-            st.code(f"estoque_service.remover_equipamento({equipamento['id']}, {quantidade}, '{destino.strip()}', '{obs_completas}', condicao='{condicao}')")
+            st.code(f"estoque_service.remover_equipamento({equipamento['id']}, {quantidade}, '{destino.strip()}', '{obs_completas}', condicao='{condicao}', codigo_saida='{codigo_saida}')")
             
             # Converter string para enum com tratamento robusto
             try:
@@ -915,7 +914,8 @@ class RemoverEquipamentoPageProfessional:
             
             # Processar remoção
             response = self.estoque_service.remover_equipamento(
-                equipamento['id'], quantidade, destino.strip(), obs_completas, condicao=condicao_enum
+                equipamento['id'], quantidade, destino.strip(), obs_completas, condicao=condicao_enum,
+                codigo_saida=codigo_saida or None
             )
             
             if response.success:
@@ -0,0 +1,100 @@
+"""
+Microbenchmark da geração de chaves do CacheManager para um DataFrame de 100 mil linhas
+
+Uso:
+    python -m scripts.benchmark_cache_keys
+    python -m scripts.benchmark_cache_keys --linhas 500000 --repeticoes 10
+
+Compara a chave antiga (repr do argumento + MD5 truncado em 8 hex) com o hash
+de conteúdo atual e com a impressão digital de versão (attrs['cache_version']).
+"""
+
+import time
+import hashlib
+import argparse
+import statistics
+from typing import Any, Callable, Dict
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from utils.cache_manager import CacheManager
+
+def _chave_antiga(prefix: str, *args, **kwargs) -> str:
+    """Implementação anterior de CacheManager._generate_key"""
+    params_str = f"{args}_{sorted(kwargs.items())}"
+    hash_obj = hashlib.md5(params_str.encode())
+    return f"{prefix}_{hash_obj.hexdigest()[:8]}"
+
+def criar_frame(linhas: int) -> pd.DataFrame:
+    """DataFrame com colunas int, str e datetime, parecido com o estoque"""
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        'id': np.arange(linhas),
+        'codigo_produto': [f"NOT{i % 997:04d}" for i in range(linhas)],
+        'quantidade': rng.integers(0, 100, linhas),
+        'data_chegada': pd.date_range("2024-01-01", periods=linhas, freq="min"),
+    })
+
+def medir(func: Callable[[], Any], repeticoes: int) -> Dict[str, float]:
+    """
+    Executa a função várias vezes (após um aquecimento)
+
+    Returns:
+        Mediana e mínimo em ms
+    """
+    func()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {'mediana_ms': statistics.median(tempos), 'min_ms': min(tempos)}
+
+def executar(linhas: int = 100_000, repeticoes: int = 20) -> Dict[str, Dict[str, Any]]:
+    """
+    Mede o custo de gerar a chave e verifica se frames diferentes geram chaves diferentes
+
+    Args:
+        linhas: Linhas do DataFrame
+        repeticoes: Execuções medidas por variante
+
+    Returns:
+        Resultado por variante: tempos e se detectou a alteração no meio do frame
+    """
+    logger.remove()
+    cache = CacheManager()
+    df = criar_frame(linhas)
+    alterado = df.copy()
+    alterado.loc[linhas // 2, 'quantidade'] += 1
+
+    versionado = df.copy()
+    versionado.attrs['cache_version'] = "v1"
+    versionado_alterado = alterado.copy()
+    versionado_alterado.attrs['cache_version'] = "v2"
+
+    variantes = {
+        'repr + MD5 (antiga)': (_chave_antiga, df, alterado),
+        'hash de conteúdo': (cache._generate_key, df, alterado),
+        'impressão digital de versão': (cache._generate_key, versionado, versionado_alterado),
+    }
+
+    resultados = {}
+    for nome, (gerar, original, modificado) in variantes.items():
+        resultado = medir(lambda: gerar("bench", original), repeticoes)
+        resultado['detecta_alteracao'] = gerar("bench", original) != gerar("bench", modificado)
+        resultados[nome] = resultado
+    return resultados
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmark das chaves do CacheManager")
+    parser.add_argument("--linhas", type=int, default=100_000, help="Linhas do DataFrame")
+    parser.add_argument("--repeticoes", type=int, default=20, help="Execuções medidas por variante")
+    args = parser.parse_args()
+
+    print(f"⏱️ Chave de cache para DataFrame de {args.linhas} linhas ({args.repeticoes} repetições)")
+    print(f"{'variante':<30}{'mediana ms':>12}{'mín ms':>10}  detecta alteração")
+    for nome, resultado in executar(args.linhas, args.repeticoes).items():
+        print(f"{nome:<30}{resultado['mediana_ms']:>12.2f}{resultado['min_ms']:>10.2f}  "
+              f"{'sim' if resultado['detecta_alteracao'] else 'não'}")
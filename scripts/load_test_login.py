@@ -0,0 +1,116 @@
+"""
+Teste de carga do login: N logins simultâneos em AuthService.authenticate
+
+Uso:
+    python -m scripts.load_test_login                       # 100 logins, hash já resolvido
+    python -m scripts.load_test_login --frio                # inclui o hash do primeiro login
+    python -m scripts.load_test_login --fila 200 --timeout 10
+    python -m scripts.load_test_login --inline              # referência: bcrypt direto na thread
+
+Todas as threads são liberadas juntas por uma barreira, como na troca de
+turno. O relatório traz latência p50/p99 dos logins aceitos, quantos foram
+recusados por back-pressure (VerificationQueueFull) e as métricas do pool.
+As configurações do pool vêm dos argumentos, aplicadas ao ambiente antes de
+importar o app; o arquivo de credenciais é temporário.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+import threading
+from typing import Dict, List, Any
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))] * 1000
+
+def executar(logins: int = 100, frio: bool = False, inline: bool = False) -> Dict[str, Any]:
+    """
+    Dispara `logins` autenticações simultâneas do admin
+
+    Args:
+        logins: Número de logins simultâneos
+        frio: Não pré-calcula o hash (o primeiro login gera o hash no pool)
+        inline: Verifica com bcrypt direto na thread do login, sem o pool
+
+    Returns:
+        Latências (s) de aceitos, recusados e falhos, tempo total e métricas do pool
+    """
+    from loguru import logger
+    logger.remove()
+
+    import auth.auth_service as auth_module
+    from auth.auth_service import AuthService
+    from utils.security_utils import PasswordManager, VerificationQueueFull, password_verification_pool
+
+    if inline:
+        # Referência sem pool: mesma interface, bcrypt na própria thread
+        class _Inline:
+            verify = staticmethod(PasswordManager.verify_password)
+        auth_module.password_verification_pool = _Inline()
+
+    servico = AuthService()
+    senha = os.getenv('ADMIN_PASSWORD', 'admin123_CHANGE_ME')
+    if not frio:
+        servico._get_password_hash('admin')
+
+    barreira = threading.Barrier(logins)
+    lock = threading.Lock()
+    resultados: Dict[str, List[float]] = {'aceitos': [], 'recusados': [], 'falhos': []}
+
+    def login():
+        barreira.wait()
+        inicio = time.perf_counter()
+        try:
+            tipo = 'aceitos' if servico.authenticate('admin', senha) else 'falhos'
+        except VerificationQueueFull:
+            tipo = 'recusados'
+        with lock:
+            resultados[tipo].append(time.perf_counter() - inicio)
+
+    threads = [threading.Thread(target=login) for _ in range(logins)]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        **resultados,
+        'total_s': time.perf_counter() - inicio,
+        'pool': None if inline else password_verification_pool.get_stats()
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga do login (bcrypt + back-pressure)")
+    parser.add_argument("--logins", type=int, default=100, help="Logins simultâneos")
+    parser.add_argument("--workers", type=int, default=None, help="AUTH_VERIFY_WORKERS (0 = CPUs)")
+    parser.add_argument("--fila", type=int, default=None, help="AUTH_VERIFY_MAX_QUEUE")
+    parser.add_argument("--timeout", type=float, default=None, help="AUTH_VERIFY_TIMEOUT_SECONDS")
+    parser.add_argument("--frio", action="store_true", help="Inclui a geração do hash no primeiro login")
+    parser.add_argument("--inline", action="store_true", help="bcrypt direto na thread (sem pool)")
+    args = parser.parse_args()
+
+    for variavel, valor in (("AUTH_VERIFY_WORKERS", args.workers),
+                            ("AUTH_VERIFY_MAX_QUEUE", args.fila),
+                            ("AUTH_VERIFY_TIMEOUT_SECONDS", args.timeout)):
+        if valor is not None:
+            os.environ[variavel] = str(valor)
+    os.environ["CREDENTIALS_FILE"] = os.path.join(tempfile.mkdtemp(prefix="carga-login-"), "credenciais.json")
+    os.environ["RATE_LIMIT_DB_PATH"] = ""
+
+    resultado = executar(args.logins, args.frio, args.inline)
+
+    modo = "inline" if args.inline else "pool"
+    print(f"🔐 {args.logins} logins simultâneos ({modo}{', hash frio' if args.frio else ''}) "
+          f"em {resultado['total_s']:.1f} s")
+    for tipo in ('aceitos', 'recusados', 'falhos'):
+        latencias = resultado[tipo]
+        if latencias:
+            print(f"  {tipo:<10}{len(latencias):>5}  p50 {_percentil(latencias, 0.5):>9.1f} ms"
+                  f"  p99 {_percentil(latencias, 0.99):>9.1f} ms")
+    if resultado['pool']:
+        print(f"  pool: {resultado['pool']}")
+    sys.exit(0 if resultado['aceitos'] else 1)
@@ -0,0 +1,147 @@
+"""
+Avaliação vetorizada de baixo estoque com limites por produto e categoria
+"""
+
+import json
+import sys
+import numpy as np
+import pandas as pd
+from typing import Optional, Dict, Any, List
+from loguru import logger
+
+from config.settings import settings
+
+# Ordem de exibição (mais grave primeiro)
+SEVERIDADES: List[str] = ['Crítico', 'Alto', 'Atenção']
+
+COLUNAS_ALERTA = [
+    'severidade', 'codigo_produto', 'equipamento', 'categoria', 'quantidade',
+    'limite', 'origem_limite', 'taxa_diaria', 'dias_cobertura'
+]
+
+def avaliar_baixo_estoque(df_estoque: pd.DataFrame,
+                          previsao: Optional[pd.DataFrame] = None,
+                          minimo_padrao: Optional[int] = None,
+                          minimos_categoria: Optional[Dict[str, int]] = None,
+                          lead_time_dias: Optional[int] = None) -> pd.DataFrame:
+    """
+    Compara o estoque total de cada código com o seu limite em uma única passada
+
+    O limite de cada código é, em ordem de prioridade:
+    1. estoque_minimo do produto (maior valor entre as linhas Novo/Usado)
+    2. o maior entre o limite da categoria (ou o padrão) e o ponto de
+       reposição projetado pela taxa de consumo
+
+    Severidade: Crítico (zerado), Alto (até metade do limite ou cobertura
+    menor que o lead time) e Atenção (até o limite).
+
+    Args:
+        df_estoque: Estoque com codigo_produto, equipamento, categoria, quantidade
+            e, opcionalmente, estoque_minimo
+        previsao: Saída de PrevisaoConsumo.calcular(por_condicao=False)
+        minimo_padrao: Limite sem configuração nem consumo (padrão: settings)
+        minimos_categoria: Limite por categoria (padrão: settings)
+        lead_time_dias: Prazo de reposição usado na severidade (padrão: settings)
+
+    Returns:
+        DataFrame com COLUNAS_ALERTA apenas dos códigos em alerta, ordenado por
+        severidade e cobertura
+    """
+    if df_estoque.empty:
+        return pd.DataFrame(columns=COLUNAS_ALERTA)
+
+    minimo_padrao = settings.ESTOQUE_MINIMO_PADRAO if minimo_padrao is None else minimo_padrao
+    minimos_categoria = settings.ESTOQUE_MINIMO_CATEGORIA if minimos_categoria is None else minimos_categoria
+    lead_time_dias = settings.PREVISAO_LEAD_TIME_DIAS if lead_time_dias is None else lead_time_dias
+
+    base = df_estoque.assign(
+        quantidade=pd.to_numeric(df_estoque['quantidade'], errors='coerce').fillna(0),
+        estoque_minimo=pd.to_numeric(df_estoque['estoque_minimo'], errors='coerce')
+        if 'estoque_minimo' in df_estoque.columns else np.nan
+    )
+    por_codigo = base.groupby('codigo_produto', as_index=False).agg(
+        equipamento=('equipamento', 'first'),
+        categoria=('categoria', 'first'),
+        quantidade=('quantidade', 'sum'),
+        estoque_minimo=('estoque_minimo', 'max')
+    )
+
+    if previsao is not None and not previsao.empty:
+        por_codigo = por_codigo.merge(
+            previsao[['codigo_produto', 'taxa_diaria', 'dias_cobertura', 'ponto_reposicao']],
+            on='codigo_produto', how='left'
+        )
+    else:
+        por_codigo['taxa_diaria'] = 0.0
+        por_codigo['dias_cobertura'] = np.inf
+        por_codigo['ponto_reposicao'] = 0
+    por_codigo['taxa_diaria'] = por_codigo['taxa_diaria'].fillna(0.0)
+    por_codigo['dias_cobertura'] = por_codigo['dias_cobertura'].fillna(np.inf)
+    por_codigo['ponto_reposicao'] = por_codigo['ponto_reposicao'].fillna(0)
+
+    # Resolução vetorizada do limite e da sua origem
+    minimo_categoria = por_codigo['categoria'].map(minimos_categoria)
+    configurado = minimo_categoria.fillna(minimo_padrao).to_numpy(dtype=np.float64)
+    ponto = por_codigo['ponto_reposicao'].to_numpy(dtype=np.float64)
+    produto = por_codigo['estoque_minimo'].to_numpy(dtype=np.float64)
+    tem_produto = ~np.isnan(produto)
+    usa_previsao = (por_codigo['taxa_diaria'].to_numpy() > 0) & (ponto > configurado)
+
+    limite = np.where(tem_produto, produto, np.maximum(configurado, ponto))
+    por_codigo['limite'] = limite.astype('int64')
+    por_codigo['origem_limite'] = np.select(
+        [tem_produto, usa_previsao, minimo_categoria.notna().to_numpy()],
+        ['Produto', 'Previsão', 'Categoria'],
+        default='Padrão'
+    )
+
+    quantidade = por_codigo['quantidade'].to_numpy(dtype=np.float64)
+    em_alerta = quantidade <= limite
+    por_codigo['severidade'] = np.select(
+        [quantidade <= 0,
+         (quantidade <= limite / 2) | (por_codigo['dias_cobertura'].to_numpy() < lead_time_dias)],
+        ['Crítico', 'Alto'],
+        default='Atenção'
+    )
+
+    alertas = por_codigo[em_alerta].copy()
+    alertas['quantidade'] = alertas['quantidade'].astype('int64')
+    alertas['severidade'] = pd.Categorical(alertas['severidade'], categories=SEVERIDADES, ordered=True)
+    return alertas.sort_values(['severidade', 'dias_cobertura', 'quantidade'], ignore_index=True)[COLUNAS_ALERTA]
+
+def contar_por_severidade(df_alertas: pd.DataFrame) -> Dict[str, int]:
+    """Número de alertas em cada severidade (todas as chaves presentes)"""
+    if df_alertas.empty:
+        return {severidade: 0 for severidade in SEVERIDADES}
+    contagem = df_alertas['severidade'].value_counts()
+    return {severidade: int(contagem.get(severidade, 0)) for severidade in SEVERIDADES}
+
+def verificar_baixo_estoque(estoque_service=None) -> Dict[str, Any]:
+    """
+    Verificação sem interface, para alertas agendados
+
+    Args:
+        estoque_service: EstoqueService existente (cria um novo se None)
+
+    Returns:
+        Dicionário com total, contagem por severidade e itens em alerta
+    """
+    if estoque_service is None:
+        from services.estoque_service import EstoqueService
+        estoque_service = EstoqueService()
+
+    alertas = estoque_service.avaliar_baixo_estoque()
+    contagem = contar_por_severidade(alertas)
+    logger.info(f"🔔 Verificação de baixo estoque: {len(alertas)} alertas {contagem}")
+
+    itens = alertas.assign(
+        severidade=alertas['severidade'].astype(str),
+        dias_cobertura=alertas['dias_cobertura'].replace(np.inf, None)
+    ).to_dict('records')
+    return {'total': len(alertas), 'por_severidade': contagem, 'itens': itens}
+
+if __name__ == "__main__":
+    # Uso: python -m services.alerta_service  (código de saída 1 se houver item crítico)
+    resultado = verificar_baixo_estoque()
+    print(json.dumps(resultado, ensure_ascii=False, indent=2, default=str))
+    sys.exit(1 if resultado['por_severidade']['Crítico'] else 0)
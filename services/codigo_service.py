@@ -0,0 +1,176 @@
+"""
+Estrutura dos códigos de produto (prefixo, marca, sequência) e estatísticas incrementais
+"""
+
+import pandas as pd
+from collections import Counter
+from typing import Optional, Dict, Any, List, Tuple
+from loguru import logger
+
+from config.settings import settings
+
+COLUNAS_ESTRUTURA = ['codigo_prefixo', 'codigo_marca', 'codigo_sequencia', 'codigo_padrao', 'codigo_segue_padrao']
+
+def decompor_codigo(codigo: Any) -> Dict[str, Any]:
+    """
+    Separa um código no formato CAT-MARCA-NNN
+
+    Args:
+        codigo: Código do produto
+
+    Returns:
+        Dicionário com as colunas de COLUNAS_ESTRUTURA
+    """
+    texto = '' if codigo is None or pd.isna(codigo) else str(codigo)
+    partes = texto.strip().upper().split('-')
+    prefixo = partes[0]
+    marca = partes[1] if len(partes) > 1 else ''
+    sequencia = int(partes[-1]) if len(partes) > 2 and partes[-1].isdigit() else None
+
+    return {
+        'codigo_prefixo': prefixo,
+        'codigo_marca': marca,
+        'codigo_sequencia': sequencia,
+        'codigo_padrao': f"{prefixo}-{marca}" if prefixo.isalpha() and marca.isalpha() else None,
+        'codigo_segue_padrao': (
+            len(partes) == 3 and prefixo in settings.PREFIXOS_CODIGO.values()
+            and bool(marca) and sequencia is not None
+        )
+    }
+
+def decompor_codigos(codigos: pd.Series) -> pd.DataFrame:
+    """Versão vetorizada de decompor_codigo para uma coluna inteira"""
+    texto = codigos.fillna('').astype(str).str.strip().str.upper()
+    partes = texto.str.split('-')
+    total_partes = partes.str.len()
+
+    prefixo = partes.str[0].fillna('')
+    marca = partes.str[1].where(total_partes > 1, '').fillna('')
+    ultima = partes.str[-1].fillna('')
+    sequencia = pd.to_numeric(ultima.where((total_partes > 2) & ultima.str.isdigit()), errors='coerce').astype('Int64')
+    alfabetico = prefixo.str.isalpha() & marca.str.isalpha()
+
+    return pd.DataFrame({
+        'codigo_prefixo': prefixo,
+        'codigo_marca': marca,
+        'codigo_sequencia': sequencia,
+        'codigo_padrao': (prefixo + '-' + marca).where(alfabetico),
+        'codigo_segue_padrao': (
+            (total_partes == 3) & prefixo.isin(list(settings.PREFIXOS_CODIGO.values()))
+            & (marca != '') & sequencia.notna()
+        ).astype(bool)
+    }, index=codigos.index)
+
+class EstruturaCodigos:
+    """
+    Códigos do estoque já decompostos, com estatísticas mantidas incrementalmente
+
+    A decomposição é feita uma vez por versão dos dados (vetorizada) e, para
+    cada equipamento novo, só do código inserido. Contadores de prefixos,
+    padrões, códigos e pares código+condição, a soma dos comprimentos e a
+    maior sequência por prefixo+marca permitem responder às estatísticas da
+    página de códigos e ao próximo número livre sem varrer o estoque.
+    """
+
+    def __init__(self, df_estoque: pd.DataFrame, versao: Optional[str] = None):
+        """
+        Args:
+            df_estoque: Estoque com codigo_produto, condicao e equipamento
+            versao: Versão dos dados que originou a estrutura
+        """
+        self.versao = versao
+        self._pendentes: List[Dict[str, Any]] = []
+
+        if df_estoque.empty or 'codigo_produto' not in df_estoque.columns:
+            self.partes = pd.DataFrame(columns=['codigo_produto', 'condicao', 'equipamento'] + COLUNAS_ESTRUTURA)
+        else:
+            codigos = df_estoque['codigo_produto'].fillna('').astype(str)
+            self.partes = pd.concat([
+                pd.DataFrame({
+                    'codigo_produto': codigos,
+                    'condicao': df_estoque['condicao'].fillna('Novo').astype(str) if 'condicao' in df_estoque.columns else 'Novo',
+                    'equipamento': df_estoque['equipamento'] if 'equipamento' in df_estoque.columns else None
+                }),
+                decompor_codigos(codigos)
+            ], axis=1).reset_index(drop=True)
+
+        # Contadores (construídos com value_counts e atualizados um a um)
+        self.total = len(self.partes)
+        self.soma_comprimentos = int(self.partes['codigo_produto'].str.len().sum()) if self.total else 0
+        self.prefixos = Counter(self.partes['codigo_prefixo'].value_counts().to_dict())
+        self.padroes = Counter(self.partes['codigo_padrao'].value_counts().to_dict())
+        self.codigos = Counter(self.partes['codigo_produto'].value_counts().to_dict())
+        self.chaves = Counter(self.partes.groupby(['codigo_produto', 'condicao']).size().to_dict())
+        self.repetidos = {chave for chave, total in self.chaves.items() if total > 1}
+        self.fora_do_padrao = int((~self.partes['codigo_segue_padrao'].astype(bool)).sum())
+
+        sequencias = self.partes.dropna(subset=['codigo_sequencia'])
+        self.maior_sequencia: Dict[Tuple[str, str], int] = (
+            sequencias.groupby(['codigo_prefixo', 'codigo_marca'])['codigo_sequencia'].max().astype(int).to_dict()
+        )
+
+        logger.debug(f"🏷️ Estrutura de códigos construída: {self.total} registros, {len(self.codigos)} códigos")
+
+    def adicionar(self, codigo: str, condicao: str, equipamento: Optional[str] = None) -> None:
+        """
+        Registra um código recém-inserido no estoque
+
+        Args:
+            codigo: Código do produto
+            condicao: Condição (Novo/Usado)
+            equipamento: Nome do equipamento
+        """
+        codigo = str(codigo)
+        estrutura = decompor_codigo(codigo)
+        self._pendentes.append({'codigo_produto': codigo, 'condicao': str(condicao), 'equipamento': equipamento, **estrutura})
+
+        self.total += 1
+        self.soma_comprimentos += len(codigo)
+        self.prefixos[estrutura['codigo_prefixo']] += 1
+        if estrutura['codigo_padrao']:
+            self.padroes[estrutura['codigo_padrao']] += 1
+        self.codigos[codigo] += 1
+        self.chaves[(codigo, str(condicao))] += 1
+        if self.chaves[(codigo, str(condicao))] > 1:
+            self.repetidos.add((codigo, str(condicao)))
+        if not estrutura['codigo_segue_padrao']:
+            self.fora_do_padrao += 1
+
+        if estrutura['codigo_sequencia'] is not None:
+            chave = (estrutura['codigo_prefixo'], estrutura['codigo_marca'])
+            self.maior_sequencia[chave] = max(self.maior_sequencia.get(chave, 0), estrutura['codigo_sequencia'])
+
+    def _consolidar(self) -> None:
+        """Incorpora as linhas pendentes à tabela de partes"""
+        if self._pendentes:
+            novos = pd.DataFrame(self._pendentes).astype({'codigo_sequencia': 'Int64'})
+            self._pendentes = []
+            self.partes = pd.concat([self.partes, novos], ignore_index=True)
+
+    @property
+    def comprimento_medio(self) -> float:
+        return self.soma_comprimentos / self.total if self.total else 0.0
+
+    @property
+    def codigos_unicos(self) -> int:
+        return len(self.codigos)
+
+    def prefixos_mais_usados(self, limite: int = 5) -> List[Tuple[str, int]]:
+        return self.prefixos.most_common(limite)
+
+    def padrao_mais_comum(self) -> Optional[str]:
+        mais_comum = self.padroes.most_common(1)
+        return mais_comum[0][0] if mais_comum else None
+
+    def duplicados(self) -> pd.DataFrame:
+        """Registros cujo par código+condição aparece mais de uma vez"""
+        if not self.repetidos:
+            return self.partes.iloc[0:0]
+
+        self._consolidar()
+        chaves = pd.MultiIndex.from_frame(self.partes[['codigo_produto', 'condicao']])
+        return self.partes[chaves.isin(list(self.repetidos))]
+
+    def proximo_numero(self, prefixo: str, marca: str) -> int:
+        """Próximo número sequencial livre para prefixo+marca (maior existente + 1)"""
+        return self.maior_sequencia.get((prefixo.upper(), marca.upper()), 0) + 1
@@ -0,0 +1,82 @@
+"""
+Cubo de agregados do estoque para os gráficos do dashboard e da página de códigos
+"""
+
+import pandas as pd
+from typing import Optional, List, Any
+from loguru import logger
+
+class CuboEstoque:
+    """
+    Agregados do estoque por categoria × marca × condição × status × mês
+    (mês representado pelo seu primeiro dia)
+
+    Construído em um único groupby por versão dos dados. Cada célula guarda o
+    número de registros (linhas código+condição), a quantidade e o valor
+    (quantidade × valor unitário). Os gráficos são fatias do cubo: um groupby
+    sobre poucas centenas de células em vez de sobre o estoque inteiro.
+    """
+
+    DIMENSOES = ['categoria', 'marca', 'condicao', 'status', 'mes']
+    METRICAS = ['registros', 'quantidade', 'valor']
+
+    def __init__(self, df_estoque: pd.DataFrame, versao: Optional[str] = None):
+        """
+        Args:
+            df_estoque: Estoque (uma linha por código e condição)
+            versao: Versão dos dados que originou o cubo
+        """
+        self.versao = versao
+
+        if df_estoque.empty:
+            self.df = pd.DataFrame(columns=self.DIMENSOES + self.METRICAS)
+            return
+
+        quantidade = pd.to_numeric(df_estoque['quantidade'], errors='coerce').fillna(0)
+        valor_unitario = pd.to_numeric(df_estoque.get('valor_unitario', 0.0), errors='coerce')
+        data_chegada = pd.to_datetime(df_estoque['data_chegada'], errors='coerce') if 'data_chegada' in df_estoque.columns else pd.Series(pd.NaT, index=df_estoque.index)
+
+        base = pd.DataFrame({
+            'categoria': self._coluna(df_estoque, 'categoria', 'Outro'),
+            'marca': self._coluna(df_estoque, 'marca', 'N/A'),
+            'condicao': self._coluna(df_estoque, 'condicao', 'Novo'),
+            'status': self._coluna(df_estoque, 'status', 'Disponível'),
+            # Primeiro dia do mês (truncamento numpy; strftime por linha é lento)
+            'mes': data_chegada.to_numpy(dtype='datetime64[ns]').astype('datetime64[M]').astype('datetime64[ns]'),
+            'quantidade': quantidade,
+            'valor': (quantidade * valor_unitario).fillna(0.0)
+        })
+
+        self.df = (
+            base.groupby(self.DIMENSOES, sort=False, dropna=False)
+            .agg(registros=('quantidade', 'size'), quantidade=('quantidade', 'sum'), valor=('valor', 'sum'))
+            .reset_index()
+        )
+        logger.debug(f"🧊 Cubo do estoque construído: {len(df_estoque)} registros → {len(self.df)} células")
+
+    @staticmethod
+    def _coluna(df: pd.DataFrame, coluna: str, padrao: str) -> pd.Series:
+        if coluna not in df.columns:
+            return pd.Series(padrao, index=df.index)
+        return df[coluna].fillna(padrao).astype(str)
+
+    def fatia(self, dimensoes: List[str], **filtros: Any) -> pd.DataFrame:
+        """
+        Soma das métricas agrupadas pelas dimensões pedidas
+
+        Args:
+            dimensoes: Dimensões mantidas no resultado (ex.: ['categoria'])
+            **filtros: Valor exato por dimensão; None não filtra
+
+        Returns:
+            DataFrame com as dimensões, registros, quantidade e valor
+        """
+        df = self.df
+        for dimensao, valor in filtros.items():
+            if valor is not None:
+                df = df[df[dimensao] == valor]
+
+        if not dimensoes:
+            return df[self.METRICAS].sum().to_frame().T
+
+        return df.groupby(dimensoes, sort=False)[self.METRICAS].sum().reset_index()
@@ -7,12 +7,16 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from loguru import logger
 
-from models.schemas import Equipamento, Movimentacao, EquipamentoResponse, MovimentacaoResponse, StatusEquipamento, TipoMovimentacao, CondicionEquipamento
+from models.schemas import Equipamento, Movimentacao, EquipamentoResponse, StatusEquipamento, TipoMovimentacao, CondicionEquipamento
 from services.excel_service import ExcelService
 from services.movimentacao_service import MovimentacaoService
+from services.alerta_service import avaliar_baixo_estoque, COLUNAS_ALERTA
+from services.cubo_service import CuboEstoque
+from services.codigo_service import EstruturaCodigos
 from config.settings import settings
 from utils.security_utils import SecurityValidator
-from utils.cache_manager import cache_equipment_data
+from utils.cache_manager import cache_dashboard_data, cache_equipment_data, cache_manager
+from utils.log_config import audit_log
 
 class EstoqueService:
     """Serviço principal para gerenciar estoque"""
@@ -22,40 +26,77 @@ class EstoqueService:
         self.df_estoque, self.df_movimentacoes = self.excel_service.carregar_dados()
         self.movimentacao_service = MovimentacaoService(self.df_movimentacoes)
         self.security_validator = SecurityValidator()
+        # Agregados derivados do estoque, válidos para uma versão dos dados
+        self._cubo: Optional[CuboEstoque] = None
+        self._estrutura_codigos: Optional[EstruturaCodigos] = None
+        self._atualizar_versao_dados()
     
     def recarregar_dados(self) -> None:
         """Recarrega dados do Excel"""
         self.df_estoque, self.df_movimentacoes = self.excel_service.carregar_dados()
-        self.movimentacao_service.df_movimentacoes = self.df_movimentacoes
+        self.movimentacao_service.atualizar_dados(self.df_movimentacoes, self.excel_service.obter_versao_dados())
+        self._atualizar_versao_dados()
+    
+    def _atualizar_versao_dados(self) -> None:
+        """Propaga a versão do arquivo de dados para as movimentações e o cache persistente"""
+        versao = self.excel_service.obter_versao_dados()
+        self.movimentacao_service.versao_dados = versao
+        cache_manager.set_data_version(versao)
+    
+    def __cache_key__(self) -> tuple:
+        """Identidade nas chaves do cache: arquivo de dados e sua versão (compartilhada entre sessões)"""
+        return (self.excel_service.excel_file, self.movimentacao_service.versao_dados)
     
     def obter_equipamentos(self) -> pd.DataFrame:
         """Retorna todos os equipamentos"""
         return self.df_estoque.copy()
     
     def obter_equipamentos_agrupados(self) -> pd.DataFrame:
-        """Retorna equipamentos agrupados por código de produto (soma Novo + Usado)"""
+        """
+        Retorna equipamentos agrupados por código de produto (soma Novo + Usado)
+        
+        O agrupamento fica no cache_manager, compartilhado entre as sessões que
+        leem a mesma versão dos dados.
+        """
         if self.df_estoque.empty:
             return pd.DataFrame()
         
         try:
-            # Agrupar por código do produto somando quantidades
-            df_agrupado = self.df_estoque.groupby(['codigo_produto', 'equipamento', 'categoria', 'marca', 'modelo']).agg({
-                'quantidade': 'sum',
-                'valor_unitario': 'mean',  # Usar média do valor unitário para o mesmo produto
-                'status': 'first',  # Pegar o primeiro status
-                'fornecedor': 'first',  # Pegar o primeiro fornecedor
-                'data_chegada': 'first'  # Pegar a primeira data de chegada
-            }).reset_index()
-            
-            # Calcular valor total para cada produto agrupado
-            df_agrupado['valor_total'] = df_agrupado['quantidade'] * df_agrupado['valor_unitario']
-            
-            return df_agrupado
-            
+            return self._calcular_equipamentos_agrupados().copy()
         except Exception as e:
             logger.error(f"Erro ao agrupar equipamentos: {str(e)}")
             return self.df_estoque.copy()
     
+    @cache_equipment_data()
+    def _calcular_equipamentos_agrupados(self) -> pd.DataFrame:
+        """Agrupamento por código (valor em cache: não modificar o retorno)"""
+        # Agrupar por código do produto somando quantidades
+        df_agrupado = self.df_estoque.groupby(['codigo_produto', 'equipamento', 'categoria', 'marca', 'modelo']).agg({
+            'quantidade': 'sum',
+            'valor_unitario': 'mean',  # Usar média do valor unitário para o mesmo produto
+            'status': 'first',  # Pegar o primeiro status
+            'fornecedor': 'first',  # Pegar o primeiro fornecedor
+            'data_chegada': 'first'  # Pegar a primeira data de chegada
+        }).reset_index()
+        
+        # Calcular valor total para cada produto agrupado
+        df_agrupado['valor_total'] = df_agrupado['quantidade'] * df_agrupado['valor_unitario']
+        return df_agrupado
+    
+    def obter_cubo(self) -> CuboEstoque:
+        """Cubo de agregados do estoque, reconstruído apenas quando a versão dos dados muda"""
+        versao = self.movimentacao_service.versao_dados
+        if self._cubo is None or self._cubo.versao != versao:
+            self._cubo = CuboEstoque(self.df_estoque, versao)
+        return self._cubo
+    
+    def obter_estrutura_codigos(self) -> EstruturaCodigos:
+        """Códigos decompostos e estatísticas, reconstruídos apenas quando a versão dos dados muda"""
+        versao = self.movimentacao_service.versao_dados
+        if self._estrutura_codigos is None or self._estrutura_codigos.versao != versao:
+            self._estrutura_codigos = EstruturaCodigos(self.df_estoque, versao)
+        return self._estrutura_codigos
+    
     def obter_equipamento_por_id(self, equipamento_id: int) -> Optional[pd.Series]:
         """Obtém equipamento por ID"""
         equipamentos = self.df_estoque[self.df_estoque['id'] == equipamento_id]
@@ -91,9 +132,16 @@ class EstoqueService:
             'qtd_usados': 0,
             'valor_novos': 0.0,
             'valor_usados': 0.0,
-            'fornecedor': equipamentos[0]['fornecedor']
+            'fornecedor': equipamentos[0]['fornecedor'],
+            'estoque_minimo': None
         }
         
+        # Limite do produto: maior valor entre as linhas Novo/Usado (mesma regra dos alertas)
+        minimos = [int(eq['estoque_minimo']) for eq in equipamentos
+                   if 'estoque_minimo' in eq and pd.notna(eq['estoque_minimo'])]
+        if minimos:
+            resultado['estoque_minimo'] = max(minimos)
+        
         for eq in equipamentos:
             condicao = eq.get('condicao', 'N/A')
             quantidade = eq.get('quantidade', 0)
@@ -133,13 +181,9 @@ class EstoqueService:
         return not df_filtrado.empty
     
     def gerar_codigo_sugerido(self, categoria: str, marca: str) -> str:
-        """Gera código sugerido baseado na categoria e marca"""
+        """Gera código sugerido baseado na categoria e marca (próximo número livre)"""
         prefixo = settings.PREFIXOS_CODIGO.get(categoria, 'OUT')
-        equipamentos_similares = self.df_estoque[
-            (self.df_estoque['categoria'] == categoria) & 
-            (self.df_estoque['marca'] == marca)
-        ]
-        numero = len(equipamentos_similares) + 1
+        numero = self.obter_estrutura_codigos().proximo_numero(prefixo, marca)
         return f"{prefixo}-{marca.upper()}-{numero:03d}"
     
     def adicionar_equipamento(self, equipamento: Equipamento) -> EquipamentoResponse:
@@ -176,17 +220,37 @@ class EstoqueService:
                 tipo_movimentacao=TipoMovimentacao.ENTRADA,
                 quantidade=equipamento_sanitized.quantidade,
                 destino_origem=f"Fornecedor: {equipamento_sanitized.fornecedor}",
-                observacoes=f"Adição inicial ao estoque | Código: {equipamento_sanitized.codigo_produto} | Condição: {equipamento_sanitized.condicao.value}",
+                observacoes="Adição inicial ao estoque",
                 codigo_produto=equipamento_sanitized.codigo_produto,
                 condicao=equipamento_sanitized.condicao
             )
             
-            self.movimentacao_service.registrar_movimentacao(movimentacao)
+            self.movimentacao_service.registrar_movimentacao(movimentacao, novo_equipamento)
             self.df_movimentacoes = self.movimentacao_service.df_movimentacoes
             
             # Salvar dados
+            versao_anterior = self.movimentacao_service.versao_dados
             if self.excel_service.salvar_dados(self.df_estoque, self.df_movimentacoes):
+                self._atualizar_versao_dados()
+                
+                # Manter a estrutura de códigos em dia sem redecompor o estoque
+                estrutura = self._estrutura_codigos
+                if estrutura is not None and estrutura.versao == versao_anterior:
+                    estrutura.adicionar(
+                        equipamento_sanitized.codigo_produto,
+                        equipamento_sanitized.condicao.value,
+                        equipamento_sanitized.equipamento
+                    )
+                    estrutura.versao = self.movimentacao_service.versao_dados
+                
                 logger.info(f"✅ Equipamento adicionado com segurança: {equipamento_sanitized.codigo_produto}")
+                audit_log.registrar(
+                    'equipamento_adicionado',
+                    codigo_produto=equipamento_sanitized.codigo_produto,
+                    condicao=equipamento_sanitized.condicao.value,
+                    quantidade=equipamento_sanitized.quantidade,
+                    versao_dados=self.movimentacao_service.versao_dados
+                )
                 return EquipamentoResponse(
                     success=True,
                     message=f"Equipamento '{equipamento_sanitized.equipamento}' adicionado com sucesso!",
@@ -259,17 +323,26 @@ class EstoqueService:
                 tipo_movimentacao=TipoMovimentacao.ENTRADA,
                 quantidade=quantidade,
                 destino_origem=f"Fornecedor: {fornecedor}",
-                observacoes=f"Aumento de estoque | Código: {equipamento['codigo_produto']} | Condição: {condicao_final.value}",
+                observacoes="Aumento de estoque",
                 codigo_produto=equipamento['codigo_produto'],
                 condicao=condicao_final
             )
             
-            self.movimentacao_service.registrar_movimentacao(movimentacao)
+            self.movimentacao_service.registrar_movimentacao(movimentacao, equipamento.to_dict())
             self.df_movimentacoes = self.movimentacao_service.df_movimentacoes
             
             # Salvar dados
             if self.excel_service.salvar_dados(self.df_estoque, self.df_movimentacoes):
+                self._atualizar_versao_dados()
                 logger.info(f"Estoque aumentado: {equipamento['codigo_produto']} +{quantidade}")
+                audit_log.registrar(
+                    'estoque_aumentado',
+                    codigo_produto=equipamento['codigo_produto'],
+                    condicao=getattr(condicao_final, 'value', condicao_final),
+                    quantidade=quantidade,
+                    nova_quantidade=int(nova_quantidade),
+                    versao_dados=self.movimentacao_service.versao_dados
+                )
                 return EquipamentoResponse(
                     success=True,
                     message=f"Estoque aumentado com sucesso! Nova quantidade: {nova_quantidade}",
@@ -288,7 +361,63 @@ class EstoqueService:
                 message=f"Erro interno: {str(e)}"
             )
     
-    def remover_equipamento(self, equipamento_id: int, quantidade: int, destino: str, observacoes: str = "", condicao: Optional[CondicionEquipamento] = None) -> EquipamentoResponse:
+    def definir_estoque_minimo(self, codigo: str, estoque_minimo: Optional[int]) -> EquipamentoResponse:
+        """
+        Define o limite de baixo estoque de um produto (todas as condições do código)
+        
+        Args:
+            codigo: Código do produto
+            estoque_minimo: Limite em unidades; None volta ao limite da categoria/previsão
+            
+        Returns:
+            EquipamentoResponse com o resultado
+        """
+        try:
+            if estoque_minimo is not None and not 0 <= int(estoque_minimo) <= 1000:
+                return EquipamentoResponse(
+                    success=False,
+                    message="Estoque mínimo deve estar entre 0 e 1000"
+                )
+            
+            linhas = self.df_estoque['codigo_produto'] == codigo.upper()
+            if not linhas.any():
+                return EquipamentoResponse(
+                    success=False,
+                    message="Equipamento não encontrado"
+                )
+            
+            if 'estoque_minimo' not in self.df_estoque.columns:
+                self.df_estoque['estoque_minimo'] = None
+            self.df_estoque['estoque_minimo'] = self.df_estoque['estoque_minimo'].astype(object)
+            self.df_estoque.loc[linhas, 'estoque_minimo'] = int(estoque_minimo) if estoque_minimo is not None else None
+            
+            if self.excel_service.salvar_dados(self.df_estoque, self.df_movimentacoes):
+                self._atualizar_versao_dados()
+                logger.info(f"Estoque mínimo de {codigo.upper()}: {estoque_minimo if estoque_minimo is not None else 'padrão'}")
+                audit_log.registrar(
+                    'estoque_minimo_definido',
+                    codigo_produto=codigo.upper(),
+                    estoque_minimo=estoque_minimo,
+                    versao_dados=self.movimentacao_service.versao_dados
+                )
+                return EquipamentoResponse(
+                    success=True,
+                    message="Estoque mínimo atualizado com sucesso!"
+                )
+            else:
+                return EquipamentoResponse(
+                    success=False,
+                    message="Erro ao salvar dados"
+                )
+                
+        except Exception as e:
+            logger.error(f"Erro ao definir estoque mínimo: {str(e)}")
+            return EquipamentoResponse(
+                success=False,
+                message=f"Erro interno: {str(e)}"
+            )
+    
+    def remover_equipamento(self, equipamento_id: int, quantidade: int, destino: str, observacoes: str = "", condicao: Optional[CondicionEquipamento] = None, codigo_saida: Optional[str] = None) -> EquipamentoResponse:
         """Remove equipamento do estoque"""
         try:
             equipamento = self.obter_equipamento_por_id(equipamento_id)
@@ -329,26 +458,35 @@ class EstoqueService:
                     logger.warning(f"Condição inválida encontrada: {condicao_str}. Usando NOVO como fallback.")
                     condicao_final = CondicionEquipamento.NOVO
             
-            # Registrar movimentação
-            observacoes_completas = f"{observacoes} | Código: {equipamento['codigo_produto']} | Condição: {condicao_final.value}" if observacoes else f"Código: {equipamento['codigo_produto']} | Condição: {condicao_final.value}"
-            
+            # Registrar movimentação (código e condição ficam em colunas próprias)
             movimentacao = Movimentacao(
                 equipamento_id=equipamento_id,
                 tipo_movimentacao=TipoMovimentacao.SAIDA,
                 quantidade=quantidade,
                 destino_origem=destino,
-                observacoes=observacoes_completas,
+                observacoes=observacoes or None,
                 codigo_produto=equipamento['codigo_produto'],
-                condicao=condicao_final
+                condicao=condicao_final,
+                codigo_saida=codigo_saida or None
             )
             
-            self.movimentacao_service.registrar_movimentacao(movimentacao)
+            self.movimentacao_service.registrar_movimentacao(movimentacao, equipamento.to_dict())
             self.df_movimentacoes = self.movimentacao_service.df_movimentacoes
             
             # Salvar dados
             if self.excel_service.salvar_dados(self.df_estoque, self.df_movimentacoes):
+                self._atualizar_versao_dados()
                 valor_total = quantidade * equipamento['valor_unitario']
                 logger.info(f"Equipamento removido: {equipamento['codigo_produto']} -{quantidade}")
+                audit_log.registrar(
+                    'equipamento_removido',
+                    codigo_produto=equipamento['codigo_produto'],
+                    condicao=getattr(condicao_final, 'value', condicao_final),
+                    quantidade=quantidade,
+                    nova_quantidade=int(nova_quantidade),
+                    destino=destino,
+                    versao_dados=self.movimentacao_service.versao_dados
+                )
                 return EquipamentoResponse(
                     success=True,
                     message=f"Equipamento removido com sucesso! Quantidade: {quantidade}, Valor: R$ {valor_total:,.2f}",
@@ -370,77 +508,7 @@ class EstoqueService:
     def obter_estatisticas(self) -> Dict[str, Any]:
         """Obtém estatísticas do estoque com separação Novo/Usado"""
         try:
-            # Se DataFrame está vazio, retornar estatísticas zeradas
-            if self.df_estoque.empty:
-                logger.info("DataFrame de estoque vazio - retornando estatísticas zeradas")
-                return {
-                    'total_equipamentos': 0,
-                    'valor_total': 0.0,
-                    'categorias_unicas': 0,
-                    'disponiveis': 0,
-                    'total_tipos': 0,
-                    'em_manutencao': 0,
-                    'total_novos': 0,
-                    'total_usados': 0,
-                    'valor_novos': 0.0,
-                    'valor_usados': 0.0,
-                    'percentual_novos': 0.0,
-                    'percentual_usados': 0.0
-                }
-            
-            # Verificar se coluna 'condicao' existe (compatibilidade com dados antigos)
-            if 'condicao' not in self.df_estoque.columns:
-                # Comportamento legacy
-                total_equipamentos = self.df_estoque['quantidade'].sum()
-                valor_total = (self.df_estoque['quantidade'] * self.df_estoque['valor_unitario']).sum()
-                return {
-                    'total_equipamentos': int(total_equipamentos),
-                    'valor_total': float(valor_total),
-                    'categorias_unicas': int(self.df_estoque['categoria'].nunique()),
-                    'disponiveis': int(self.df_estoque[self.df_estoque['status'] == StatusEquipamento.DISPONIVEL]['quantidade'].sum()),
-                    'total_tipos': len(self.df_estoque),
-                    'em_manutencao': len(self.df_estoque[self.df_estoque['status'] == StatusEquipamento.MANUTENCAO]),
-                    # Valores zerados para novo/usado
-                    'total_novos': 0,
-                    'total_usados': 0,
-                    'valor_novos': 0.0,
-                    'valor_usados': 0.0,
-                    'percentual_novos': 0.0,
-                    'percentual_usados': 0.0
-                }
-            
-            # Estatísticas com separação Novo/Usado
-            df_novos = self.df_estoque[self.df_estoque['condicao'] == CondicionEquipamento.NOVO.value]
-            df_usados = self.df_estoque[self.df_estoque['condicao'] == CondicionEquipamento.USADO.value]
-            
-            total_novos = df_novos['quantidade'].sum() if not df_novos.empty else 0
-            total_usados = df_usados['quantidade'].sum() if not df_usados.empty else 0
-            total_equipamentos = total_novos + total_usados
-            
-            valor_novos = (df_novos['quantidade'] * df_novos['valor_unitario']).sum() if not df_novos.empty else 0.0
-            valor_usados = (df_usados['quantidade'] * df_usados['valor_unitario']).sum() if not df_usados.empty else 0.0
-            valor_total = valor_novos + valor_usados
-            
-            percentual_novos = (total_novos / total_equipamentos * 100) if total_equipamentos > 0 else 0.0
-            
-            categorias_unicas = self.df_estoque['categoria'].nunique()
-            disponiveis = self.df_estoque[self.df_estoque['status'] == StatusEquipamento.DISPONIVEL]['quantidade'].sum()
-            
-            return {
-                'total_equipamentos': int(total_equipamentos),
-                'valor_total': float(valor_total),
-                'categorias_unicas': int(categorias_unicas),
-                'disponiveis': int(disponiveis),
-                'total_tipos': len(self.df_estoque),
-                'em_manutencao': len(self.df_estoque[self.df_estoque['status'] == StatusEquipamento.MANUTENCAO]),
-                # Novas estatísticas por condição
-                'total_novos': int(total_novos),
-                'total_usados': int(total_usados),
-                'valor_novos': float(valor_novos),
-                'valor_usados': float(valor_usados),
-                'percentual_novos': float(percentual_novos),
-                'percentual_usados': float(100.0 - percentual_novos)
-            }
+            return dict(self._calcular_estatisticas())
         except Exception as e:
             logger.error(f"Erro ao obter estatísticas: {str(e)}")
             return {
@@ -458,6 +526,147 @@ class EstoqueService:
                 'percentual_usados': 0.0
             }
     
+    @cache_dashboard_data()
+    def _calcular_estatisticas(self) -> Dict[str, Any]:
+        """Estatísticas da versão atual dos dados (valor em cache, compartilhado entre sessões)"""
+        # Se DataFrame está vazio, retornar estatísticas zeradas
+        if self.df_estoque.empty:
+            logger.info("DataFrame de estoque vazio - retornando estatísticas zeradas")
+            return {
+                'total_equipamentos': 0,
+                'valor_total': 0.0,
+                'categorias_unicas': 0,
+                'disponiveis': 0,
+                'total_tipos': 0,
+                'em_manutencao': 0,
+                'total_novos': 0,
+                'total_usados': 0,
+                'valor_novos': 0.0,
+                'valor_usados': 0.0,
+                'percentual_novos': 0.0,
+                'percentual_usados': 0.0
+            }
+        
+        # Verificar se coluna 'condicao' existe (compatibilidade com dados antigos)
+        if 'condicao' not in self.df_estoque.columns:
+            # Comportamento legacy
+            total_equipamentos = self.df_estoque['quantidade'].sum()
+            valor_total = (self.df_estoque['quantidade'] * self.df_estoque['valor_unitario']).sum()
+            return {
+                'total_equipamentos': int(total_equipamentos),
+                'valor_total': float(valor_total),
+                'categorias_unicas': int(self.df_estoque['categoria'].nunique()),
+                'disponiveis': int(self.df_estoque[self.df_estoque['status'] == StatusEquipamento.DISPONIVEL]['quantidade'].sum()),
+                'total_tipos': len(self.df_estoque),
+                'em_manutencao': len(self.df_estoque[self.df_estoque['status'] == StatusEquipamento.MANUTENCAO]),
+                # Valores zerados para novo/usado
+                'total_novos': 0,
+                'total_usados': 0,
+                'valor_novos': 0.0,
+                'valor_usados': 0.0,
+                'percentual_novos': 0.0,
+                'percentual_usados': 0.0
+            }
+        
+        # Estatísticas com separação Novo/Usado
+        df_novos = self.df_estoque[self.df_estoque['condicao'] == CondicionEquipamento.NOVO.value]
+        df_usados = self.df_estoque[self.df_estoque['condicao'] == CondicionEquipamento.USADO.value]
+        
+        total_novos = df_novos['quantidade'].sum() if not df_novos.empty else 0
+        total_usados = df_usados['quantidade'].sum() if not df_usados.empty else 0
+        total_equipamentos = total_novos + total_usados
+        
+        valor_novos = (df_novos['quantidade'] * df_novos['valor_unitario']).sum() if not df_novos.empty else 0.0
+        valor_usados = (df_usados['quantidade'] * df_usados['valor_unitario']).sum() if not df_usados.empty else 0.0
+        valor_total = valor_novos + valor_usados
+        
+        percentual_novos = (total_novos / total_equipamentos * 100) if total_equipamentos > 0 else 0.0
+        
+        categorias_unicas = self.df_estoque['categoria'].nunique()
+        disponiveis = self.df_estoque[self.df_estoque['status'] == StatusEquipamento.DISPONIVEL]['quantidade'].sum()
+        
+        return {
+            'total_equipamentos': int(total_equipamentos),
+            'valor_total': float(valor_total),
+            'categorias_unicas': int(categorias_unicas),
+            'disponiveis': int(disponiveis),
+            'total_tipos': len(self.df_estoque),
+            'em_manutencao': len(self.df_estoque[self.df_estoque['status'] == StatusEquipamento.MANUTENCAO]),
+            # Novas estatísticas por condição
+            'total_novos': int(total_novos),
+            'total_usados': int(total_usados),
+            'valor_novos': float(valor_novos),
+            'valor_usados': float(valor_usados),
+            'percentual_novos': float(percentual_novos),
+            'percentual_usados': float(100.0 - percentual_novos)
+        }
+    
+    def estoque_em(self, data: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Estoque por código e condição ao final de uma data, reconstruído das movimentações
+        
+        Args:
+            data: Dia de referência (inclusive); None para o saldo atual
+            
+        Returns:
+            DataFrame com codigo_produto, condicao e quantidade
+        """
+        try:
+            return self.movimentacao_service.replay.estoque_em(data)
+        except Exception as e:
+            logger.error(f"Erro ao reconstruir estoque em {data}: {str(e)}")
+            return pd.DataFrame(columns=['codigo_produto', 'condicao', 'quantidade'])
+    
+    def obter_previsao_consumo(self, por_condicao: bool = True) -> pd.DataFrame:
+        """
+        Dias de cobertura e ponto de reposição do estoque atual
+        
+        Args:
+            por_condicao: Separar Novo/Usado; se False, agrega por código
+            
+        Returns:
+            DataFrame ordenado pelos itens com menor cobertura
+        """
+        try:
+            return self.movimentacao_service.previsao.calcular(self.df_estoque, por_condicao=por_condicao)
+        except Exception as e:
+            logger.error(f"Erro ao calcular previsão de consumo: {str(e)}")
+            return pd.DataFrame()
+    
+    def avaliar_baixo_estoque(self) -> pd.DataFrame:
+        """
+        Códigos em baixo estoque segundo os limites por produto, categoria e previsão
+        
+        Returns:
+            DataFrame de alertas ordenado por severidade (vazio se não houver)
+        """
+        try:
+            previsao = self.obter_previsao_consumo(por_condicao=False)
+            return avaliar_baixo_estoque(self.df_estoque, previsao)
+        except Exception as e:
+            logger.error(f"Erro ao avaliar baixo estoque: {str(e)}")
+            return pd.DataFrame(columns=COLUNAS_ALERTA)
+    
+    def reconciliar_estoque(self) -> pd.DataFrame:
+        """
+        Compara o estoque gravado com o reconstruído a partir das movimentações
+        
+        Returns:
+            DataFrame por código e condição com a divergência (registrada - replay)
+            e a coluna divergente
+        """
+        try:
+            resultado = self.movimentacao_service.replay.reconciliar(self.df_estoque)
+            divergentes = int(resultado['divergente'].sum())
+            if divergentes:
+                logger.warning(f"⚠️ Reconciliação: {divergentes} itens com estoque divergente das movimentações")
+            else:
+                logger.info("✅ Reconciliação: estoque consistente com as movimentações")
+            return resultado
+        except Exception as e:
+            logger.error(f"Erro ao reconciliar estoque: {str(e)}")
+            return pd.DataFrame(columns=['codigo_produto', 'condicao', 'quantidade_replay', 'quantidade_registrada', 'divergencia', 'divergente'])
+    
     def filtrar_equipamentos(self, categoria: Optional[str] = None, marca: Optional[str] = None, status: Optional[str] = None, codigo: Optional[str] = None) -> pd.DataFrame:
         """Filtra equipamentos por critérios"""
         df_filtrado = self.df_estoque.copy()
@@ -8,6 +8,7 @@ from typing import Tuple, Optional
 from loguru import logger
 from config.settings import settings
 from models.schemas import CondicionEquipamento
+from utils.log_config import AmostradorLog
 
 class ExcelService:
     """Serviço para gerenciar dados no Excel"""
@@ -40,23 +41,47 @@ class ExcelService:
                     logger.info("Sheet de estoque está vazio - criando dados iniciais")
                     return self._criar_dados_iniciais()
                 
+                migrado = False
+                
                 # Migrar dados se necessário
                 if 'codigo_produto' not in df_estoque.columns:
                     logger.info("Migrando dados para incluir código do produto")
                     df_estoque = self._migrar_dados(df_estoque)
+                    migrado = True
                 
                 # Migrar para sistema Novo/Usado se necessário
                 if 'condicao' not in df_estoque.columns:
                     logger.info("Migrando dados para incluir condição Novo/Usado")
                     df_estoque = self._migrar_para_novo_usado(df_estoque)
+                    migrado = True
+                
+                # Estoque mínimo por produto (vazio = usa categoria/previsão)
+                if 'estoque_minimo' not in df_estoque.columns:
+                    logger.info("Migrando estoque para incluir estoque mínimo por produto")
+                    df_estoque['estoque_minimo'] = None
+                    migrado = True
                 
                 # Migrar movimentações se necessário
                 if not df_movimentacoes.empty and 'condicao' not in df_movimentacoes.columns:
                     logger.info("Migrando movimentações para incluir condição")
                     df_movimentacoes = self._migrar_movimentacoes_condicao(df_movimentacoes)
+                    migrado = True
+                
+                # Extrair código/condição embutidos nas observações para colunas próprias
+                if not df_movimentacoes.empty and 'codigo_saida' not in df_movimentacoes.columns:
+                    logger.info("Migrando observações de movimentações para colunas estruturadas")
+                    df_movimentacoes = self._migrar_observacoes_estruturadas(df_movimentacoes)
+                    migrado = True
+                
+                # Copiar nome/categoria/marca do equipamento para o histórico
+                if not df_movimentacoes.empty and 'equipamento' not in df_movimentacoes.columns:
+                    logger.info("Migrando movimentações para incluir atributos do equipamento")
+                    df_movimentacoes = self._migrar_atributos_equipamento(df_movimentacoes, df_estoque)
+                    migrado = True
                 
-                # Salvar após migrações
-                self.salvar_dados(df_estoque, df_movimentacoes)
+                # Salvar apenas se houve migração (evita regravar o arquivo a cada recarga)
+                if migrado:
+                    self.salvar_dados(df_estoque, df_movimentacoes)
                 
                 return df_estoque, df_movimentacoes
             else:
@@ -103,7 +128,8 @@ class ExcelService:
                 CondicionEquipamento.NOVO.value, CondicionEquipamento.USADO.value,
                 CondicionEquipamento.NOVO.value, CondicionEquipamento.NOVO.value,
                 CondicionEquipamento.NOVO.value, CondicionEquipamento.NOVO.value
-            ]
+            ],
+            'estoque_minimo': [None, None, None, None, None, None, None, None]
         })
         
         df_movimentacoes = pd.DataFrame({
@@ -118,7 +144,11 @@ class ExcelService:
             'condicao': [
                 CondicionEquipamento.NOVO.value, CondicionEquipamento.USADO.value,
                 CondicionEquipamento.USADO.value, CondicionEquipamento.NOVO.value
-            ]
+            ],
+            'codigo_saida': [None, None, None, None],
+            'equipamento': ['Notebook Dell Latitude', 'Notebook Dell Latitude', 'Monitor LG 24"', 'Monitor LG 24"'],
+            'categoria': ['Notebook', 'Notebook', 'Monitor', 'Monitor'],
+            'marca': ['Dell', 'Dell', 'LG', 'LG']
         })
         
         self.salvar_dados(df_estoque, df_movimentacoes)
@@ -141,6 +171,9 @@ class ExcelService:
         novos_registros = []
         proximo_id = int(df_estoque['id'].max()) + 1 if not df_estoque.empty else 1
         
+        # Uma linha por produto: registra apenas uma amostra
+        amostrador = AmostradorLog()
+        
         for _, row in df_estoque.iterrows():
             codigo = row['codigo_produto']
             quantidade_total = row['quantidade']
@@ -154,7 +187,7 @@ class ExcelService:
                 nova_linha = row.copy()
                 nova_linha['condicao'] = condicao_sugerida
                 novos_registros.append(nova_linha)
-                logger.info(f"📦 {codigo}: {quantidade_total} un. → {condicao_sugerida}")
+                amostrador.debug(f"📦 {codigo}: {quantidade_total} un. → {condicao_sugerida}")
             else:
                 # Quantidade maior - dividir entre Novo e Usado
                 if condicao_sugerida == CondicionEquipamento.NOVO.value:
@@ -183,7 +216,9 @@ class ExcelService:
                     novos_registros.append(nova_linha_usado)
                     proximo_id += 1
                 
-                logger.info(f"📦 {codigo}: {quantidade_total} un. → Novos: {qtd_novos} | Usados: {qtd_usados}")
+                amostrador.debug(f"📦 {codigo}: {quantidade_total} un. → Novos: {qtd_novos} | Usados: {qtd_usados}")
+        
+        amostrador.resumo("Migração Novo/Usado")
         
         # Criar novo DataFrame com os registros migrados
         if novos_registros:
@@ -240,16 +275,68 @@ class ExcelService:
         # Para movimentações existentes, assumir condição "Novo" por padrão
         df_movimentacoes['condicao'] = CondicionEquipamento.NOVO.value
         
-        # Atualizar observações para incluir condição
-        for idx, row in df_movimentacoes.iterrows():
-            obs_atual = str(row['observacoes']) if pd.notna(row['observacoes']) else ""
-            if "Condição:" not in obs_atual:
-                nova_obs = f"{obs_atual} | Condição: Novo (migração)" if obs_atual else "Condição: Novo (migração)"
-                df_movimentacoes.loc[idx, 'observacoes'] = nova_obs
-        
         logger.info(f"✅ Migração de movimentações concluída: {len(df_movimentacoes)} registros")
         return df_movimentacoes
     
+    def _migrar_observacoes_estruturadas(self, df_movimentacoes: pd.DataFrame) -> pd.DataFrame:
+        """
+        Backfill vetorizado de código do produto, condição e código de saída
+        
+        Versões anteriores gravavam esses atributos dentro de observações
+        ("Motivo | Código: SAIDA-1 | Código: NB-DELL-001 | Condição: Novo").
+        Os valores são extraídos para colunas (sem sobrescrever as já
+        preenchidas) e os trechos estruturados são removidos do texto.
+        """
+        observacoes = df_movimentacoes['observacoes'].fillna('').astype(str) if 'observacoes' in df_movimentacoes.columns else pd.Series('', index=df_movimentacoes.index)
+        
+        condicao = observacoes.str.extract(r'Condição:\s*(Novo|Usado)', expand=False)
+        # O código do produto é sempre o segmento imediatamente antes da condição
+        codigo_produto = observacoes.str.extract(r'Código:\s*([^|]+?)\s*\|\s*Condição:', expand=False)
+        # Um segundo código anterior ao do produto é o código de saída
+        codigo_saida = observacoes.str.extract(r'Código:\s*([^|]+?)\s*\|\s*Código:', expand=False)
+        
+        for coluna, extraido in (('condicao', condicao), ('codigo_produto', codigo_produto)):
+            if coluna in df_movimentacoes.columns:
+                df_movimentacoes[coluna] = df_movimentacoes[coluna].where(df_movimentacoes[coluna].notna(), extraido)
+            else:
+                df_movimentacoes[coluna] = extraido
+        df_movimentacoes['condicao'] = df_movimentacoes['condicao'].fillna(CondicionEquipamento.NOVO.value)
+        df_movimentacoes['codigo_saida'] = codigo_saida
+        
+        limpas = (
+            observacoes
+            .str.replace(r'(?:^|\s*\|\s*)(?:Código|Condição):[^|]*', '', regex=True)
+            .str.strip(' |')
+        )
+        df_movimentacoes['observacoes'] = limpas.where(limpas != '', None)
+        
+        alteradas = int((limpas != observacoes).sum())
+        logger.info(f"✅ Observações estruturadas migradas: {alteradas} de {len(df_movimentacoes)} registros")
+        return df_movimentacoes
+    
+    def _migrar_atributos_equipamento(self, df_movimentacoes: pd.DataFrame, df_estoque: pd.DataFrame) -> pd.DataFrame:
+        """
+        Backfill vetorizado de equipamento, categoria e marca nas movimentações
+        
+        Usa o estado atual do estoque; movimentações de itens já removidos do
+        cadastro permanecem sem esses atributos.
+        """
+        atributos = ['equipamento', 'categoria', 'marca']
+        colunas = [coluna for coluna in atributos if coluna in df_estoque.columns]
+        
+        if 'id' in df_estoque.columns and 'equipamento_id' in df_movimentacoes.columns and colunas:
+            cadastro = df_estoque.drop_duplicates('id').set_index('id')[colunas]
+            for coluna in colunas:
+                df_movimentacoes[coluna] = df_movimentacoes['equipamento_id'].map(cadastro[coluna])
+        
+        for coluna in atributos:
+            if coluna not in df_movimentacoes.columns:
+                df_movimentacoes[coluna] = None
+        
+        preenchidas = int(df_movimentacoes['equipamento'].notna().sum())
+        logger.info(f"✅ Atributos de equipamento migrados: {preenchidas} de {len(df_movimentacoes)} movimentações")
+        return df_movimentacoes
+    
     def salvar_dados(self, df_estoque: pd.DataFrame, df_movimentacoes: pd.DataFrame) -> bool:
         """Salva dados no Excel"""
         try:
@@ -262,6 +349,14 @@ class ExcelService:
             logger.error(f"Erro ao salvar dados: {str(e)}")
             return False
     
+    def obter_versao_dados(self) -> str:
+        """Retorna identificador da versão atual do arquivo (mtime + tamanho)"""
+        try:
+            stat = os.stat(self.excel_file)
+            return f"{stat.st_mtime_ns}-{stat.st_size}"
+        except OSError:
+            return "sem-arquivo"
+    
     def backup_dados(self) -> Optional[str]:
         """Cria backup dos dados"""
         try:
@@ -0,0 +1,532 @@
+"""
+Índices das movimentações: ordenação por data e posições por equipamento/código
+"""
+
+import re
+import bisect
+import unicodedata
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Tuple, Any
+from datetime import datetime, timedelta
+from loguru import logger
+
+# Cursor de paginação: (data da movimentação, id)
+Cursor = Tuple[Any, int]
+
+# Conjunto de candidatos: intervalo contíguo [inicio, fim) ou posições ordenadas
+_Candidatos = Tuple[int, int, Optional[np.ndarray]]
+
+_VAZIO = np.array([], dtype=np.int64)
+
+# Colunas de texto livre cobertas pelo índice de tokens
+COLUNAS_TEXTO = ['equipamento', 'categoria', 'marca', 'observacoes', 'destino_origem', 'codigo_saida']
+
+_TOKEN = re.compile(r'\w+')
+_SEPARADOR = '\x01'
+# Texto já normalizado é ASCII: tudo que não for [a-z0-9_] (nem o separador) vira espaço
+_NAO_TOKEN = str.maketrans({
+    chr(c): ' ' for c in range(128)
+    if not (chr(c).isalnum() or chr(c) == '_' or chr(c) == _SEPARADOR)
+})
+
+def _ordenar_unicos(valores: np.ndarray) -> np.ndarray:
+    """Valores distintos em ordem crescente (ordenação + diferença, sem tabela hash)"""
+    valores = np.sort(valores)
+    if len(valores) == 0:
+        return valores
+    return valores[np.concatenate(([True], valores[1:] != valores[:-1]))]
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas e sem acentos (mesma regra usada na construção do índice)"""
+    texto = str(texto)
+    if texto.isascii():
+        return texto.lower()
+    return unicodedata.normalize('NFKD', texto.lower()).encode('ascii', errors='ignore').decode('ascii')
+
+def tokenizar(texto: str) -> List[str]:
+    """Divide o texto normalizado em tokens alfanuméricos"""
+    return _TOKEN.findall(normalizar_texto(texto))
+
+@dataclass
+class PaginaMovimentacoes:
+    """Página de movimentações obtida por paginação keyset"""
+    itens: pd.DataFrame
+    total: int
+    inicio: int  # posição (1-based) do primeiro item dentro do resultado
+    cursor_primeiro: Optional[Cursor]
+    cursor_ultimo: Optional[Cursor]
+    tem_anterior: bool
+    tem_proxima: bool
+
+class IndiceMovimentacoes:
+    """
+    Movimentações ordenadas por (data, id) com índices auxiliares
+
+    Consultas por intervalo de datas usam busca binária (searchsorted) sobre a
+    coluna de datas ordenada, custando O(log n + k). Os índices por equipamento
+    e por código guardam as posições (crescentes) de cada chave no frame
+    ordenado, permitindo cruzar com o intervalo de datas também por busca binária.
+    """
+
+    def __init__(self, df_movimentacoes: pd.DataFrame):
+        df = df_movimentacoes.copy()
+
+        if 'data_movimentacao' in df.columns:
+            df['data_movimentacao'] = pd.to_datetime(df['data_movimentacao'], errors='coerce')
+            colunas_ordem = ['data_movimentacao', 'id'] if 'id' in df.columns else ['data_movimentacao']
+            df = df.sort_values(colunas_ordem, kind='mergesort', na_position='first')
+
+        self.df = df.reset_index(drop=True)
+        # Datas inválidas (NaT) ficam no início e são excluídas de toda consulta por período
+        if 'data_movimentacao' in self.df.columns:
+            self._sem_data = int(self.df['data_movimentacao'].isna().sum())
+            self._datas = self.df['data_movimentacao'].values[self._sem_data:].astype('datetime64[ns]')
+        else:
+            self._sem_data = 0
+            self._datas = np.array([], dtype='datetime64[ns]')
+
+        if 'id' in self.df.columns:
+            self._ids = pd.to_numeric(self.df['id'], errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+        else:
+            self._ids = np.arange(len(self.df), dtype=np.int64)
+
+        self._por_equipamento = self._indexar('equipamento_id')
+        self._por_codigo = self._indexar('codigo_produto')
+        self._por_tipo = self._indexar('tipo_movimentacao', padrao='Entrada')
+        self._por_condicao = self._indexar('condicao')
+
+        # Índice invertido de texto livre, construído na primeira busca
+        self._vocabulario: Optional[List[str]] = None
+        self._postings = _VAZIO
+        self._offsets = np.zeros(1, dtype=np.int64)
+
+        logger.debug(f"🗂️ Índice de movimentações construído: {len(self.df)} linhas, {len(self._por_equipamento)} equipamentos, {len(self._por_codigo)} códigos")
+
+    def _indexar(self, coluna: str, padrao: Optional[str] = None) -> Dict[object, np.ndarray]:
+        """Mapeia cada valor da coluna para as posições (ordenadas) no frame"""
+        if coluna not in self.df.columns or self.df.empty:
+            return {}
+        valores = self.df[coluna] if padrao is None else self.df[coluna].fillna(padrao)
+        return {
+            chave: np.asarray(posicoes, dtype=np.int64)
+            for chave, posicoes in valores.groupby(valores, sort=False).indices.items()
+        }
+
+    def adicionar(self, movimentacao: Dict[str, Any]) -> bool:
+        """
+        Insere uma movimentação nova mantendo a ordem por (data, id)
+
+        A posição é encontrada por busca binária. Posições de índices posteriores
+        são deslocadas em uma unidade (nenhuma, no caso comum de movimentação
+        mais recente que todas) e a nova posição entra ordenada na lista de cada
+        chave. O índice de texto é refeito na próxima busca.
+
+        Args:
+            movimentacao: Dicionário com os campos da movimentação
+
+        Returns:
+            False se a movimentação não puder ser posicionada (sem data ou sem
+            id); nesse caso o índice deve ser reconstruído
+        """
+        if 'data_movimentacao' not in self.df.columns or 'id' not in self.df.columns:
+            return False
+
+        data = pd.to_datetime(movimentacao.get('data_movimentacao'), errors='coerce')
+        id_mov = pd.to_numeric(movimentacao.get('id'), errors='coerce')
+        if pd.isna(data) or pd.isna(id_mov):
+            return False
+
+        valor = np.datetime64(pd.Timestamp(data), 'ns')
+        id_mov = int(id_mov)
+
+        # Posição após as linhas com a mesma (data, id) ou anteriores
+        datas_lo = int(np.searchsorted(self._datas, valor, side='left'))
+        datas_hi = int(np.searchsorted(self._datas, valor, side='right'))
+        ids_mesma_data = self._ids[self._sem_data + datas_lo:self._sem_data + datas_hi]
+        relativa = datas_lo + int(np.searchsorted(ids_mesma_data, id_mov, side='right'))
+        posicao = self._sem_data + relativa
+
+        linha = pd.DataFrame([movimentacao])
+        linha['data_movimentacao'] = pd.to_datetime(linha['data_movimentacao'], errors='coerce')
+        if posicao == len(self.df):
+            self.df = pd.concat([self.df, linha], ignore_index=True)
+        else:
+            self.df = pd.concat([self.df.iloc[:posicao], linha, self.df.iloc[posicao:]], ignore_index=True)
+
+        self._datas = np.insert(self._datas, relativa, valor)
+        self._ids = np.insert(self._ids, posicao, id_mov)
+
+        registro = self.df.iloc[posicao]
+        for indice, coluna, padrao in (
+            (self._por_equipamento, 'equipamento_id', None),
+            (self._por_codigo, 'codigo_produto', None),
+            (self._por_tipo, 'tipo_movimentacao', 'Entrada'),
+            (self._por_condicao, 'condicao', None),
+        ):
+            if coluna not in self.df.columns:
+                continue
+            self._inserir_posicao(indice, registro[coluna] if not pd.isna(registro[coluna]) else padrao, posicao)
+
+        self._vocabulario = None
+        return True
+
+    @staticmethod
+    def _inserir_posicao(indice: Dict[object, np.ndarray], chave: object, posicao: int) -> None:
+        """Desloca as posições >= posicao e insere a nova na lista da chave (None = sem chave)"""
+        for outra, posicoes in indice.items():
+            if len(posicoes) and posicoes[-1] >= posicao:
+                indice[outra] = posicoes + (posicoes >= posicao)
+        if chave is None:
+            return
+
+        posicoes = indice.get(chave, _VAZIO)
+        ponto = bisect.bisect_left(posicoes, posicao)
+        indice[chave] = np.insert(posicoes, ponto, posicao)
+
+    @property
+    def tipos(self) -> List[str]:
+        """Valores distintos (brutos) de tipo de movimentação"""
+        return list(self._por_tipo.keys())
+
+    def intervalo(self,
+                  data_inicio: Optional[datetime] = None,
+                  data_fim_exclusiva: Optional[datetime] = None) -> Tuple[int, int]:
+        """
+        Retorna o intervalo [inicio, fim) de posições dentro do período
+
+        Args:
+            data_inicio: Inclui datas >= data_inicio
+            data_fim_exclusiva: Inclui datas < data_fim_exclusiva
+
+        Returns:
+            Tupla (inicio, fim) de posições no frame ordenado
+        """
+        if data_inicio is None and data_fim_exclusiva is None:
+            return 0, len(self.df)
+
+        inicio, fim = 0, len(self._datas)
+        if data_inicio is not None:
+            inicio = int(np.searchsorted(self._datas, np.datetime64(pd.Timestamp(data_inicio), 'ns'), side='left'))
+        if data_fim_exclusiva is not None:
+            fim = int(np.searchsorted(self._datas, np.datetime64(pd.Timestamp(data_fim_exclusiva), 'ns'), side='left'))
+
+        inicio, fim = inicio + self._sem_data, fim + self._sem_data
+
+        return inicio, max(inicio, fim)
+
+    def _posicoes_no_intervalo(self, posicoes: np.ndarray, inicio: int, fim: int) -> np.ndarray:
+        """Recorta posições ordenadas ao intervalo [inicio, fim)"""
+        return posicoes[np.searchsorted(posicoes, inicio, side='left'):np.searchsorted(posicoes, fim, side='left')]
+
+    def posicoes_codigo(self, trecho: str) -> np.ndarray:
+        """Posições das movimentações cujo código contém o trecho (sem diferenciar maiúsculas)"""
+        trecho = trecho.upper()
+        encontrados: List[np.ndarray] = [
+            posicoes for codigo, posicoes in self._por_codigo.items()
+            if isinstance(codigo, str) and trecho in codigo.upper()
+        ]
+        if not encontrados:
+            return np.array([], dtype=np.int64)
+        return np.sort(np.concatenate(encontrados))
+
+    def _construir_tokens(self) -> None:
+        """
+        Constrói o índice invertido token → posições (vetorizado)
+
+        Apenas os textos distintos são tokenizados; as posições de cada token
+        ficam contíguas e ordenadas em um único vetor (_postings), delimitadas
+        por _offsets na ordem alfabética do vocabulário.
+        """
+        colunas = [coluna for coluna in COLUNAS_TEXTO if coluna in self.df.columns]
+        self._vocabulario, self._postings, self._offsets = [], _VAZIO, np.zeros(1, dtype=np.int64)
+        if not colunas or self.df.empty:
+            return
+
+        texto = self.df[colunas[0]].fillna('').astype(str)
+        for coluna in colunas[1:]:
+            texto = texto + ' ' + self.df[coluna].fillna('').astype(str)
+
+        codigos, unicos = pd.factorize(texto.str.replace(_SEPARADOR, ' ', regex=False))
+        texto_id, token_id, vocabulario = self._tokenizar_textos(unicos)
+        if len(vocabulario) == 0:
+            return
+
+        # Posições agrupadas por texto distinto (crescentes dentro de cada grupo)
+        ordem = np.argsort(codigos, kind='stable')
+        contagem = np.bincount(codigos, minlength=len(unicos))
+        inicio_texto = np.concatenate(([0], np.cumsum(contagem)[:-1]))
+
+        # Expande cada par (token, texto) nas posições das linhas com aquele texto
+        repeticoes = contagem[texto_id]
+        deslocamento = np.arange(repeticoes.sum()) - np.repeat(np.cumsum(repeticoes) - repeticoes, repeticoes)
+        posicoes = ordem[np.repeat(inicio_texto[texto_id], repeticoes) + deslocamento]
+        tokens_rep = np.repeat(token_id, repeticoes)
+
+        ordenacao = np.lexsort((posicoes, tokens_rep))
+        self._postings = posicoes[ordenacao].astype(np.int64)
+        self._offsets = np.concatenate(([0], np.cumsum(np.bincount(tokens_rep, minlength=len(vocabulario))))).astype(np.int64)
+        self._vocabulario = list(vocabulario)
+
+        logger.debug(f"🔤 Índice de texto construído: {len(self._vocabulario)} tokens, {len(self._postings)} ocorrências")
+
+    @staticmethod
+    def _tokenizar_textos(textos) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Tokeniza vários textos de uma vez
+
+        Os textos (sem o caractere separador) são unidos e processados como uma única
+        string (normalização, translate e split em C), evitando um laço por texto.
+
+        Returns:
+            Tupla (texto_id, token_id, vocabulário ordenado), sem pares repetidos
+        """
+        grande = _SEPARADOR.join(np.asarray(textos, dtype=object).tolist())
+        grande = normalizar_texto(grande).translate(_NAO_TOKEN)
+
+        partes = np.array(grande.replace(_SEPARADOR, f' {_SEPARADOR} ').split(), dtype=object)
+        separador = partes == _SEPARADOR
+        texto_id = np.cumsum(separador)[~separador].astype(np.int64)
+        tokens = partes[~separador]
+        if len(tokens) == 0:
+            return _VAZIO, _VAZIO, np.array([], dtype=object)
+
+        # Vocabulário em ordem alfabética (ids contíguos por prefixo)
+        codigos, vocabulario = pd.factorize(tokens)
+        ordem = np.argsort(vocabulario.astype(str), kind='stable')
+        posto = np.empty_like(ordem)
+        posto[ordem] = np.arange(len(ordem))
+        token_id = posto[codigos].astype(np.int64)
+
+        # Remove tokens repetidos dentro do mesmo texto
+        total_textos = int(texto_id.max()) + 1
+        chaves = _ordenar_unicos(token_id * total_textos + texto_id)
+        return chaves % total_textos, chaves // total_textos, np.asarray(vocabulario, dtype=object)[ordem]
+
+    def posicoes_busca(self, busca: str, inicio: int = 0, fim: Optional[int] = None) -> np.ndarray:
+        """
+        Posições das movimentações que contêm todos os termos da busca
+
+        Cada termo casa com tokens que começam por ele (busca por prefixo,
+        sem diferenciar maiúsculas e acentos). As listas de posições são
+        recortadas ao intervalo [inicio, fim) antes de combinadas.
+        """
+        if self._vocabulario is None:
+            self._construir_tokens()
+        fim = len(self.df) if fim is None else fim
+
+        resultado: Optional[np.ndarray] = None
+        for termo in tokenizar(busca):
+            primeiro = bisect.bisect_left(self._vocabulario, termo)
+            ultimo = bisect.bisect_left(self._vocabulario, termo + '\x7f')
+
+            segmentos = []
+            for token in range(primeiro, ultimo):
+                lista = self._postings[self._offsets[token]:self._offsets[token + 1]]
+                lista = self._posicoes_no_intervalo(lista, inicio, fim)
+                if len(lista):
+                    segmentos.append(lista)
+
+            if not segmentos:
+                return _VAZIO
+            posicoes = segmentos[0] if len(segmentos) == 1 else _ordenar_unicos(np.concatenate(segmentos))
+            resultado = self._intersectar(resultado, posicoes)
+            if len(resultado) == 0:
+                break
+
+        return resultado if resultado is not None else np.arange(inicio, fim, dtype=np.int64)
+
+    def _candidatos(self,
+                    data_inicio: Optional[datetime] = None,
+                    data_fim_exclusiva: Optional[datetime] = None,
+                    equipamento_id: Optional[int] = None,
+                    codigo: Optional[str] = None,
+                    tipos: Optional[List[str]] = None,
+                    busca: Optional[str] = None,
+                    condicao: Optional[str] = None) -> _Candidatos:
+        """Resolve os filtros para um intervalo contíguo ou um vetor de posições ordenadas"""
+        inicio, fim = self.intervalo(data_inicio, data_fim_exclusiva)
+
+        posicoes: Optional[np.ndarray] = None
+        if equipamento_id is not None:
+            posicoes = self._por_equipamento.get(equipamento_id, _VAZIO)
+        if codigo:
+            posicoes = self._intersectar(posicoes, self.posicoes_codigo(codigo))
+        if tipos is not None:
+            por_tipo = [self._por_tipo[tipo] for tipo in tipos if tipo in self._por_tipo]
+            posicoes = self._intersectar(posicoes, np.sort(np.concatenate(por_tipo)) if por_tipo else _VAZIO)
+        if condicao:
+            posicoes = self._intersectar(posicoes, self._por_condicao.get(condicao, _VAZIO))
+        if busca:
+            posicoes = self._intersectar(posicoes, self.posicoes_busca(busca, inicio, fim))
+
+        if posicoes is not None:
+            posicoes = self._posicoes_no_intervalo(posicoes, inicio, fim)
+
+        return inicio, fim, posicoes
+
+    @staticmethod
+    def _intersectar(posicoes: Optional[np.ndarray], outras: np.ndarray) -> np.ndarray:
+        if posicoes is None:
+            return outras
+        return np.intersect1d(posicoes, outras, assume_unique=True)
+
+    def consultar(self,
+                  data_inicio: Optional[datetime] = None,
+                  data_fim_exclusiva: Optional[datetime] = None,
+                  equipamento_id: Optional[int] = None,
+                  codigo: Optional[str] = None,
+                  tipos: Optional[List[str]] = None,
+                  busca: Optional[str] = None,
+                  condicao: Optional[str] = None) -> pd.DataFrame:
+        """
+        Seleciona movimentações por período, equipamento, código, tipo e texto
+
+        Args:
+            data_inicio: Inclui datas >= data_inicio
+            data_fim_exclusiva: Inclui datas < data_fim_exclusiva
+            equipamento_id: ID exato do equipamento
+            codigo: Trecho do código do produto
+            tipos: Valores brutos de tipo aceitos
+            busca: Termos procurados no índice de texto (equipamento, categoria, marca,
+                observações, destino/origem, código de saída)
+            condicao: Condição exata (Novo/Usado)
+
+        Returns:
+            Cópia das linhas selecionadas, ordenadas por data crescente
+        """
+        inicio, fim, posicoes = self._candidatos(data_inicio, data_fim_exclusiva, equipamento_id, codigo, tipos, busca, condicao)
+
+        if posicoes is None:
+            return self.df.iloc[inicio:fim].copy()
+        return self.df.iloc[posicoes].copy()
+
+    # ------------------------------------------------------------------
+    # Paginação keyset
+    # ------------------------------------------------------------------
+
+    def _cursor(self, posicao: int) -> Cursor:
+        return self.df['data_movimentacao'].iat[posicao], int(self._ids[posicao])
+
+    def _posicao_cursor(self, cursor: Cursor) -> Tuple[int, int]:
+        """
+        Localiza o cursor no frame ordenado
+
+        Returns:
+            Tupla (primeira posição >= chave, primeira posição > chave)
+        """
+        data, id_cursor = cursor
+        if pd.isna(data):
+            base, datas_lo, datas_hi = 0, 0, self._sem_data
+        else:
+            valor = np.datetime64(pd.Timestamp(data), 'ns')
+            base = self._sem_data
+            datas_lo = int(np.searchsorted(self._datas, valor, side='left')) + base
+            datas_hi = int(np.searchsorted(self._datas, valor, side='right')) + base
+
+        # Dentro do mesmo dia/horário as linhas estão ordenadas por id
+        posicao = datas_lo + int(np.searchsorted(self._ids[datas_lo:datas_hi], id_cursor, side='left'))
+        exato = posicao < datas_hi and self._ids[posicao] == id_cursor
+        return posicao, posicao + 1 if exato else posicao
+
+    @staticmethod
+    def _contar_menores(candidatos: _Candidatos, posicao: int) -> int:
+        """Quantidade de candidatos com posição < posicao"""
+        inicio, fim, posicoes = candidatos
+        if posicoes is None:
+            return min(max(posicao, inicio), fim) - inicio
+        return int(np.searchsorted(posicoes, posicao, side='left'))
+
+    @staticmethod
+    def _total(candidatos: _Candidatos) -> int:
+        inicio, fim, posicoes = candidatos
+        return fim - inicio if posicoes is None else len(posicoes)
+
+    @staticmethod
+    def _antes_de(candidatos: _Candidatos, posicao: int, limite: int) -> np.ndarray:
+        """Até `limite` candidatos imediatamente anteriores a posicao (crescente)"""
+        inicio, fim, posicoes = candidatos
+        if posicoes is None:
+            hi = min(posicao, fim)
+            return np.arange(max(inicio, hi - limite), hi, dtype=np.int64) if hi > inicio else _VAZIO
+        k = int(np.searchsorted(posicoes, posicao, side='left'))
+        return posicoes[max(0, k - limite):k]
+
+    @staticmethod
+    def _a_partir_de(candidatos: _Candidatos, posicao: int, limite: int) -> np.ndarray:
+        """Até `limite` candidatos a partir de posicao, inclusive (crescente)"""
+        inicio, fim, posicoes = candidatos
+        if posicoes is None:
+            lo = max(posicao, inicio)
+            return np.arange(lo, min(fim, lo + limite), dtype=np.int64) if lo < fim else _VAZIO
+        k = int(np.searchsorted(posicoes, posicao, side='left'))
+        return posicoes[k:k + limite]
+
+    def paginar(self,
+                cursor: Optional[Cursor] = None,
+                direcao: str = 'proxima',
+                tamanho_pagina: int = 50,
+                ordem: str = 'desc',
+                **filtros: Any) -> PaginaMovimentacoes:
+        """
+        Retorna uma página de movimentações a partir de um cursor (data, id)
+
+        O custo por página é O(log n + tamanho_pagina) quando os filtros são
+        resolvidos pelos índices; independe da posição da página.
+
+        Args:
+            cursor: Chave do último item (próxima) ou do primeiro item (anterior)
+                da página atual; None para a primeira página
+            direcao: 'proxima' ou 'anterior'
+            tamanho_pagina: Número de itens por página
+            ordem: 'desc' (mais recentes primeiro) ou 'asc'
+            **filtros: Mesmos filtros aceitos por consultar
+
+        Returns:
+            PaginaMovimentacoes com os itens na ordem de exibição
+        """
+        candidatos = self._candidatos(**filtros)
+        total = self._total(candidatos)
+        tamanho_pagina = max(1, int(tamanho_pagina))
+
+        if cursor is None:
+            antes, depois = (len(self.df), len(self.df)) if ordem == 'desc' else (0, 0)
+        else:
+            antes, depois = self._posicao_cursor(cursor)
+
+        # Em ordem decrescente, avançar significa ir para posições menores
+        para_tras = (ordem == 'desc') == (direcao == 'proxima')
+        if para_tras:
+            selecionadas = self._antes_de(candidatos, antes, tamanho_pagina)
+        else:
+            selecionadas = self._a_partir_de(candidatos, depois, tamanho_pagina)
+
+        if len(selecionadas) == 0:
+            return PaginaMovimentacoes(self.df.iloc[0:0].copy(), total, 0, None, None, total > 0, False)
+
+        menores = self._contar_menores(candidatos, int(selecionadas[0]))
+        ate_ultima = self._contar_menores(candidatos, int(selecionadas[-1]) + 1)
+
+        if ordem == 'desc':
+            selecionadas = selecionadas[::-1]
+            inicio_pagina = total - ate_ultima + 1
+            tem_anterior, tem_proxima = ate_ultima < total, menores > 0
+        else:
+            inicio_pagina = menores + 1
+            tem_anterior, tem_proxima = menores > 0, ate_ultima < total
+
+        return PaginaMovimentacoes(
+            itens=self.df.iloc[selecionadas].copy(),
+            total=total,
+            inicio=inicio_pagina,
+            cursor_primeiro=self._cursor(int(selecionadas[0])),
+            cursor_ultimo=self._cursor(int(selecionadas[-1])),
+            tem_anterior=tem_anterior,
+            tem_proxima=tem_proxima
+        )
+
+    @staticmethod
+    def fim_exclusivo(data_fim: datetime) -> pd.Timestamp:
+        """Converte uma data final inclusiva (dia inteiro) em limite exclusivo"""
+        return pd.Timestamp(data_fim).normalize() + timedelta(days=1)
@@ -8,15 +8,108 @@ from datetime import datetime, timedelta
 from loguru import logger
 
 from models.schemas import Movimentacao, MovimentacaoResponse
+from services.rollup_service import RollupMovimentacoes
+from services.indice_service import IndiceMovimentacoes, PaginaMovimentacoes, Cursor
+from services.replay_service import ReplayEstoque
+from services.previsao_service import PrevisaoConsumo
+from config.settings import settings
+
+# Atributos do equipamento copiados para cada movimentação no momento do registro
+ATRIBUTOS_EQUIPAMENTO = ['equipamento', 'categoria', 'marca']
 
 class MovimentacaoService:
     """Serviço para gerenciar movimentações"""
     
     def __init__(self, df_movimentacoes: Optional[pd.DataFrame] = None):
-        self.df_movimentacoes = df_movimentacoes if df_movimentacoes is not None else pd.DataFrame()
+        self._df_movimentacoes = df_movimentacoes if df_movimentacoes is not None else pd.DataFrame()
+        # Versão do arquivo de dados que originou as movimentações em memória
+        self.versao_dados: Optional[str] = None
+        # Agregados derivados, construídos sob demanda e mantidos incrementalmente
+        self._rollup: Optional[RollupMovimentacoes] = None
+        self._indice: Optional[IndiceMovimentacoes] = None
+        self._replay: Optional[ReplayEstoque] = None
+        self._previsao: Optional[PrevisaoConsumo] = None
+    
+    @property
+    def df_movimentacoes(self) -> pd.DataFrame:
+        return self._df_movimentacoes
+    
+    @df_movimentacoes.setter
+    def df_movimentacoes(self, df: pd.DataFrame) -> None:
+        self._df_movimentacoes = df
+        self._invalidar_indices()
+    
+    def atualizar_dados(self, df_movimentacoes: pd.DataFrame, versao: Optional[str] = None) -> None:
+        """
+        Substitui as movimentações recarregadas do arquivo
+        
+        Se a versão do arquivo não mudou, os índices derivados continuam válidos
+        e não são reconstruídos.
+        
+        Args:
+            df_movimentacoes: Movimentações recarregadas
+            versao: Versão do arquivo de dados
+        """
+        mesma_versao = versao is not None and versao == self.versao_dados
+        self._df_movimentacoes = df_movimentacoes
+        self.versao_dados = versao
+        
+        if not mesma_versao:
+            self._invalidar_indices()
+    
+    def _invalidar_indices(self) -> None:
+        """Descarta estruturas derivadas (reconstruídas no próximo uso)"""
+        self._rollup = None
+        self._indice = None
+        self._replay = None
+        self._previsao = None
     
-    def registrar_movimentacao(self, movimentacao: Movimentacao) -> MovimentacaoResponse:
-        """Registra nova movimentação com validação aprimorada"""
+    @property
+    def rollup(self) -> RollupMovimentacoes:
+        """Agregados diários das movimentações"""
+        if self._rollup is None:
+            self._rollup = RollupMovimentacoes(self._df_movimentacoes)
+        return self._rollup
+    
+    @property
+    def indice(self) -> IndiceMovimentacoes:
+        """Movimentações ordenadas por data com índices por equipamento e código"""
+        if self._indice is None:
+            self._indice = IndiceMovimentacoes(self._df_movimentacoes)
+        return self._indice
+    
+    @property
+    def replay(self) -> ReplayEstoque:
+        """Log de eventos de estoque com checkpoints para consultas por data"""
+        if self._replay is None:
+            self._replay = ReplayEstoque(self.indice.df, settings.ESTOQUE_CHECKPOINT_EVENTOS)
+        return self._replay
+    
+    @property
+    def previsao(self) -> PrevisaoConsumo:
+        """Taxas de saída e projeções de cobertura sobre o rollup"""
+        if self._previsao is None or self._previsao.rollup is not self.rollup:
+            self._previsao = PrevisaoConsumo(
+                self.rollup,
+                janelas_dias=settings.PREVISAO_JANELAS_DIAS,
+                lead_time_dias=settings.PREVISAO_LEAD_TIME_DIAS,
+                fator_seguranca=settings.PREVISAO_FATOR_SEGURANCA
+            )
+        return self._previsao
+    
+    def registrar_movimentacao(self, movimentacao: Movimentacao,
+                               equipamento: Optional[Dict[str, Any]] = None) -> MovimentacaoResponse:
+        """
+        Registra nova movimentação com validação aprimorada
+        
+        Args:
+            movimentacao: Dados da movimentação
+            equipamento: Registro do equipamento movimentado; nome, categoria e
+                marca são gravados na movimentação (se ainda não preenchidos)
+            
+        Returns:
+            MovimentacaoResponse com o resultado
+        """
         try:
             # Validar tipo de movimentação
             if not movimentacao.tipo_movimentacao:
@@ -30,6 +123,13 @@ class MovimentacaoService:
             novo_id = int(self.df_movimentacoes['id'].max() + 1) if not self.df_movimentacoes.empty else 1
             movimentacao.id = novo_id
             
+            # Desnormalizar atributos do equipamento no momento da escrita
+            if equipamento is not None:
+                for atributo in ATRIBUTOS_EQUIPAMENTO:
+                    valor = equipamento.get(atributo)
+                    if getattr(movimentacao, atributo) is None and valor is not None and not pd.isna(valor):
+                        setattr(movimentacao, atributo, str(valor))
+            
             # Converter para dict e validar campos
             nova_movimentacao = movimentacao.dict()
             
@@ -44,11 +144,19 @@ class MovimentacaoService:
                     )
             
             # Adicionar ao DataFrame
-            self.df_movimentacoes = pd.concat([
-                self.df_movimentacoes, 
+            self._df_movimentacoes = pd.concat([
+                self._df_movimentacoes, 
                 pd.DataFrame([nova_movimentacao])
             ], ignore_index=True)
             
+            # Atualizar agregados incrementalmente
+            if self._rollup is not None:
+                self._rollup.adicionar(nova_movimentacao)
+            if self._replay is not None and not self._replay.adicionar(nova_movimentacao):
+                self._replay = None
+            if self._indice is not None and not self._indice.adicionar(nova_movimentacao):
+                self._indice = None
+            
             logger.info(f"✅ Movimentação registrada com sucesso: {movimentacao.tipo_movimentacao.value} - {movimentacao.quantidade} unidades - Código: {movimentacao.codigo_produto}")
             return MovimentacaoResponse(
                 success=True,
@@ -71,40 +179,108 @@ class MovimentacaoService:
                             tipo: Optional[str] = None,
                             data_inicio: Optional[datetime] = None,
                             data_fim: Optional[datetime] = None,
-                            equipamento_id: Optional[int] = None) -> pd.DataFrame:
-        """Filtra movimentações por critérios"""
-        df_filtrado = self.df_movimentacoes.copy()
+                            equipamento_id: Optional[int] = None,
+                            codigo: Optional[str] = None,
+                            condicao: Optional[str] = None,
+                            busca: Optional[str] = None) -> pd.DataFrame:
+        """
+        Filtra movimentações por critérios
+        
+        O período é resolvido por busca binária no índice ordenado por data;
+        equipamento, código, condição e texto usam os índices de posições.
         
-        if df_filtrado.empty:
-            return df_filtrado
+        Args:
+            tipo: Tipo de movimentação ("Todos" ou None para não filtrar)
+            data_inicio: Data inicial (inclusiva, por dia)
+            data_fim: Data final (inclusiva, por dia)
+            equipamento_id: ID do equipamento
+            codigo: Trecho do código do produto
+            condicao: Condição exata (Novo/Usado)
+            busca: Termos procurados no índice de texto
+            
+        Returns:
+            DataFrame filtrado, ordenado por data crescente
+        """
+        if self.df_movimentacoes.empty:
+            return self.df_movimentacoes.copy()
         
-        # Converter coluna de data se necessário
-        if 'data_movimentacao' in df_filtrado.columns:
-            df_filtrado['data_movimentacao'] = pd.to_datetime(df_filtrado['data_movimentacao'])
+        df_filtrado = self.indice.consultar(
+            data_inicio=pd.Timestamp(data_inicio).normalize() if data_inicio else None,
+            data_fim_exclusiva=IndiceMovimentacoes.fim_exclusivo(data_fim) if data_fim else None,
+            equipamento_id=equipamento_id or None,
+            codigo=codigo or None,
+            condicao=condicao or None,
+            busca=busca or None
+        )
         
-        # Filtro por tipo
+        # Filtro por tipo (sobre o recorte já reduzido)
         if tipo and tipo != "Todos":
             df_filtrado = df_filtrado[df_filtrado['tipo_movimentacao'] == tipo]
         
-        # Filtro por data
-        if data_inicio:
-            df_filtrado = df_filtrado[df_filtrado['data_movimentacao'].dt.date >= data_inicio.date()]
-        
-        if data_fim:
-            df_filtrado = df_filtrado[df_filtrado['data_movimentacao'].dt.date <= data_fim.date()]
+        return df_filtrado
+    
+    def paginar_movimentacoes(self,
+                              cursor: Optional[Cursor] = None,
+                              direcao: str = 'proxima',
+                              tamanho_pagina: int = 50,
+                              ordem: str = 'desc',
+                              tipos: Optional[List[str]] = None,
+                              data_inicio: Optional[datetime] = None,
+                              data_fim: Optional[datetime] = None,
+                              equipamento_id: Optional[int] = None,
+                              codigo: Optional[str] = None,
+                              busca: Optional[str] = None,
+                              condicao: Optional[str] = None) -> PaginaMovimentacoes:
+        """
+        Consulta paginada (keyset) do histórico de movimentações
         
-        # Filtro por equipamento
-        if equipamento_id:
-            df_filtrado = df_filtrado[df_filtrado['equipamento_id'] == equipamento_id]
+        O cursor é a chave (data, id) do último item da página atual para
+        avançar, ou do primeiro item para voltar. Cada página custa o mesmo,
+        independentemente de quantas já foram percorridas.
         
-        return df_filtrado
+        Args:
+            cursor: Chave (data, id) de referência; None para a primeira página
+            direcao: 'proxima' ou 'anterior'
+            tamanho_pagina: Itens por página
+            ordem: 'desc' (mais recentes primeiro) ou 'asc'
+            tipos: Valores de tipo de movimentação aceitos
+            data_inicio: Data inicial (inclusiva, por dia)
+            data_fim: Data final (inclusiva, por dia)
+            equipamento_id: ID do equipamento
+            codigo: Trecho do código do produto
+            busca: Termos procurados no índice de texto
+            condicao: Condição exata (Novo/Usado)
+            
+        Returns:
+            PaginaMovimentacoes com itens, total e cursores
+        """
+        return self.indice.paginar(
+            cursor=cursor,
+            direcao=direcao,
+            tamanho_pagina=tamanho_pagina,
+            ordem=ordem,
+            data_inicio=pd.Timestamp(data_inicio).normalize() if data_inicio else None,
+            data_fim_exclusiva=IndiceMovimentacoes.fim_exclusivo(data_fim) if data_fim else None,
+            equipamento_id=equipamento_id or None,
+            codigo=codigo or None,
+            tipos=tipos,
+            busca=busca or None,
+            condicao=condicao or None
+        )
     
     def obter_movimentacoes_por_equipamento(self, equipamento_id: int) -> pd.DataFrame:
         """Obtém movimentações de um equipamento específico"""
-        return self.df_movimentacoes[self.df_movimentacoes['equipamento_id'] == equipamento_id].copy()
+        if self.df_movimentacoes.empty:
+            return self.df_movimentacoes.copy()
+        return self.indice.consultar(equipamento_id=equipamento_id)
     
     def obter_estatisticas_movimentacoes(self, dias: int = 30) -> Dict[str, Any]:
-        """Obtém estatísticas das movimentações"""
+        """
+        Obtém estatísticas das movimentações dos últimos `dias` dias
+        
+        A janela tem granularidade de dia (agregados diários): começa à
+        meia-noite do dia de hoje - `dias`, com esse dia inteiro incluído.
+        """
         try:
             if self.df_movimentacoes.empty:
                 return {
@@ -115,23 +291,9 @@ class MovimentacaoService:
                     'quantidade_saida': 0
                 }
             
-            # Filtrar por período
-            data_limite = datetime.now() - timedelta(days=dias)
-            df_periodo = self.df_movimentacoes.copy()
-            df_periodo['data_movimentacao'] = pd.to_datetime(df_periodo['data_movimentacao'])
-            df_periodo = df_periodo[df_periodo['data_movimentacao'] >= data_limite]
-            
-            # Calcular estatísticas
-            entradas = df_periodo[df_periodo['tipo_movimentacao'] == 'Entrada']
-            saidas = df_periodo[df_periodo['tipo_movimentacao'] == 'Saída']
-            
-            return {
-                'total_entradas': len(entradas),
-                'total_saidas': len(saidas),
-                'total_movimentacoes': len(df_periodo),
-                'quantidade_entrada': int(entradas['quantidade'].sum()) if not entradas.empty else 0,
-                'quantidade_saida': int(saidas['quantidade'].sum()) if not saidas.empty else 0
-            }
+            # Filtrar por período sobre os agregados diários
+            data_limite = pd.Timestamp(datetime.now() - timedelta(days=dias)).normalize()
+            return self.rollup.estatisticas(data_inicio=data_limite)
         except Exception as e:
             logger.error(f"Erro ao obter estatísticas de movimentações: {str(e)}")
             return {
@@ -147,6 +309,5 @@ class MovimentacaoService:
         if self.df_movimentacoes.empty:
             return self.df_movimentacoes
         
-        df_ordenado = self.df_movimentacoes.copy()
-        df_ordenado['data_movimentacao'] = pd.to_datetime(df_ordenado['data_movimentacao'])
-        return df_ordenado.sort_values('data_movimentacao', ascending=False).head(limite) 
\ No newline at end of file
+        # Índice já ordenado por data: as mais recentes estão no final
+        return self.indice.df.tail(limite).iloc[::-1].copy() 
\ No newline at end of file
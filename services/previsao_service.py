@@ -0,0 +1,161 @@
+"""
+Previsão de consumo: taxa de saída, dias de cobertura e ponto de reposição
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime
+from loguru import logger
+
+from services.rollup_service import RollupMovimentacoes
+from services.indice_service import normalizar_texto
+
+CHAVES_PREVISAO = ['codigo_produto', 'condicao']
+
+class PrevisaoConsumo:
+    """
+    Motor vetorizado de previsão de consumo por código e condição
+
+    As saídas diárias vêm do nível detalhado do rollup de movimentações (que
+    já é mantido incrementalmente). Para cada janela móvel é calculada a taxa
+    média de saída por dia; a taxa usada na projeção é a maior entre as
+    janelas, para reagir a acelerações recentes sem esquecer o histórico.
+
+    - dias_cobertura = quantidade / taxa_diaria
+    - ponto_reposicao = taxa_diaria × lead time + z × desvio_diario × √lead time
+
+    As taxas são recalculadas apenas quando o rollup muda ou o dia vira; a
+    combinação com o estoque atual é uma junção vetorizada.
+    """
+
+    def __init__(self, rollup: RollupMovimentacoes,
+                 janelas_dias: Optional[List[int]] = None,
+                 lead_time_dias: int = 14,
+                 fator_seguranca: float = 1.65):
+        """
+        Args:
+            rollup: Agregados diários das movimentações
+            janelas_dias: Janelas móveis (em dias) das taxas de saída
+            lead_time_dias: Prazo de reposição em dias
+            fator_seguranca: Múltiplo do desvio padrão no estoque de segurança
+        """
+        self.rollup = rollup
+        self.janelas_dias = sorted({max(1, int(j)) for j in (janelas_dias or [30, 90])})
+        self.lead_time_dias = max(0, int(lead_time_dias))
+        self.fator_seguranca = float(fator_seguranca)
+        self._taxas: Optional[pd.DataFrame] = None
+        self._assinatura_taxas: Optional[Tuple[Any, ...]] = None
+
+    def taxas(self, hoje: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Taxas de saída por código e condição
+
+        Args:
+            hoje: Último dia incluído nas janelas (padrão: hoje)
+
+        Returns:
+            DataFrame com codigo_produto, condicao, saidas_<j>d e taxa_<j>d por
+            janela, taxa_diaria e desvio_diario
+        """
+        dia = pd.Timestamp(hoje or datetime.now()).normalize()
+        assinatura = (dia, self.rollup.total_buckets)
+        if self._taxas is not None and self._assinatura_taxas == assinatura:
+            return self._taxas
+
+        maior_janela = self.janelas_dias[-1]
+        buckets = self.rollup.obter_buckets(
+            data_inicio=dia - pd.Timedelta(days=maior_janela - 1),
+            data_fim_exclusiva=dia + pd.Timedelta(days=1),
+            detalhado=True
+        )
+        tipos_saida = [t for t in buckets['tipo_movimentacao'].unique() if 'saida' in normalizar_texto(t)]
+        saidas = buckets[buckets['tipo_movimentacao'].isin(tipos_saida)]
+
+        # Saída total por chave e dia (dias sem saída contam como zero)
+        diario = saidas.groupby(CHAVES_PREVISAO + ['dia'], observed=True)['quantidade'].sum().reset_index()
+        idade = (dia - diario['dia']).dt.days.to_numpy()
+        quantidade = diario['quantidade'].to_numpy(dtype=np.float64)
+
+        colunas: Dict[str, Any] = {}
+        for janela in self.janelas_dias:
+            colunas[f'saidas_{janela}d'] = np.where(idade < janela, quantidade, 0.0)
+        colunas['quadrado'] = quantidade ** 2
+
+        agregado = (
+            pd.concat([diario[CHAVES_PREVISAO], pd.DataFrame(colunas, index=diario.index)], axis=1)
+            .groupby(CHAVES_PREVISAO, observed=True).sum().reset_index()
+        )
+
+        taxas = [f'taxa_{janela}d' for janela in self.janelas_dias]
+        for janela, coluna in zip(self.janelas_dias, taxas):
+            agregado[coluna] = agregado[f'saidas_{janela}d'] / janela
+        agregado['taxa_diaria'] = agregado[taxas].max(axis=1) if taxas else 0.0
+
+        # Desvio padrão das saídas diárias na maior janela
+        media = agregado[f'saidas_{maior_janela}d'] / maior_janela
+        variancia = (agregado.pop('quadrado') / maior_janela - media ** 2).clip(lower=0)
+        agregado['desvio_diario'] = np.sqrt(variancia)
+
+        self._taxas = agregado
+        self._assinatura_taxas = assinatura
+        logger.debug(f"📉 Taxas de consumo calculadas: {len(agregado)} chaves com saída nos últimos {maior_janela} dias")
+        return agregado
+
+    def calcular(self, df_estoque: pd.DataFrame,
+                 hoje: Optional[datetime] = None,
+                 por_condicao: bool = True) -> pd.DataFrame:
+        """
+        Projeção de cobertura e ponto de reposição para o estoque atual
+
+        Args:
+            df_estoque: Estoque (codigo_produto, condicao, quantidade, equipamento)
+            hoje: Dia de referência (padrão: hoje)
+            por_condicao: Separar Novo/Usado; se False, agrega por código
+
+        Returns:
+            DataFrame com quantidade, taxa_diaria, desvio_diario, dias_cobertura,
+            data_ruptura, ponto_reposicao e abaixo_ponto_reposicao
+        """
+        chaves = CHAVES_PREVISAO if por_condicao else ['codigo_produto']
+        colunas_saida = chaves + ['equipamento', 'quantidade', 'taxa_diaria', 'desvio_diario',
+                                  'dias_cobertura', 'data_ruptura', 'ponto_reposicao', 'abaixo_ponto_reposicao']
+        if df_estoque.empty:
+            return pd.DataFrame(columns=colunas_saida)
+
+        dia = pd.Timestamp(hoje or datetime.now()).normalize()
+        base = df_estoque.assign(
+            condicao=df_estoque['condicao'].fillna('Novo').astype(str) if 'condicao' in df_estoque.columns else 'Novo',
+            quantidade=pd.to_numeric(df_estoque['quantidade'], errors='coerce').fillna(0)
+        )
+        estoque = base.groupby(chaves, as_index=False).agg(
+            equipamento=('equipamento', 'first'), quantidade=('quantidade', 'sum')
+        )
+
+        taxas = self.taxas(dia)[CHAVES_PREVISAO + ['taxa_diaria', 'desvio_diario']]
+        if not por_condicao:
+            # Condições independentes: taxas somam e variâncias somam
+            taxas = taxas.assign(variancia=taxas['desvio_diario'] ** 2).groupby('codigo_produto', as_index=False).agg(
+                taxa_diaria=('taxa_diaria', 'sum'), variancia=('variancia', 'sum')
+            )
+            taxas['desvio_diario'] = np.sqrt(taxas.pop('variancia'))
+
+        resultado = estoque.merge(taxas, on=chaves, how='left')
+        resultado[['taxa_diaria', 'desvio_diario']] = resultado[['taxa_diaria', 'desvio_diario']].fillna(0.0)
+
+        taxa = resultado['taxa_diaria'].to_numpy()
+        quantidade = resultado['quantidade'].to_numpy(dtype=np.float64)
+        com_consumo = taxa > 0
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dias = np.where(com_consumo, quantidade / np.where(com_consumo, taxa, 1.0), np.inf)
+        resultado['dias_cobertura'] = dias
+        resultado['data_ruptura'] = pd.NaT
+        finitos = np.isfinite(dias)
+        resultado.loc[finitos, 'data_ruptura'] = dia + pd.to_timedelta(np.floor(dias[finitos]), unit='D')
+
+        seguranca = self.fator_seguranca * resultado['desvio_diario'].to_numpy() * np.sqrt(self.lead_time_dias)
+        resultado['ponto_reposicao'] = np.ceil(taxa * self.lead_time_dias + seguranca).astype('int64')
+        resultado['abaixo_ponto_reposicao'] = com_consumo & (quantidade <= resultado['ponto_reposicao'].to_numpy())
+
+        return resultado[colunas_saida].sort_values('dias_cobertura', ignore_index=True)
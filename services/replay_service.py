@@ -0,0 +1,216 @@
+"""
+Reconstrução do estoque a partir do log de movimentações (event sourcing)
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Optional, Dict, Any, List
+from datetime import datetime
+from loguru import logger
+
+from services.indice_service import normalizar_texto
+
+class ReplayEstoque:
+    """
+    Saldo por (codigo_produto, condicao) em qualquer data
+
+    As movimentações, em ordem cronológica, viram eventos com quantidade
+    assinada (+entrada, -saída). A cada `intervalo_checkpoint` eventos é
+    guardado o saldo acumulado de todas as chaves; uma consulta custa um
+    checkpoint mais a soma vetorizada (bincount) dos eventos após ele.
+
+    Movimentações sem data válida são tratadas como anteriores a todas as
+    demais e entram em qualquer consulta.
+    """
+
+    def __init__(self, df_ordenado: pd.DataFrame, intervalo_checkpoint: int = 5000):
+        """
+        Args:
+            df_ordenado: Movimentações já ordenadas por data (ex.: IndiceMovimentacoes.df)
+            intervalo_checkpoint: Número de eventos entre checkpoints
+        """
+        self.intervalo_checkpoint = max(1, int(intervalo_checkpoint))
+        self._pendentes: List[Dict[str, Any]] = []
+
+        n = len(df_ordenado)
+        if n == 0 or 'data_movimentacao' not in df_ordenado.columns:
+            self._chaves_texto = pd.MultiIndex.from_arrays([[], []], names=['codigo_produto', 'condicao'])
+            self._datas = np.array([], dtype='datetime64[ns]')
+            self._chaves = np.array([], dtype=np.int64)
+            self._deltas = np.array([], dtype=np.int64)
+            self._construir_checkpoints()
+            return
+
+        codigo = self._coluna_texto(df_ordenado, 'codigo_produto', 'N/A')
+        condicao = self._coluna_texto(df_ordenado, 'condicao', 'Novo')
+        self._chaves, self._chaves_texto = pd.MultiIndex.from_arrays(
+            [codigo, condicao], names=['codigo_produto', 'condicao']
+        ).factorize()
+        self._chaves = self._chaves.astype(np.int64)
+        self._chaves_texto = self._chaves_texto.set_names(['codigo_produto', 'condicao'])
+
+        quantidade = pd.to_numeric(df_ordenado['quantidade'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        sinal = self._sinais(df_ordenado['tipo_movimentacao'] if 'tipo_movimentacao' in df_ordenado.columns else pd.Series('Entrada', index=df_ordenado.index))
+        self._deltas = quantidade * sinal
+
+        # NaT (ordenado no início) vira o menor instante representável
+        datas = pd.to_datetime(df_ordenado['data_movimentacao'], errors='coerce').to_numpy(dtype='datetime64[ns]')
+        self._datas = np.where(np.isnat(datas), np.datetime64(pd.Timestamp.min, 'ns'), datas)
+
+        self._construir_checkpoints()
+        logger.debug(f"⏪ Replay de estoque construído: {n} eventos, {len(self._chaves_texto)} chaves, {len(self._checkpoints)} checkpoints")
+
+    @staticmethod
+    def _coluna_texto(df: pd.DataFrame, coluna: str, padrao: str) -> np.ndarray:
+        if coluna not in df.columns:
+            return np.full(len(df), padrao, dtype=object)
+        return df[coluna].fillna(padrao).astype(str).to_numpy(dtype=object)
+
+    @staticmethod
+    def _sinais(tipos: pd.Series) -> np.ndarray:
+        """+1 para entradas, -1 para saídas (avaliado uma vez por valor distinto)"""
+        codigos, valores = pd.factorize(tipos.fillna('Entrada').astype(str))
+        sinais_valores = np.array(
+            [-1 if 'saida' in normalizar_texto(valor) else 1 for valor in valores],
+            dtype=np.int64
+        )
+        return sinais_valores[codigos] if len(valores) else np.ones(len(tipos), dtype=np.int64)
+
+    def _construir_checkpoints(self) -> None:
+        """Saldo acumulado de todas as chaves a cada intervalo_checkpoint eventos"""
+        total_chaves = len(self._chaves_texto)
+        blocos = len(self._deltas) // self.intervalo_checkpoint
+        fim = blocos * self.intervalo_checkpoint
+
+        # Linha i = saldo após os primeiros i * intervalo eventos (linha 0 = zeros)
+        self._checkpoints = np.zeros((blocos + 1, total_chaves), dtype=np.int64)
+        if blocos:
+            bloco = np.repeat(np.arange(blocos), self.intervalo_checkpoint)
+            por_bloco = np.zeros((blocos, total_chaves), dtype=np.int64)
+            np.add.at(por_bloco, (bloco, self._chaves[:fim]), self._deltas[:fim])
+            self._checkpoints[1:] = np.cumsum(por_bloco, axis=0)
+
+    def adicionar(self, movimentacao: Dict[str, Any]) -> bool:
+        """
+        Acrescenta uma movimentação nova ao log
+
+        Args:
+            movimentacao: Dicionário com os campos da movimentação
+
+        Returns:
+            False se a movimentação for anterior ao último evento (exige reconstrução)
+        """
+        data = pd.to_datetime(movimentacao.get('data_movimentacao'), errors='coerce')
+        if pd.isna(data):
+            return False
+        if len(self._datas) and np.datetime64(data, 'ns') < self._datas[-1]:
+            return False
+        if self._pendentes and data < self._pendentes[-1]['data']:
+            return False
+
+        tipo = movimentacao.get('tipo_movimentacao')
+        condicao = movimentacao.get('condicao')
+        self._pendentes.append({
+            'data': data,
+            'codigo_produto': str(movimentacao.get('codigo_produto') or 'N/A'),
+            'condicao': str(getattr(condicao, 'value', condicao) or 'Novo'),
+            'tipo': str(getattr(tipo, 'value', tipo) or 'Entrada'),
+            'quantidade': int(movimentacao.get('quantidade') or 0)
+        })
+        return True
+
+    def _consolidar(self) -> None:
+        """Incorpora os eventos pendentes (novas chaves ganham coluna zerada nos checkpoints)"""
+        if not self._pendentes:
+            return
+
+        novos = pd.DataFrame(self._pendentes)
+        self._pendentes = []
+
+        chaves_novas = pd.MultiIndex.from_arrays([novos['codigo_produto'], novos['condicao']], names=['codigo_produto', 'condicao'])
+        faltantes = chaves_novas.difference(self._chaves_texto)
+        if len(faltantes):
+            self._chaves_texto = self._chaves_texto.append(faltantes)
+            self._checkpoints = np.hstack([self._checkpoints, np.zeros((len(self._checkpoints), len(faltantes)), dtype=np.int64)])
+
+        self._chaves = np.concatenate([self._chaves, self._chaves_texto.get_indexer(chaves_novas).astype(np.int64)])
+        self._deltas = np.concatenate([self._deltas, novos['quantidade'].to_numpy(dtype=np.int64) * self._sinais(novos['tipo'])])
+        self._datas = np.concatenate([self._datas, novos['data'].to_numpy(dtype='datetime64[ns]')])
+
+        # Fechar checkpoints que passaram a ficar completos
+        blocos = len(self._deltas) // self.intervalo_checkpoint
+        while len(self._checkpoints) <= blocos:
+            i = len(self._checkpoints) - 1
+            inicio, fim = i * self.intervalo_checkpoint, (i + 1) * self.intervalo_checkpoint
+            self._checkpoints = np.vstack([self._checkpoints, self._checkpoints[i] + self._somar(inicio, fim)])
+
+    def _somar(self, inicio: int, fim: int) -> np.ndarray:
+        """Soma vetorizada dos eventos [inicio, fim) por chave"""
+        return np.bincount(
+            self._chaves[inicio:fim], weights=self._deltas[inicio:fim], minlength=len(self._chaves_texto)
+        ).astype(np.int64)
+
+    def _saldos_ate(self, eventos: int) -> np.ndarray:
+        """Saldo de todas as chaves após os primeiros `eventos` eventos"""
+        checkpoint = min(eventos // self.intervalo_checkpoint, len(self._checkpoints) - 1)
+        return self._checkpoints[checkpoint] + self._somar(checkpoint * self.intervalo_checkpoint, eventos)
+
+    @property
+    def total_eventos(self) -> int:
+        self._consolidar()
+        return len(self._deltas)
+
+    def estoque_em(self, data: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Saldo por código e condição ao final de um dia
+
+        Args:
+            data: Dia de referência (inclusive); None para o saldo atual
+
+        Returns:
+            DataFrame com codigo_produto, condicao e quantidade (chaves com saldo zero incluídas)
+        """
+        self._consolidar()
+
+        if data is None:
+            eventos = len(self._deltas)
+        else:
+            limite = pd.Timestamp(data).normalize() + pd.Timedelta(days=1)
+            eventos = int(np.searchsorted(self._datas, np.datetime64(limite, 'ns'), side='left'))
+
+        saldos = self._saldos_ate(eventos)
+        resultado = self._chaves_texto.to_frame(index=False)
+        resultado['quantidade'] = saldos
+        return resultado
+
+    def reconciliar(self, df_estoque: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compara o saldo reconstruído com as quantidades gravadas no estoque
+
+        Args:
+            df_estoque: Estoque atual (codigo_produto, condicao, quantidade)
+
+        Returns:
+            DataFrame com quantidade_replay, quantidade_registrada, divergencia
+            e a coluna booleana divergente, ordenado por divergência absoluta
+        """
+        replay = self.estoque_em().rename(columns={'quantidade': 'quantidade_replay'})
+
+        if df_estoque.empty:
+            registrado = pd.DataFrame(columns=['codigo_produto', 'condicao', 'quantidade_registrada'])
+        else:
+            base = pd.DataFrame({
+                'codigo_produto': self._coluna_texto(df_estoque, 'codigo_produto', 'N/A'),
+                'condicao': self._coluna_texto(df_estoque, 'condicao', 'Novo'),
+                'quantidade_registrada': pd.to_numeric(df_estoque['quantidade'], errors='coerce').fillna(0).astype('int64').to_numpy()
+            })
+            registrado = base.groupby(['codigo_produto', 'condicao'], as_index=False)['quantidade_registrada'].sum()
+
+        comparacao = replay.merge(registrado, on=['codigo_produto', 'condicao'], how='outer')
+        comparacao[['quantidade_replay', 'quantidade_registrada']] = (
+            comparacao[['quantidade_replay', 'quantidade_registrada']].fillna(0).astype('int64')
+        )
+        comparacao['divergencia'] = comparacao['quantidade_registrada'] - comparacao['quantidade_replay']
+        comparacao['divergente'] = comparacao['divergencia'] != 0
+
+        return comparacao.sort_values('divergencia', key=np.abs, ascending=False, ignore_index=True)
@@ -0,0 +1,195 @@
+"""
+Agregados temporais (rollups) de movimentações para estatísticas e timelines
+"""
+
+import pandas as pd
+from typing import Optional, Dict, Any, List
+from datetime import datetime
+from loguru import logger
+
+class RollupMovimentacoes:
+    """
+    Agregados diários de movimentações
+
+    Mantém dois níveis:
+    - detalhe: (dia, tipo, código do produto, condição)
+    - diário: (dia, tipo), no máximo dois buckets por dia, usado quando não há
+      filtro por código
+
+    Cada bucket guarda o número de movimentações e a quantidade movimentada.
+    Agregados mensais são derivados dos diários. Novas movimentações entram
+    numa lista pendente e são incorporadas na próxima consulta, reagregadas
+    com os buckets existentes: há um bucket por chave e os níveis ficam
+    ordenados por dia, o que permite recortar o período por busca binária.
+    """
+
+    CHAVES = ['dia', 'tipo_movimentacao', 'codigo_produto', 'condicao']
+    CHAVES_DIARIO = ['dia', 'tipo_movimentacao']
+    METRICAS = ['movimentacoes', 'quantidade']
+
+    def __init__(self, df_movimentacoes: Optional[pd.DataFrame] = None):
+        self._detalhe = self._vazio(self.CHAVES)
+        self._diario = self._vazio(self.CHAVES_DIARIO)
+        self._pendentes: List[Dict[str, Any]] = []
+
+        if df_movimentacoes is not None:
+            self.reconstruir(df_movimentacoes)
+
+    @classmethod
+    def _vazio(cls, chaves: List[str]) -> pd.DataFrame:
+        df = pd.DataFrame(columns=chaves + cls.METRICAS)
+        df['dia'] = pd.to_datetime(df['dia'])
+        return df.astype({'movimentacoes': 'int64', 'quantidade': 'int64'})
+
+    def reconstruir(self, df_movimentacoes: pd.DataFrame) -> None:
+        """Reconstrói todos os buckets a partir do histórico completo (vetorizado)"""
+        self._detalhe = self._vazio(self.CHAVES)
+        self._diario = self._vazio(self.CHAVES_DIARIO)
+        self._pendentes = []
+
+        if df_movimentacoes.empty or 'data_movimentacao' not in df_movimentacoes.columns:
+            return
+
+        base = pd.DataFrame({
+            'dia': pd.to_datetime(df_movimentacoes['data_movimentacao'], errors='coerce').dt.normalize(),
+            'tipo_movimentacao': self._coluna_texto(df_movimentacoes, 'tipo_movimentacao', 'Entrada'),
+            'codigo_produto': self._coluna_texto(df_movimentacoes, 'codigo_produto', 'N/A'),
+            'condicao': self._coluna_texto(df_movimentacoes, 'condicao', 'N/A'),
+            'quantidade': pd.to_numeric(df_movimentacoes['quantidade'], errors='coerce').fillna(0).astype('int64')
+        }).dropna(subset=['dia'])
+
+        self._detalhe = (
+            base.groupby(self.CHAVES, observed=True)['quantidade']
+            .agg(movimentacoes='size', quantidade='sum')
+            .reset_index()
+        )
+        self._diario = self._agrupar(self._detalhe, self.CHAVES_DIARIO)
+
+        logger.debug(f"📦 Rollup reconstruído: {len(base)} movimentações → {len(self._detalhe)} buckets ({len(self._diario)} diários)")
+
+    @staticmethod
+    def _coluna_texto(df: pd.DataFrame, coluna: str, padrao: str) -> pd.Series:
+        if coluna not in df.columns:
+            return pd.Series(padrao, index=df.index)
+        return df[coluna].fillna(padrao).astype(str)
+
+    @classmethod
+    def _agrupar(cls, df: pd.DataFrame, chaves: List[str]) -> pd.DataFrame:
+        """Soma as métricas por chave (resultado ordenado pelas chaves, 'dia' primeiro)"""
+        return df.groupby(chaves, observed=True)[cls.METRICAS].sum().reset_index()
+
+    def adicionar(self, movimentacao: Dict[str, Any]) -> None:
+        """
+        Registra incrementalmente uma nova movimentação
+
+        Args:
+            movimentacao: Dicionário com os campos da movimentação
+        """
+        dia = pd.to_datetime(movimentacao.get('data_movimentacao'), errors='coerce')
+        if pd.isna(dia):
+            return
+
+        tipo = movimentacao.get('tipo_movimentacao')
+        condicao = movimentacao.get('condicao')
+        self._pendentes.append({
+            'dia': dia.normalize(),
+            'tipo_movimentacao': str(getattr(tipo, 'value', tipo) or 'Entrada'),
+            'codigo_produto': str(movimentacao.get('codigo_produto') or 'N/A'),
+            'condicao': str(getattr(condicao, 'value', condicao) or 'N/A'),
+            'movimentacoes': 1,
+            'quantidade': int(movimentacao.get('quantidade') or 0)
+        })
+
+    def _consolidar(self) -> None:
+        """Incorpora as movimentações pendentes, reagregando com os buckets existentes"""
+        if not self._pendentes:
+            return
+
+        novos = pd.DataFrame(self._pendentes)
+        self._pendentes = []
+        self._detalhe = self._agrupar(
+            pd.concat([self._detalhe, novos[self.CHAVES + self.METRICAS]], ignore_index=True),
+            self.CHAVES
+        )
+        self._diario = self._agrupar(
+            pd.concat([self._diario, novos[self.CHAVES_DIARIO + self.METRICAS]], ignore_index=True),
+            self.CHAVES_DIARIO
+        )
+
+    @property
+    def total_buckets(self) -> int:
+        self._consolidar()
+        return len(self._detalhe)
+
+    def obter_buckets(self,
+                      data_inicio: Optional[datetime] = None,
+                      data_fim_exclusiva: Optional[datetime] = None,
+                      tipo: Optional[str] = None,
+                      codigo: Optional[str] = None,
+                      condicao: Optional[str] = None,
+                      detalhado: bool = False) -> pd.DataFrame:
+        """
+        Retorna buckets diários filtrados
+
+        A granularidade é o dia: um início com horário inclui o dia inteiro.
+
+        Args:
+            data_inicio: Inclui buckets a partir do dia de data_inicio (inclusive)
+            data_fim_exclusiva: Inclui buckets com dia < data_fim_exclusiva
+            tipo: Tipo de movimentação exato
+            codigo: Trecho do código do produto (sem diferenciar maiúsculas)
+            condicao: Condição exata (Novo/Usado)
+            detalhado: Retorna o nível por código/condição mesmo sem filtro de código
+
+        Returns:
+            DataFrame com as colunas de chave do nível escolhido, movimentacoes e quantidade
+        """
+        self._consolidar()
+        df = self._detalhe if (codigo or condicao or detalhado) else self._diario
+
+        # Buckets ordenados por dia: o período vira uma fatia contínua
+        inicio, fim = 0, len(df)
+        if data_inicio is not None:
+            inicio = df['dia'].searchsorted(pd.Timestamp(data_inicio).normalize(), side='left')
+        if data_fim_exclusiva is not None:
+            fim = df['dia'].searchsorted(pd.to_datetime(data_fim_exclusiva), side='left')
+        df = df.iloc[inicio:max(inicio, fim)]
+
+        mask = pd.Series(True, index=df.index)
+        if tipo:
+            mask &= df['tipo_movimentacao'] == tipo
+        if codigo:
+            mask &= df['codigo_produto'].str.upper().str.contains(codigo.upper(), na=False, regex=False)
+        if condicao:
+            mask &= df['condicao'] == condicao
+
+        return df[mask].copy()
+
+    def estatisticas(self, data_inicio: Optional[datetime] = None) -> Dict[str, int]:
+        """Totais de entradas e saídas a partir do dia de data_inicio (dia inteiro)"""
+        df = self.obter_buckets(data_inicio=data_inicio)
+        por_tipo = df.groupby('tipo_movimentacao')[self.METRICAS].sum()
+
+        def total(tipo: str, coluna: str) -> int:
+            return int(por_tipo[coluna].get(tipo, 0))
+
+        return {
+            'total_entradas': total('Entrada', 'movimentacoes'),
+            'total_saidas': total('Saída', 'movimentacoes'),
+            'total_movimentacoes': int(df['movimentacoes'].sum()),
+            'quantidade_entrada': total('Entrada', 'quantidade'),
+            'quantidade_saida': total('Saída', 'quantidade')
+        }
+
+    @staticmethod
+    def serie_diaria(df_buckets: pd.DataFrame, coluna: str = 'movimentacoes') -> pd.Series:
+        """Série diária (soma da coluna por dia) a partir de buckets já filtrados"""
+        return df_buckets.groupby('dia')[coluna].sum().sort_index()
+
+    @staticmethod
+    def serie_mensal(df_buckets: pd.DataFrame, coluna: str = 'movimentacoes') -> pd.DataFrame:
+        """Tabela mês × tipo de movimentação derivada dos buckets diários"""
+        if df_buckets.empty:
+            return pd.DataFrame()
+        periodo = df_buckets['dia'].dt.strftime('%Y-%m')
+        return df_buckets.groupby([periodo.rename('periodo'), 'tipo_movimentacao'])[coluna].sum().unstack(fill_value=0)
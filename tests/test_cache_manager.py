@@ -0,0 +1,184 @@
+"""
+Testes do CacheManager: cálculo único por chave (single-flight) e chaves estáveis
+"""
+
+import threading
+import time
+
+import pytest
+import pandas as pd
+
+from utils.cache_manager import CacheManager
+
+
+@pytest.fixture
+def cache():
+    """Cache só em memória, sem varredura em background"""
+    return CacheManager(default_ttl=60)
+
+
+def _em_paralelo(total, alvo):
+    """Dispara `total` threads que começam juntas e devolve (resultados, erros)"""
+    barreira = threading.Barrier(total)
+    resultados, erros = [], []
+    lock = threading.Lock()
+
+    def executar():
+        barreira.wait()
+        try:
+            valor = alvo()
+            with lock:
+                resultados.append(valor)
+        except BaseException as e:
+            with lock:
+                erros.append(e)
+
+    threads = [threading.Thread(target=executar) for _ in range(total)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    return resultados, erros
+
+
+def test_chave_fria_calcula_uma_unica_vez_com_50_threads(cache):
+    chamadas = []
+    lock = threading.Lock()
+
+    def compute():
+        with lock:
+            chamadas.append(1)
+        time.sleep(0.2)  # Mantém o cálculo em andamento enquanto as demais chegam
+        return {"valor": 42}
+
+    resultados, erros = _em_paralelo(50, lambda: cache.get_or_compute("fria", compute))
+
+    assert erros == []
+    assert len(chamadas) == 1
+    assert len(resultados) == 50
+    assert all(resultado == {"valor": 42} for resultado in resultados)
+    assert cache.get_stats()["inflight"] == 0
+
+
+def test_excecao_do_calculo_chega_a_todos_que_aguardam(cache):
+    chamadas = []
+
+    def compute():
+        chamadas.append(1)
+        time.sleep(0.2)
+        raise ValueError("falha no cálculo")
+
+    resultados, erros = _em_paralelo(10, lambda: cache.get_or_compute("erro", compute))
+
+    assert resultados == []
+    assert len(chamadas) == 1
+    assert len(erros) == 10
+    assert all(isinstance(erro, ValueError) for erro in erros)
+    # Nada foi gravado e a próxima chamada calcula de novo
+    assert cache.get("erro") is None
+    assert cache.get_or_compute("erro", lambda: "ok") == "ok"
+
+
+def test_quem_aguarda_recebe_timeout_se_o_calculo_demorar(cache):
+    liberar = threading.Event()
+    iniciou = threading.Event()
+
+    def compute_lento():
+        iniciou.set()
+        liberar.wait(5)
+        return "lento"
+
+    lider = threading.Thread(target=lambda: cache.get_or_compute("lenta", compute_lento))
+    lider.start()
+    assert iniciou.wait(5)
+
+    with pytest.raises(TimeoutError):
+        cache.get_or_compute("lenta", lambda: "outro", wait_timeout=0.1)
+
+    liberar.set()
+    lider.join(5)
+    # O cálculo do líder continua válido após o timeout de quem aguardava
+    assert cache.get("lenta") == "lento"
+
+
+class _ServicoSemChave:
+    pass
+
+
+class _ServicoComChave:
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+
+    def __cache_key__(self):
+        return self.arquivo
+
+
+def test_chave_de_objeto_usa_cache_key_e_nao_o_endereco(cache):
+    chave = cache._generate_key("svc", _ServicoComChave("estoque.xlsx"), 1)
+
+    assert chave == cache._generate_key("svc", _ServicoComChave("estoque.xlsx"), 1)
+    assert chave != cache._generate_key("svc", _ServicoComChave("outro.xlsx"), 1)
+
+
+def test_objeto_com_repr_padrao_e_rejeitado(cache):
+    with pytest.raises(TypeError):
+        cache._generate_key("svc", _ServicoSemChave())
+
+
+def test_chave_de_dataframe_muda_com_o_conteudo(cache):
+    df = pd.DataFrame({"quantidade": range(1000)})
+    alterado = df.copy()
+    alterado.loc[500, "quantidade"] = -1
+
+    assert cache._generate_key("df", df) == cache._generate_key("df", df.copy())
+    assert cache._generate_key("df", df) != cache._generate_key("df", alterado)
+
+
+def test_nova_versao_dos_dados_invalida_a_memoria(cache):
+    cache.set_data_version("v1")
+    cache.set("total", 10)
+    cache.set_data_version("v1")
+    assert cache.get("total") == 10
+
+    cache.set_data_version("v2")
+
+    assert cache.get("total") is None
+    assert cache.get_or_compute("total", lambda: 11) == 11
+
+
+def test_calculo_que_atravessa_mudanca_de_versao_nao_e_gravado(cache):
+    cache.set_data_version("v1")
+
+    def compute():
+        cache.set_data_version("v2")
+        return "dados da v1"
+
+    assert cache.get_or_compute("total", compute) == "dados da v1"
+    assert cache.get("total") is None
+
+
+def test_valor_obsoleto_e_recalculado_mesmo_com_copia_em_disco(tmp_path):
+    from utils.disk_cache import DiskCache
+
+    cache = CacheManager(default_ttl=60, disk_cache=DiskCache(str(tmp_path)))
+    chamadas = []
+
+    def compute():
+        chamadas.append(1)
+        return len(chamadas)
+
+    assert cache.get_or_compute("swr", compute, ttl=1, stale_ttl=30) == 1
+    time.sleep(1.1)
+
+    # Obsoleto: devolve o valor antigo e recalcula em background (sem reaproveitar a cópia do disco)
+    assert cache.get_or_compute("swr", compute, ttl=1, stale_ttl=30) == 1
+    for _ in range(50):
+        if cache.get_stats()["inflight"] == 0 and len(chamadas) == 2:
+            break
+        time.sleep(0.05)
+
+    assert len(chamadas) == 2
+    assert cache.get_or_compute("swr", compute, ttl=1, stale_ttl=30) == 2
+    stats = cache.get_stats()
+    assert stats["refresh_count"] == 1
+    assert stats["l2_hit_count"] == 0
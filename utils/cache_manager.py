@@ -4,35 +4,175 @@ Gerenciamento eficiente de cache com TTL e invalidação automática
 """
 
 import time
+import heapq
+import pickle
 import hashlib
-from typing import Any, Dict, Optional, Callable, Union
-from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, List, Optional, Callable, Tuple, Union
+from datetime import date, datetime
 from functools import wraps
+import numpy as np
+import pandas as pd
 from loguru import logger
 import streamlit as st
 import threading
 from collections import defaultdict
 
+from config.settings import settings
+from utils.disk_cache import DiskCache
+
+class _InFlightCall:
+    """Cálculo em andamento compartilhado entre threads (single-flight)"""
+    
+    __slots__ = ('event', 'result', 'error')
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+def _hash_value(hasher: "hashlib._Hash", value: Any) -> None:
+    """
+    Alimenta o hasher com uma representação estrutural e tipada do valor
+    
+    DataFrames e Series usam `attrs['cache_version']` quando disponível (impressão
+    digital da versão) e, caso contrário, `pd.util.hash_pandas_object`. Outros
+    objetos entram pelo nome qualificado da classe mais o retorno de
+    `__cache_key__()`, ou pelo repr quando a classe define um próprio.
+    
+    Args:
+        hasher: Objeto hash incremental
+        value: Valor a ser hasheado
+        
+    Raises:
+        TypeError: Se o objeto só tiver o repr padrão (com endereço de memória)
+    """
+    update = hasher.update
+    
+    if value is None or isinstance(value, (bool, int, float, complex)):
+        update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, str):
+        encoded = value.encode('utf-8', 'surrogatepass')
+        update(f"str:{len(encoded)}:".encode())
+        update(encoded)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        update(f"bytes:{len(data)}:".encode())
+        update(data)
+    elif isinstance(value, Enum):
+        update(f"enum:{type(value).__qualname__}:".encode())
+        _hash_value(hasher, value.value)
+    elif isinstance(value, (list, tuple)):
+        update(f"{type(value).__name__}:{len(value)}[".encode())
+        for item in value:
+            _hash_value(hasher, item)
+        update(b"]")
+    elif isinstance(value, dict):
+        update(f"dict:{len(value)}{{".encode())
+        for item_key, item_value in sorted(value.items(), key=lambda item: repr(item[0])):
+            _hash_value(hasher, item_key)
+            _hash_value(hasher, item_value)
+        update(b"}")
+    elif isinstance(value, (set, frozenset)):
+        update(f"set:{len(value)}{{".encode())
+        for item in sorted(value, key=repr):
+            _hash_value(hasher, item)
+        update(b"}")
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        kind = "df" if isinstance(value, pd.DataFrame) else "series"
+        update(f"{kind}:{value.shape}:".encode())
+        
+        version = value.attrs.get('cache_version')
+        if version is not None:
+            update(b"version:")
+            _hash_value(hasher, version)
+            return
+        
+        if isinstance(value, pd.DataFrame):
+            update(repr(list(value.columns)).encode())
+            update(repr(list(value.dtypes.astype(str))).encode())
+        else:
+            update(f"{value.name!r}:{value.dtype}".encode())
+        
+        try:
+            update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        except TypeError:
+            # Células não hasheáveis (listas, dicts): recorrer ao pickle do conteúdo
+            update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    elif isinstance(value, np.ndarray):
+        update(f"ndarray:{value.shape}:{value.dtype}:".encode())
+        if value.dtype.hasobject:
+            update(pd.util.hash_pandas_object(pd.Series(value.ravel()), index=False).to_numpy().tobytes())
+        else:
+            update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (datetime, date, pd.Timestamp)):
+        update(f"datetime:{value.isoformat()};".encode())
+    elif callable(getattr(value, '__cache_key__', None)):
+        # Objetos com identidade explícita (ex: instâncias de serviço em métodos decorados)
+        update(f"obj:{type(value).__module__}.{type(value).__qualname__}:".encode())
+        _hash_value(hasher, value.__cache_key__())
+    elif type(value).__repr__ is not object.__repr__:
+        # repr próprio (dataclasses, modelos pydantic): estável entre processos
+        update(f"{type(value).__module__}.{type(value).__qualname__}:{value!r};".encode())
+    else:
+        # O repr padrão inclui o endereço de memória e mudaria a chave a cada processo
+        raise TypeError(
+            f"Argumento sem chave de cache estável: {type(value).__qualname__} "
+            f"(defina __cache_key__() ou um __repr__ determinístico)"
+        )
+
 class CacheManager:
     """
     Gerenciador de cache inteligente com TTL, invalidação automática e estatísticas
+    
+    A expiração usa relógio monotônico e um min-heap de (expira_em, chave),
+    com remoção preguiçosa: entradas do heap cuja expiração não bate mais com
+    a entrada atual do cache são descartadas ao serem retiradas.
     """
     
-    def __init__(self, default_ttl: int = 300):  # 5 minutos padrão
+    # Máximo de entradas removidas por fatia de varredura (limita o tempo com lock)
+    SWEEP_BATCH_SIZE = 256
+    
+    def __init__(self, default_ttl: int = 300, sweep_interval: Optional[float] = None,
+                 disk_cache: Optional[DiskCache] = None):  # 5 minutos padrão
         self.default_ttl = default_ttl
         self._cache: Dict[str, Dict[str, Any]] = {}
-        self._timestamps: Dict[str, datetime] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
         self._access_count: Dict[str, int] = defaultdict(int)
         self._hit_count = 0
         self._miss_count = 0
+        self._expired_count = 0
+        self._coalesced_count = 0
+        self._stale_hit_count = 0
+        self._refresh_count = 0
+        self._refresh_error_count = 0
         self._lock = threading.Lock()
         
+        # Cálculos em andamento por chave (single-flight)
+        self._inflight: Dict[str, _InFlightCall] = {}
+        
+        # Segundo nível persistente em disco (opcional), versionado pelos dados
+        self._l2 = disk_cache
+        self._data_version: Optional[str] = None
+        self._l2_hit_count = 0
+        
+        # Varredura em background (opcional)
+        self._sweep_interval = sweep_interval
+        self._sweeper_thread: Optional[threading.Thread] = None
+        self._sweeper_stop = threading.Event()
+        
         logger.info(f"🗄️ CacheManager inicializado com TTL padrão: {default_ttl}s")
+        
+        if sweep_interval:
+            self.start_sweeper(sweep_interval)
     
     def _generate_key(self, prefix: str, *args, **kwargs) -> str:
         """
         Gera chave única para cache baseada nos parâmetros
         
+        Os parâmetros são hasheados estruturalmente (BLAKE2b de 128 bits), e
+        DataFrames/Series/arrays pelo conteúdo, sem formatar o repr do objeto.
+        
         Args:
             prefix: Prefixo da chave
             args: Argumentos posicionais
@@ -40,11 +180,14 @@ class CacheManager:
             
         Returns:
             Chave única para cache
+            
+        Raises:
+            TypeError: Se algum argumento não tiver representação estável
         """
-        # Criar string única baseada nos parâmetros
-        params_str = f"{args}_{sorted(kwargs.items())}"
-        hash_obj = hashlib.md5(params_str.encode())
-        return f"{prefix}_{hash_obj.hexdigest()[:8]}"
+        hasher = hashlib.blake2b(digest_size=16)
+        _hash_value(hasher, args)
+        _hash_value(hasher, kwargs)
+        return f"{prefix}_{hasher.hexdigest()}"
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -57,23 +200,32 @@ class CacheManager:
             Valor do cache ou None se expirado/inexistente
         """
         with self._lock:
-            if key not in self._cache:
-                self._miss_count += 1
-                return None
+            entry = self._cache.get(key)
             
-            # Verificar se expirou
-            if self._is_expired(key):
+            if entry is not None:
+                # Verificar se expirou
+                if not self._is_expired(key, time.monotonic()):
+                    # Cache hit
+                    self._hit_count += 1
+                    self._access_count[key] += 1
+                    return entry['value']
+                
                 self._remove(key)
+                self._expired_count += 1
+        
+        # Fora do lock: tentar o nível em disco
+        value = self._load_from_l2(key)
+        
+        with self._lock:
+            if value is None:
                 self._miss_count += 1
-                return None
-            
-            # Cache hit
-            self._hit_count += 1
-            self._access_count[key] += 1
-            
-            return self._cache[key]['value']
+            else:
+                self._hit_count += 1
+                self._access_count[key] += 1
+        
+        return value
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, stale_ttl: Optional[int] = None) -> None:
         """
         Armazena valor no cache
         
@@ -81,18 +233,131 @@ class CacheManager:
             key: Chave do cache
             value: Valor a ser armazenado
             ttl: Tempo de vida em segundos (usa padrão se None)
+            stale_ttl: Segundos adicionais em que o valor pode ser servido
+                obsoleto enquanto é recalculado em background
+        """
+        ttl = ttl or self.default_ttl
+        hard_ttl = ttl + (stale_ttl or 0)
+        
+        with self._lock:
+            self._store_locked(key, value, ttl, ttl, hard_ttl)
+            version = self._data_version or ""
+        
+        logger.debug(f"💾 Cache SET: {key} (TTL: {ttl}s)")
+        
+        # Write-through para o disco (fora do lock)
+        if self._l2 is not None:
+            now = time.time()
+            self._l2.set(key, value, version, now + ttl, now + hard_ttl)
+    
+    def _store_locked(self, key: str, value: Any, ttl: float, fresh_for: float, expires_for: float) -> None:
+        """Grava entrada na memória (requer lock)"""
+        now = time.monotonic()
+        expires_at = now + expires_for
+        
+        self._cache[key] = {
+            'value': value,
+            'ttl': ttl,
+            'fresh_until': now + fresh_for,
+            'expires_at': expires_at,
+            'size': self._estimate_size(value)
+        }
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+        self._compact_heap_if_needed()
+    
+    def _load_from_l2(self, key: str, require_fresh: bool = False) -> Optional[Any]:
+        """
+        Busca chave no cache em disco e promove para a memória
+        
+        Args:
+            key: Chave do cache
+            require_fresh: Aceita só entradas ainda frescas (recálculo de valor obsoleto)
+            
+        Returns:
+            Valor encontrado ou None
+        """
+        if self._l2 is None:
+            return None
+        
+        with self._lock:
+            version = self._data_version or ""
+        
+        found = self._l2.get(key, version, require_fresh)
+        if found is None:
+            return None
+        
+        value, fresh_until, expires_at = found
+        now = time.time()
+        
+        with self._lock:
+            entry = self._cache.get(key)
+            ttl = entry['ttl'] if entry is not None else self.default_ttl
+            self._store_locked(key, value, ttl, max(0.0, fresh_until - now), expires_at - now)
+            self._l2_hit_count += 1
+        
+        logger.debug(f"💽 Cache L2 HIT: {key}")
+        return value
+    
+    def set_data_version(self, version: str) -> None:
+        """
+        Define a versão atual dos dados usada nas chaves do cache em disco
+        
+        Quando a versão muda, a memória (L1) é esvaziada, pois seus valores
+        foram calculados com os dados anteriores. Na primeira chamada do
+        processo, pré-carrega na memória as chaves mais quentes persistidas
+        para esta versão. Entradas de versões antigas são descartadas do disco.
+        
+        Args:
+            version: Identificador da versão dos dados (ex: mtime + tamanho do Excel)
         """
         with self._lock:
-            ttl = ttl or self.default_ttl
+            previous = self._data_version
+            if previous == version:
+                return
+            self._data_version = version
             
-            self._cache[key] = {
-                'value': value,
-                'ttl': ttl,
-                'size': self._estimate_size(value)
-            }
-            self._timestamps[key] = datetime.now()
+            invalidated = len(self._cache)
+            self._cache.clear()
+            self._expiry_heap.clear()
+            self._access_count.clear()
+        
+        if invalidated:
+            logger.info(f"🧹 Versão dos dados alterada: {invalidated} entradas do cache em memória invalidadas")
+        
+        if self._l2 is None:
+            return
+        
+        discarded = self._l2.discard_versions_except(version)
+        if discarded:
+            logger.debug(f"💽 Cache L2: {discarded} entradas de versões antigas descartadas")
+        
+        if previous is None:
+            self.warm_from_disk(settings.CACHE_DISK_WARM_KEYS)
+    
+    def warm_from_disk(self, limit: int) -> int:
+        """
+        Pré-carrega na memória as chaves acessadas mais recentemente no disco
+        
+        Args:
+            limit: Número máximo de chaves
             
-            logger.debug(f"💾 Cache SET: {key} (TTL: {ttl}s)")
+        Returns:
+            Número de entradas carregadas
+        """
+        if self._l2 is None:
+            return 0
+        
+        with self._lock:
+            version = self._data_version or ""
+        
+        loaded = 0
+        for key in self._l2.hot_keys(version, limit):
+            if self._load_from_l2(key) is not None:
+                loaded += 1
+        
+        if loaded:
+            logger.info(f"🔥 Cache aquecido a partir do disco: {loaded} entradas")
+        return loaded
     
     def invalidate(self, key: str) -> bool:
         """
@@ -105,11 +370,16 @@ class CacheManager:
             True se invalidada com sucesso
         """
         with self._lock:
-            if key in self._cache:
+            version = self._data_version or ""
+            removed = key in self._cache
+            if removed:
                 self._remove(key)
                 logger.debug(f"🗑️ Cache INVALIDATED: {key}")
-                return True
-            return False
+        
+        if self._l2 is not None:
+            self._l2.delete(key, version)
+        
+        return removed
     
     def invalidate_pattern(self, pattern: str) -> int:
         """
@@ -121,64 +391,162 @@ class CacheManager:
         Returns:
             Número de entradas invalidadas
         """
+        fragment = pattern.replace('*', '')
+        
         with self._lock:
             keys_to_remove = []
             
             for key in self._cache.keys():
-                if pattern.replace('*', '') in key:
+                if fragment in key:
                     keys_to_remove.append(key)
             
             for key in keys_to_remove:
                 self._remove(key)
-            
-            logger.info(f"🧹 Cache pattern invalidation: {pattern} ({len(keys_to_remove)} entradas)")
-            return len(keys_to_remove)
+        
+        # Remoção dos arquivos fora do lock (um os.remove por entrada em disco)
+        if self._l2 is not None:
+            self._l2.delete_matching(fragment)
+        
+        logger.info(f"🧹 Cache pattern invalidation: {pattern} ({len(keys_to_remove)} entradas)")
+        return len(keys_to_remove)
     
     def clear(self) -> None:
         """Limpa todo o cache"""
         with self._lock:
             count = len(self._cache)
             self._cache.clear()
-            self._timestamps.clear()
+            self._expiry_heap.clear()
             self._access_count.clear()
-            
-            logger.info(f"🧹 Cache completamente limpo ({count} entradas removidas)")
+        
+        # Remoção dos arquivos fora do lock (um os.remove por entrada em disco)
+        if self._l2 is not None:
+            self._l2.clear()
+        
+        logger.info(f"🧹 Cache completamente limpo ({count} entradas removidas)")
     
-    def cleanup_expired(self) -> int:
+    def cleanup_expired(self, max_entries: Optional[int] = None) -> int:
         """
         Remove entradas expiradas do cache
         
+        A varredura é feita em fatias de até SWEEP_BATCH_SIZE entradas, liberando
+        o lock entre as fatias para não bloquear sessões concorrentes.
+        
+        Args:
+            max_entries: Limite de entradas removidas nesta chamada (None = todas)
+            
         Returns:
             Número de entradas removidas
         """
-        with self._lock:
-            expired_keys = []
+        total_removed = 0
+        
+        while max_entries is None or total_removed < max_entries:
+            batch = self.SWEEP_BATCH_SIZE
+            if max_entries is not None:
+                batch = min(batch, max_entries - total_removed)
             
-            for key in list(self._cache.keys()):
-                if self._is_expired(key):
-                    expired_keys.append(key)
+            with self._lock:
+                removed = self._sweep_expired_locked(time.monotonic(), batch)
             
-            for key in expired_keys:
-                self._remove(key)
+            total_removed += removed
+            if removed < batch:
+                break
             
-            if expired_keys:
-                logger.debug(f"🧹 Cache cleanup: {len(expired_keys)} entradas expiradas removidas")
+            # Ceder o processador para outras threads entre as fatias
+            time.sleep(0)
+        
+        if total_removed:
+            logger.debug(f"🧹 Cache cleanup: {total_removed} entradas expiradas removidas")
+        
+        return total_removed
+    
+    def _sweep_expired_locked(self, now: float, limit: int) -> int:
+        """
+        Remove até `limit` entradas expiradas a partir do topo do heap (requer lock)
+        
+        Args:
+            now: Instante atual do relógio monotônico
+            limit: Máximo de entradas a remover
             
-            return len(expired_keys)
+        Returns:
+            Número de entradas removidas
+        """
+        removed = 0
+        heap = self._expiry_heap
+        
+        while heap and removed < limit and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._cache.get(key)
+            
+            # Entrada obsoleta do heap (chave removida ou regravada com novo TTL)
+            if entry is None or entry['expires_at'] != expires_at:
+                continue
+            
+            self._remove(key)
+            self._expired_count += 1
+            removed += 1
+        
+        return removed
+    
+    def _compact_heap_if_needed(self) -> None:
+        """Reconstrói o heap quando acumula muitas entradas obsoletas (requer lock)"""
+        if len(self._expiry_heap) > 2 * len(self._cache) + 64:
+            self._expiry_heap = [(entry['expires_at'], key) for key, entry in self._cache.items()]
+            heapq.heapify(self._expiry_heap)
+    
+    def start_sweeper(self, interval: float = 30.0) -> None:
+        """
+        Inicia thread daemon que remove entradas expiradas periodicamente
+        
+        Args:
+            interval: Intervalo entre varreduras em segundos
+        """
+        if self._sweeper_thread is not None and self._sweeper_thread.is_alive():
+            return
+        
+        self._sweep_interval = interval
+        self._sweeper_stop.clear()
+        self._sweeper_thread = threading.Thread(
+            target=self._sweeper_loop,
+            name="CacheManagerSweeper",
+            daemon=True
+        )
+        self._sweeper_thread.start()
+        
+        logger.info(f"🧹 Varredura automática do cache iniciada (intervalo: {interval}s)")
+    
+    def stop_sweeper(self, timeout: Optional[float] = None) -> None:
+        """
+        Interrompe a thread de varredura automática
+        
+        Args:
+            timeout: Tempo máximo de espera pelo término da thread
+        """
+        self._sweeper_stop.set()
+        if self._sweeper_thread is not None:
+            self._sweeper_thread.join(timeout)
+            self._sweeper_thread = None
     
-    def _is_expired(self, key: str) -> bool:
+    def _sweeper_loop(self) -> None:
+        """Loop da thread de varredura"""
+        while not self._sweeper_stop.wait(self._sweep_interval):
+            try:
+                self.cleanup_expired()
+            except Exception as e:
+                logger.error(f"Erro na varredura automática do cache: {str(e)}")
+    
+    def _is_expired(self, key: str, now: Optional[float] = None) -> bool:
         """Verifica se entrada do cache expirou"""
-        if key not in self._timestamps:
+        entry = self._cache.get(key)
+        if entry is None:
             return True
         
-        ttl = self._cache[key]['ttl']
-        age = (datetime.now() - self._timestamps[key]).total_seconds()
-        return age > ttl
+        if now is None:
+            now = time.monotonic()
+        return entry['expires_at'] <= now
     
     def _remove(self, key: str) -> None:
-        """Remove entrada do cache"""
+        """Remove entrada do cache (a entrada no heap é descartada preguiçosamente)"""
         self._cache.pop(key, None)
-        self._timestamps.pop(key, None)
         self._access_count.pop(key, None)
     
     def _estimate_size(self, value: Any) -> int:
@@ -197,8 +565,10 @@ class CacheManager:
             Dicionário com estatísticas
         """
         with self._lock:
-            total_requests = self._hit_count + self._miss_count
-            hit_rate = (self._hit_count / total_requests * 100) if total_requests > 0 else 0
+            # Hits obsoletos (stale-while-revalidate) também evitam o recálculo bloqueante
+            served_from_cache = self._hit_count + self._stale_hit_count
+            total_requests = served_from_cache + self._miss_count
+            hit_rate = (served_from_cache / total_requests * 100) if total_requests > 0 else 0
             
             total_size = sum(entry['size'] for entry in self._cache.values())
             
@@ -207,17 +577,144 @@ class CacheManager:
                 'hit_count': self._hit_count,
                 'miss_count': self._miss_count,
                 'hit_rate': round(hit_rate, 2),
+                'expired_count': self._expired_count,
+                'heap_size': len(self._expiry_heap),
+                'coalesced_count': self._coalesced_count,
+                'stale_hit_count': self._stale_hit_count,
+                'refresh_count': self._refresh_count,
+                'refresh_error_count': self._refresh_error_count,
+                'l2_hit_count': self._l2_hit_count,
+                'l2': self._l2.get_stats() if self._l2 is not None else None,
+                'inflight': len(self._inflight),
                 'total_size_bytes': total_size,
                 'most_accessed': dict(sorted(self._access_count.items(), key=lambda x: x[1], reverse=True)[:5])
             }
     
-    def cache_function(self, ttl: Optional[int] = None, key_prefix: str = "func"):
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[int] = None,
+                       wait_timeout: Optional[float] = 30.0, stale_ttl: Optional[int] = None) -> Any:
+        """
+        Obtém valor do cache ou calcula com semântica single-flight
+        
+        Apenas um chamador executa `compute` para uma mesma chave; os demais
+        aguardam o resultado (ou a exceção) do cálculo em andamento.
+        
+        Com `stale_ttl`, após o TTL (soft) o valor obsoleto é devolvido na hora e
+        um recálculo é disparado em background; somente após ttl + stale_ttl
+        (hard) a chamada bloqueia aguardando o novo valor.
+        
+        Args:
+            key: Chave do cache
+            compute: Função sem argumentos que calcula o valor
+            ttl: Tempo de vida em segundos (usa padrão se None)
+            wait_timeout: Tempo máximo de espera por um cálculo em andamento (None = sem limite)
+            stale_ttl: Janela em segundos para servir valor obsoleto (None = desativado)
+            
+        Returns:
+            Valor do cache ou recém-calculado
+            
+        Raises:
+            TimeoutError: Se o cálculo em andamento não terminar dentro de wait_timeout
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry = self._cache.get(key)
+            
+            if entry is not None and not self._is_expired(key, now):
+                self._access_count[key] += 1
+                
+                if now < entry['fresh_until']:
+                    self._hit_count += 1
+                    return entry['value']
+                
+                # Stale-while-revalidate: serve o valor obsoleto e recalcula em background
+                self._stale_hit_count += 1
+                if key not in self._inflight:
+                    call = _InFlightCall()
+                    self._inflight[key] = call
+                    self._refresh_count += 1
+                    threading.Thread(
+                        target=self._refresh_in_background,
+                        args=(key, call, compute, ttl, stale_ttl),
+                        name=f"CacheRefresh-{key}",
+                        daemon=True
+                    ).start()
+                return entry['value']
+            
+            self._miss_count += 1
+            call = self._inflight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall()
+                self._inflight[key] = call
+            else:
+                self._coalesced_count += 1
+        
+        if not is_leader:
+            logger.debug(f"⏳ Cache WAIT: {key} - aguardando cálculo em andamento")
+            if not call.event.wait(wait_timeout):
+                raise TimeoutError(f"Tempo esgotado aguardando cálculo do cache: {key}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        return self._run_inflight(key, call, compute, ttl, stale_ttl)
+    
+    def _run_inflight(self, key: str, call: _InFlightCall, compute: Callable[[], Any],
+                      ttl: Optional[int], stale_ttl: Optional[int], refresh: bool = False) -> Any:
+        """
+        Executa o cálculo registrado em `call`, grava o resultado e libera os que aguardam
+        
+        No recálculo de um valor obsoleto (`refresh`), o disco só é aproveitado se
+        tiver uma versão ainda fresca (ex: gravada por outro processo); a cópia
+        obsoleta escrita por este mesmo valor não conta.
+        """
+        try:
+            with self._lock:
+                version = self._data_version
+            
+            result = self._load_from_l2(key, require_fresh=refresh)
+            if result is None:
+                result = compute()
+                with self._lock:
+                    outdated = self._data_version != version
+                # Calculado com dados que mudaram durante o cálculo: não grava
+                if not outdated:
+                    self.set(key, result, ttl, stale_ttl)
+            call.result = result
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+    
+    def _refresh_in_background(self, key: str, call: _InFlightCall, compute: Callable[[], Any],
+                               ttl: Optional[int], stale_ttl: Optional[int]) -> None:
+        """Recalcula entrada obsoleta fora da thread do script (mantém o valor antigo em caso de erro)"""
+        try:
+            self._run_inflight(key, call, compute, ttl, stale_ttl, refresh=True)
+            logger.debug(f"🔄 Cache REFRESH: {key}")
+        except Exception as e:
+            with self._lock:
+                self._refresh_error_count += 1
+            logger.error(f"Erro ao recalcular cache em background ({key}): {str(e)}")
+    
+    def cache_function(self, ttl: Optional[int] = None, key_prefix: str = "func",
+                       wait_timeout: Optional[float] = 30.0, stale_ttl: Optional[int] = None):
         """
         Decorator para cache de funções
         
+        Chamadas concorrentes que erram o cache para a mesma chave são coalescidas:
+        a função executa uma única vez e os demais chamadores recebem o mesmo resultado.
+        
         Args:
             ttl: Tempo de vida do cache
             key_prefix: Prefixo para chave do cache
+            wait_timeout: Tempo máximo de espera por um cálculo em andamento
+            stale_ttl: Janela após o TTL em que o valor obsoleto é servido enquanto
+                é recalculado em background (None = sempre bloqueia após o TTL)
             
         Returns:
             Decorator function
@@ -228,18 +725,11 @@ class CacheManager:
                 # Gerar chave única
                 cache_key = self._generate_key(f"{key_prefix}_{func.__name__}", *args, **kwargs)
                 
-                # Tentar obter do cache
-                cached_result = self.get(cache_key)
-                if cached_result is not None:
-                    logger.debug(f"🎯 Cache HIT: {func.__name__}")
-                    return cached_result
+                def compute():
+                    logger.debug(f"💾 Cache MISS: {func.__name__} - Executando função")
+                    return func(*args, **kwargs)
                 
-                # Executar função e armazenar resultado
-                logger.debug(f"💾 Cache MISS: {func.__name__} - Executando função")
-                result = func(*args, **kwargs)
-                self.set(cache_key, result, ttl)
-                
-                return result
+                return self.get_or_compute(cache_key, compute, ttl, wait_timeout, stale_ttl)
             
             # Adicionar métodos de controle do cache à função
             wrapper.invalidate_cache = lambda *args, **kwargs: self.invalidate(
@@ -256,8 +746,9 @@ class StreamlitCacheManager(CacheManager):
     Integra com session_state e fornece widgets de controle
     """
     
-    def __init__(self, default_ttl: int = 300):
-        super().__init__(default_ttl)
+    def __init__(self, default_ttl: int = 300, sweep_interval: Optional[float] = None,
+                 disk_cache: Optional[DiskCache] = None):
+        super().__init__(default_ttl, sweep_interval, disk_cache)
         
         # Integração com session_state
         if 'cache_manager_stats' not in st.session_state:
@@ -309,6 +800,15 @@ class StreamlitCacheManager(CacheManager):
             st.metric("✅ Hits", stats['hit_count'])
             st.metric("❌ Misses", stats['miss_count'])
         
+        # Stale-while-revalidate
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.metric("🕰️ Stale Hits", stats['stale_hit_count'])
+        
+        with col2:
+            st.metric("🔄 Refreshes", stats['refresh_count'])
+        
         # Tamanho do cache
         size_mb = stats['total_size_bytes'] / (1024 * 1024)
         st.metric("💾 Tamanho", f"{size_mb:.2f} MB")
@@ -346,18 +846,29 @@ class StreamlitCacheManager(CacheManager):
         
         return data
 
-# Instâncias globais
-cache_manager = StreamlitCacheManager()
+def _create_disk_cache() -> Optional[DiskCache]:
+    """Cria o nível em disco conforme as configurações (None se desativado ou indisponível)"""
+    if not settings.CACHE_DISK_ENABLED:
+        return None
+    
+    try:
+        return DiskCache(settings.CACHE_DISK_DIR, settings.CACHE_DISK_MAX_MB * 1024 * 1024)
+    except Exception as e:
+        logger.warning(f"Cache em disco indisponível: {str(e)}")
+        return None
+
+# Instâncias globais (módulo importado uma vez por processo)
+cache_manager = StreamlitCacheManager(sweep_interval=30.0, disk_cache=_create_disk_cache())
 
 # Decorators prontos para uso
-def cache_equipment_data(ttl: int = 300):
-    """Decorator para cache de dados de equipamentos"""
-    return cache_manager.cache_function(ttl=ttl, key_prefix="equipment")
+def cache_equipment_data(ttl: int = 300, stale_ttl: Optional[int] = 900):
+    """Decorator para cache de dados de equipamentos (serve valor obsoleto durante o recálculo)"""
+    return cache_manager.cache_function(ttl=ttl, key_prefix="equipment", stale_ttl=stale_ttl)
 
 def cache_movement_data(ttl: int = 180):
     """Decorator para cache de dados de movimentações"""
     return cache_manager.cache_function(ttl=ttl, key_prefix="movement")
 
-def cache_dashboard_data(ttl: int = 120):
-    """Decorator para cache de dados do dashboard"""
-    return cache_manager.cache_function(ttl=ttl, key_prefix="dashboard")
+def cache_dashboard_data(ttl: int = 120, stale_ttl: Optional[int] = 600):
+    """Decorator para cache de dados do dashboard (serve valor obsoleto durante o recálculo)"""
+    return cache_manager.cache_function(ttl=ttl, key_prefix="dashboard", stale_ttl=stale_ttl)
@@ -0,0 +1,298 @@
+"""
+Cache persistente em disco (L2) para o CacheManager
+Sobrevive a reinícios do servidor Streamlit, com escrita atômica e limite de tamanho
+"""
+
+import io
+import os
+import json
+import time
+import struct
+import pickle
+import hashlib
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+# Cabeçalho de cada arquivo: tamanho (uint32) + JSON de metadados, seguido do payload
+_HEADER_LEN = struct.Struct(">I")
+_FILE_SUFFIX = ".cache"
+
+@dataclass
+class DiskEntry:
+    """Metadados de uma entrada persistida"""
+    key: str
+    version: str
+    fresh_until: float  # relógio de parede (time.time)
+    expires_at: float   # relógio de parede (time.time)
+    size: int
+    last_access: float
+
+class DiskCache:
+    """
+    Segundo nível de cache em disco
+
+    Cada entrada é um arquivo cujo nome é o hash SHA-256 de (versão dos dados, chave).
+    DataFrames são serializados em Parquet (Arrow) e demais objetos com pickle.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: Dict[str, DiskEntry] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+        logger.info(f"💽 DiskCache inicializado em {directory} ({len(self._index)} entradas, {self._total_bytes / (1024 * 1024):.1f} MB)")
+
+    @staticmethod
+    def _file_name(key: str, version: str) -> str:
+        """Gera nome do arquivo a partir da chave e da versão dos dados"""
+        digest = hashlib.sha256(f"{version}\0{key}".encode('utf-8')).hexdigest()
+        return f"{digest}{_FILE_SUFFIX}"
+
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.directory, file_name)
+
+    def _load_index(self) -> None:
+        """Lê apenas os cabeçalhos dos arquivos existentes para montar o índice"""
+        now = time.time()
+
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(_FILE_SUFFIX):
+                continue
+
+            path = self._path(file_name)
+            try:
+                with open(path, 'rb') as f:
+                    meta = self._read_header(f)
+                stat = os.stat(path)
+            except Exception as e:
+                logger.warning(f"Arquivo de cache inválido removido: {file_name} ({str(e)})")
+                self._unlink(path)
+                continue
+
+            if meta['expires_at'] <= now:
+                self._unlink(path)
+                continue
+
+            self._index[file_name] = DiskEntry(
+                key=meta['key'],
+                version=meta['version'],
+                fresh_until=meta['fresh_until'],
+                expires_at=meta['expires_at'],
+                size=stat.st_size,
+                last_access=stat.st_mtime
+            )
+            self._total_bytes += stat.st_size
+
+    @staticmethod
+    def _read_header(f) -> Dict[str, Any]:
+        (header_len,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+        return json.loads(f.read(header_len).decode('utf-8'))
+
+    @staticmethod
+    def _serialize(value: Any) -> Tuple[str, bytes]:
+        """Serializa valor escolhendo o formato mais eficiente"""
+        if isinstance(value, pd.DataFrame):
+            try:
+                buffer = io.BytesIO()
+                value.to_parquet(buffer)
+                return 'parquet', buffer.getvalue()
+            except Exception:
+                # Colunas com tipos mistos não suportados pelo Arrow
+                pass
+        return 'pickle', pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _deserialize(fmt: str, payload: bytes) -> Any:
+        if fmt == 'parquet':
+            return pd.read_parquet(io.BytesIO(payload))
+        return pickle.loads(payload)
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, key: str, version: str, require_fresh: bool = False) -> Optional[Tuple[Any, float, float]]:
+        """
+        Lê entrada do disco
+
+        Args:
+            key: Chave do cache
+            version: Versão atual dos dados
+            require_fresh: Ignora entradas já obsoletas (sem ler o arquivo)
+
+        Returns:
+            Tupla (valor, fresh_until, expires_at) em relógio de parede, ou None
+        """
+        file_name = self._file_name(key, version)
+
+        with self._lock:
+            entry = self._index.get(file_name)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                self._drop_locked(file_name)
+                return None
+            if require_fresh and entry.fresh_until <= time.time():
+                return None
+
+        path = self._path(file_name)
+        try:
+            with open(path, 'rb') as f:
+                meta = self._read_header(f)
+                value = self._deserialize(meta['format'], f.read())
+            # mtime registra o último acesso (usado na evicção e no warm-load)
+            os.utime(path)
+        except Exception as e:
+            logger.warning(f"Erro ao ler cache em disco ({key}): {str(e)}")
+            with self._lock:
+                self._drop_locked(file_name)
+            return None
+
+        with self._lock:
+            if file_name in self._index:
+                self._index[file_name].last_access = time.time()
+
+        return value, entry.fresh_until, entry.expires_at
+
+    def set(self, key: str, value: Any, version: str, fresh_until: float, expires_at: float) -> bool:
+        """
+        Grava entrada no disco de forma atômica (arquivo temporário + rename)
+
+        Args:
+            key: Chave do cache
+            value: Valor a persistir
+            version: Versão atual dos dados
+            fresh_until: Fim do período fresco (relógio de parede)
+            expires_at: Expiração definitiva (relógio de parede)
+
+        Returns:
+            True se gravado
+        """
+        try:
+            fmt, payload = self._serialize(value)
+        except Exception as e:
+            logger.debug(f"Valor não serializável para cache em disco ({key}): {str(e)}")
+            return False
+
+        header = json.dumps({
+            'key': key,
+            'version': version,
+            'format': fmt,
+            'fresh_until': fresh_until,
+            'expires_at': expires_at
+        }).encode('utf-8')
+
+        file_name = self._file_name(key, version)
+        path = self._path(file_name)
+
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(_HEADER_LEN.pack(len(header)))
+                    f.write(header)
+                    f.write(payload)
+                os.replace(tmp_path, path)
+            except BaseException:
+                self._unlink(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache em disco ({key}): {str(e)}")
+            return False
+
+        size = _HEADER_LEN.size + len(header) + len(payload)
+        with self._lock:
+            old = self._index.get(file_name)
+            if old is not None:
+                self._total_bytes -= old.size
+            self._index[file_name] = DiskEntry(key, version, fresh_until, expires_at, size, time.time())
+            self._total_bytes += size
+            self._evict_locked()
+
+        return True
+
+    def _evict_locked(self) -> None:
+        """Remove entradas menos usadas até ficar abaixo de 90% do limite (requer lock)"""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        for file_name, _ in sorted(self._index.items(), key=lambda item: item[1].last_access):
+            if self._total_bytes <= target:
+                break
+            self._drop_locked(file_name)
+
+    def _drop_locked(self, file_name: str) -> None:
+        entry = self._index.pop(file_name, None)
+        if entry is not None:
+            self._total_bytes -= entry.size
+            self._unlink(self._path(file_name))
+
+    def delete(self, key: str, version: str) -> None:
+        """Remove entrada específica"""
+        with self._lock:
+            self._drop_locked(self._file_name(key, version))
+
+    def delete_matching(self, fragment: str) -> int:
+        """Remove entradas cuja chave contém o fragmento"""
+        with self._lock:
+            to_remove = [name for name, entry in self._index.items() if fragment in entry.key]
+            for file_name in to_remove:
+                self._drop_locked(file_name)
+            return len(to_remove)
+
+    def discard_versions_except(self, version: str) -> int:
+        """Remove entradas de versões de dados antigas"""
+        with self._lock:
+            to_remove = [name for name, entry in self._index.items() if entry.version != version]
+            for file_name in to_remove:
+                self._drop_locked(file_name)
+            return len(to_remove)
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        with self._lock:
+            for file_name in list(self._index):
+                self._drop_locked(file_name)
+
+    def hot_keys(self, version: str, limit: int) -> List[str]:
+        """
+        Retorna as chaves acessadas mais recentemente na versão informada
+
+        Args:
+            version: Versão dos dados
+            limit: Número máximo de chaves
+
+        Returns:
+            Lista de chaves
+        """
+        now = time.time()
+        with self._lock:
+            entries = [
+                entry for entry in self._index.values()
+                if entry.version == version and entry.expires_at > now
+            ]
+        entries.sort(key=lambda entry: entry.last_access, reverse=True)
+        return [entry.key for entry in entries[:limit]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do cache em disco"""
+        with self._lock:
+            return {
+                'entries': len(self._index),
+                'total_size_bytes': self._total_bytes,
+                'max_size_bytes': self.max_bytes
+            }
@@ -0,0 +1,110 @@
+"""
+Fragmentos do Streamlit (reruns parciais) com medição de tempo por painel
+"""
+
+import time
+import threading
+from functools import wraps
+from typing import Callable, Dict, Any, List
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from loguru import logger
+
+from config.settings import settings
+
+_estatisticas: Dict[str, Dict[str, float]] = {}
+_estatisticas_lock = threading.Lock()
+
+def _execucao_parcial() -> bool:
+    """True quando o script roda só para fragmentos (interação dentro de um painel)"""
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+def _registrar(nome: str, ms: float, parcial: bool) -> None:
+    tipo = 'parciais' if parcial else 'completas'
+    with _estatisticas_lock:
+        stats = _estatisticas.setdefault(nome, {
+            'completas': 0, 'parciais': 0,
+            'ms_completas': 0.0, 'ms_parciais': 0.0,
+            'ultimo_ms': 0.0, 'max_ms': 0.0
+        })
+        stats[tipo] += 1
+        stats[f'ms_{tipo}'] += ms
+        stats['ultimo_ms'] = ms
+        stats['max_ms'] = max(stats['max_ms'], ms)
+    logger.debug(f"⏱️ Fragmento {nome}: {ms:.1f} ms ({'parcial' if parcial else 'completa'})")
+
+def fragmento_medido(nome: str) -> Callable:
+    """
+    Decorador: transforma a função em st.fragment e mede cada execução
+
+    Widgets dentro do fragmento reexecutam só a função decorada, não o
+    app.main inteiro. Cada execução é contabilizada como 'completa' (parte de
+    um rerun do app) ou 'parcial' (rerun só do fragmento). Em fragmentos
+    aninhados o tempo do externo inclui o do interno.
+
+    O fragmento não escreve em st.sidebar (não suportado no Streamlit 1.42,
+    versão mínima do requirements). st.rerun() continua reexecutando o app
+    inteiro, o que é o desejado após gravar dados; para reexecutar só o
+    painel use rerun_painel().
+
+    Args:
+        nome: Nome do painel nas estatísticas
+
+    Returns:
+        Decorador
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def medido(*args, **kwargs):
+            parcial = _execucao_parcial()
+            inicio = time.perf_counter()
+            try:
+                resultado = func(*args, **kwargs)
+            finally:
+                # Inclui execuções interrompidas por st.rerun()/st.stop()
+                ms = (time.perf_counter() - inicio) * 1000
+                _registrar(nome, ms, parcial)
+
+            if settings.FRAGMENT_TIMING_VISIVEL:
+                st.caption(f"⏱️ {nome}: {ms:.0f} ms ({'rerun parcial' if parcial else 'rerun completo'})")
+            return resultado
+
+        return st.fragment(medido)
+    return decorator
+
+def rerun_painel() -> None:
+    """
+    Reexecuta só o fragmento atual; fora de um rerun parcial, o app inteiro
+
+    st.rerun(scope="fragment") só é aceito durante um rerun parcial. O mesmo
+    código do painel também roda dentro de reruns completos, e aí o rerun
+    precisa ser do app.
+    """
+    if _execucao_parcial():
+        st.rerun(scope="fragment")
+    st.rerun()
+
+def get_fragment_stats() -> List[Dict[str, Any]]:
+    """
+    Custo de execução por fragmento (todas as sessões do processo)
+
+    Returns:
+        Uma linha por fragmento com contagens e tempos médios (ms) de
+        execuções completas e parciais, último e máximo
+    """
+    with _estatisticas_lock:
+        copia = {nome: dict(stats) for nome, stats in _estatisticas.items()}
+
+    linhas = []
+    for nome, stats in sorted(copia.items()):
+        linhas.append({
+            'fragmento': nome,
+            'completas': int(stats['completas']),
+            'media_completa_ms': stats['ms_completas'] / stats['completas'] if stats['completas'] else None,
+            'parciais': int(stats['parciais']),
+            'media_parcial_ms': stats['ms_parciais'] / stats['parciais'] if stats['parciais'] else None,
+            'ultimo_ms': stats['ultimo_ms'],
+            'max_ms': stats['max_ms']
+        })
+    return linhas
@@ -0,0 +1,150 @@
+"""
+Configuração única do logging e registro de auditoria em JSON Lines
+"""
+
+import os
+import json
+import atexit
+import threading
+from queue import SimpleQueue, Empty
+from datetime import datetime
+from typing import Any, Optional
+from loguru import logger
+
+from config.settings import settings
+
+_lock = threading.Lock()
+_configurado = False
+
+def configurar_logging() -> bool:
+    """
+    Adiciona o sink de arquivo uma única vez por processo
+
+    O Streamlit reexecuta o script principal a cada rerun; como este módulo
+    fica em sys.modules, a flag sobrevive aos reruns e chamadas repetidas não
+    adicionam sinks duplicados. Com LOG_ENQUEUE (padrão) a escrita em disco
+    acontece em uma thread do loguru, fora do caminho da renderização.
+
+    Returns:
+        True se configurou agora, False se já estava configurado
+    """
+    global _configurado
+    with _lock:
+        if _configurado:
+            return False
+
+        os.makedirs(os.path.dirname(settings.LOG_FILE) or '.', exist_ok=True)
+        logger.add(
+            settings.LOG_FILE,
+            rotation="1 week",
+            retention="1 month",
+            level=settings.LOG_LEVEL,
+            enqueue=settings.LOG_ENQUEUE
+        )
+        _configurado = True
+        return True
+
+class AuditLogWriter:
+    """
+    Gravação em lote de eventos de auditoria (um JSON por linha)
+
+    registrar() só coloca o evento em uma fila; uma thread esvazia a fila a
+    cada flush_interval segundos (ou ao acumular batch_size eventos) e grava
+    o lote com uma única escrita. Os eventos pendentes são gravados ao
+    encerrar o processo.
+    """
+
+    def __init__(self, path: Optional[str] = None, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None):
+        self.path = path or settings.AUDIT_LOG_FILE
+        self.batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.AUDIT_FLUSH_SECONDS
+        self._queue: SimpleQueue = SimpleQueue()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self.stats = {'eventos': 0, 'lotes': 0, 'erros': 0}
+        atexit.register(self.flush)
+
+    def registrar(self, evento: str, **dados: Any) -> None:
+        """
+        Enfileira um evento de auditoria
+
+        Args:
+            evento: Nome do evento (ex.: 'login', 'equipamento_adicionado')
+            **dados: Campos do evento (valores não serializáveis viram texto)
+        """
+        self._queue.put({'ts': datetime.now().isoformat(timespec='milliseconds'), 'evento': evento, **dados})
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+        self._ensure_thread()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="AuditLogWriter", daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Grava os eventos pendentes
+
+        Returns:
+            Número de eventos gravados
+        """
+        linhas = []
+        try:
+            while True:
+                linhas.append(json.dumps(self._queue.get_nowait(), ensure_ascii=False, default=str))
+        except Empty:
+            pass
+
+        if not linhas:
+            return 0
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(linhas) + '\n')
+            self.stats['eventos'] += len(linhas)
+            self.stats['lotes'] += 1
+        except Exception as e:
+            self.stats['erros'] += 1
+            logger.error(f"❌ Erro ao gravar log de auditoria: {str(e)}")
+        return len(linhas)
+
+class AmostradorLog:
+    """
+    Limita linhas de debug repetidas em laços (ex.: uma por produto)
+
+    Registra as primeiras `primeiras` ocorrências e depois uma a cada
+    `a_cada`; resumo() informa quantas foram omitidas.
+    """
+
+    def __init__(self, primeiras: int = 5, a_cada: Optional[int] = None):
+        self.primeiras = primeiras
+        self.a_cada = a_cada or settings.LOG_SAMPLE_EVERY
+        self.total = 0
+        self.registradas = 0
+
+    def debug(self, mensagem: str) -> None:
+        self.total += 1
+        if self.total <= self.primeiras or self.total % self.a_cada == 0:
+            self.registradas += 1
+            logger.debug(mensagem)
+
+    def resumo(self, contexto: str) -> None:
+        omitidas = self.total - self.registradas
+        if omitidas:
+            logger.debug(f"🔇 {contexto}: {omitidas} de {self.total} linhas de debug omitidas por amostragem")
+
+# Instância global (um arquivo de auditoria por processo)
+audit_log = AuditLogWriter()
@@ -3,8 +3,86 @@ Sistema de CSS Moderno e Profissional para Dashboard Estoque TI
 Design System baseado em variáveis CSS e componentes reutilizáveis
 """
 
+import re
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
+from loguru import logger
+
 from config.settings import settings
 
+@dataclass(frozen=True)
+class CssCompilado:
+    """CSS do design system minificado, com hash do conteúdo"""
+    css: str
+    hash: str
+    bytes_original: int
+
+    @property
+    def bytes(self) -> int:
+        return len(self.css.encode('utf-8'))
+
+    @property
+    def markup(self) -> str:
+        """Tag <style> pronta para st.markdown"""
+        return f'<style data-css-hash="{self.hash}">{self.css}</style>'
+
+def minificar_css(css: str) -> str:
+    """
+    Remove comentários, quebras de linha e espaços desnecessários
+
+    Args:
+        css: CSS (com ou sem a tag <style>)
+
+    Returns:
+        CSS minificado, sem a tag <style>
+    """
+    css = re.sub(r'</?style[^>]*>', '', css)
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+def remover_variaveis_nao_usadas(css: str) -> str:
+    """
+    Remove do CSS minificado as variáveis (--nome) que nenhuma regra usa
+
+    Repete até estabilizar, pois uma variável pode ser usada apenas por outra
+    que foi removida. As páginas não usam var(--...) em estilos inline.
+    """
+    while True:
+        usadas = set(re.findall(r'var\((--[\w-]+)', css))
+        podado = re.sub(
+            r'(?<=[{;])(--[\w-]+):[^;{}]*;?',
+            lambda m: m.group(0) if m.group(1) in usadas else '',
+            css
+        ).replace(';}', '}')
+        if podado == css:
+            return css
+        css = podado
+
+@lru_cache(maxsize=4)
+def _compilar_css(tema: Tuple[Tuple[str, str], ...]) -> CssCompilado:
+    original = get_modern_css()
+    css = remover_variaveis_nao_usadas(minificar_css(original))
+    compilado = CssCompilado(css=css, hash=hashlib.sha256(css.encode('utf-8')).hexdigest()[:12], bytes_original=len(original.encode('utf-8')))
+    logger.debug(f"🎨 CSS compilado ({compilado.hash}): {compilado.bytes_original} → {compilado.bytes} bytes")
+    return compilado
+
+def obter_css_compilado() -> CssCompilado:
+    """
+    CSS do design system compilado uma vez por processo
+
+    O resultado fica em cache por tema (THEME_COLORS); reruns reutilizam a
+    mesma string em vez de montar e formatar o CSS novamente.
+
+    Returns:
+        CssCompilado com CSS minificado e hash do conteúdo
+    """
+    return _compilar_css(tuple(sorted(settings.THEME_COLORS.items())))
+
 def get_modern_css() -> str:
     """
     Retorna CSS moderno e profissional baseado no design system
@@ -158,114 +236,8 @@ def get_modern_css() -> str:
         line-height: 1.2;
     }}
     
-    .section-header {{
-        font-size: var(--text-2xl);
-        font-weight: 700;
-        color: var(--text-primary);
-        margin-bottom: var(--space-4);
-        display: flex;
-        align-items: center;
-        gap: var(--space-2);
-    }}
-    
-    .section-subheader {{
-        font-size: var(--text-lg);
-        font-weight: 600;
-        color: var(--text-secondary);
-        margin-bottom: var(--space-3);
-    }}
-    
-    /* ===== CARDS E CONTAINERS ===== */
-    .metric-card {{
-        background: var(--bg-card);
-        border-radius: var(--border-radius);
-        padding: var(--space-6);
-        box-shadow: var(--shadow-md);
-        border: 1px solid var(--gray-700);
-        transition: all var(--transition-normal);
-        position: relative;
-        overflow: hidden;
-    }}
-    
-    .metric-card::before {{
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 3px;
-        background: var(--gradient-primary);
-        transform: scaleX(0);
-        transform-origin: left;
-        transition: transform var(--transition-normal);
-    }}
-    
-    .metric-card:hover {{
-        transform: translateY(-2px);
-        box-shadow: var(--shadow-lg);
-        border-color: var(--primary);
-    }}
-    
-    .metric-card:hover::before {{
-        transform: scaleX(1);
-    }}
-    
-    .info-card {{
-        background: var(--bg-secondary);
-        border-radius: var(--border-radius);
-        padding: var(--space-4);
-        border-left: 4px solid var(--info);
-        margin: var(--space-4) 0;
-    }}
-    
-    .success-card {{
-        background: rgba(0, 200, 81, 0.1);
-        border-radius: var(--border-radius);
-        padding: var(--space-4);
-        border-left: 4px solid var(--success);
-        color: var(--success-light);
-    }}
-    
-    .warning-card {{
-        background: rgba(255, 179, 0, 0.1);
-        border-radius: var(--border-radius);
-        padding: var(--space-4);
-        border-left: 4px solid var(--warning);
-        color: var(--warning-light);
-    }}
-    
-    .error-card {{
-        background: rgba(255, 53, 71, 0.1);
-        border-radius: var(--border-radius);
-        padding: var(--space-4);
-        border-left: 4px solid var(--error);
-        color: var(--error-light);
-    }}
-    
     /* ===== COMPONENTES STREAMLIT ===== */
     
-    /* Sidebar */
-    .css-1d391kg {{
-        background: var(--bg-sidebar) !important;
-        border-right: 1px solid var(--gray-700);
-    }}
-    
-    /* Métricas */
-    [data-testid="metric-container"] {{
-        background: var(--bg-card);
-        border-radius: var(--border-radius);
-        padding: var(--space-4);
-        box-shadow: var(--shadow);
-        border: 1px solid var(--gray-700);
-        transition: all var(--transition-normal);
-    }}
-    
-    [data-testid="metric-container"]:hover {{
-        transform: translateY(-1px);
-        box-shadow: var(--shadow-md);
-        border-color: var(--primary);
-    }}
-    
     /* Botões */
     .stButton > button {{
         background: var(--gradient-primary) !important;
@@ -407,89 +379,11 @@ def get_modern_css() -> str:
         border-left: 4px solid var(--info) !important;
     }}
     
-    /* ===== CLASSES UTILITÁRIAS ===== */
-    .text-center {{ text-align: center; }}
-    .text-right {{ text-align: right; }}
-    .font-bold {{ font-weight: 700; }}
-    .font-semibold {{ font-weight: 600; }}
-    .font-medium {{ font-weight: 500; }}
-    
-    .text-primary {{ color: var(--text-primary); }}
-    .text-secondary {{ color: var(--text-secondary); }}
-    .text-muted {{ color: var(--text-muted); }}
-    
-    .bg-primary {{ background-color: var(--primary); }}
-    .bg-success {{ background-color: var(--success); }}
-    .bg-warning {{ background-color: var(--warning); }}
-    .bg-error {{ background-color: var(--error); }}
-    
-    .border-primary {{ border-color: var(--primary); }}
-    .border-success {{ border-color: var(--success); }}
-    .border-warning {{ border-color: var(--warning); }}
-    .border-error {{ border-color: var(--error); }}
-    
-    .rounded {{ border-radius: var(--border-radius); }}
-    .rounded-sm {{ border-radius: var(--border-radius-sm); }}
-    .rounded-lg {{ border-radius: var(--border-radius-lg); }}
-    
-    .shadow {{ box-shadow: var(--shadow); }}
-    .shadow-md {{ box-shadow: var(--shadow-md); }}
-    .shadow-lg {{ box-shadow: var(--shadow-lg); }}
-    
-    .transition {{ transition: all var(--transition-normal); }}
-    .transition-fast {{ transition: all var(--transition-fast); }}
-    
     /* ===== RESPONSIVIDADE ===== */
     @media (max-width: 768px) {{
         .main-header {{
             font-size: var(--text-3xl);
         }}
-        
-        .metric-card {{
-            padding: var(--space-4);
-        }}
-        
-        .section-header {{
-            font-size: var(--text-xl);
-        }}
-    }}
-    
-    /* ===== ANIMAÇÕES ===== */
-    @keyframes fadeIn {{
-        from {{ opacity: 0; transform: translateY(10px); }}
-        to {{ opacity: 1; transform: translateY(0); }}
-    }}
-    
-    @keyframes slideIn {{
-        from {{ opacity: 0; transform: translateX(-20px); }}
-        to {{ opacity: 1; transform: translateX(0); }}
-    }}
-    
-    @keyframes pulse {{
-        0%, 100% {{ opacity: 1; }}
-        50% {{ opacity: 0.7; }}
-    }}
-    
-    .animate-fade-in {{ animation: fadeIn 0.5s ease-out; }}
-    .animate-slide-in {{ animation: slideIn 0.3s ease-out; }}
-    .animate-pulse {{ animation: pulse 2s infinite; }}
-    
-    /* ===== ACESSIBILIDADE ===== */
-    .focus-visible:focus {{
-        outline: 2px solid var(--primary) !important;
-        outline-offset: 2px !important;
-    }}
-    
-    .sr-only {{
-        position: absolute !important;
-        width: 1px !important;
-        height: 1px !important;
-        padding: 0 !important;
-        margin: -1px !important;
-        overflow: hidden !important;
-        clip: rect(0, 0, 0, 0) !important;
-        white-space: nowrap !important;
-        border: 0 !important;
     }}
     
     /* ===== DARK MODE OTIMIZADO ===== */
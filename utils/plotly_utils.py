@@ -2,10 +2,22 @@
 Utilitários para gráficos Plotly com recursos modernos
 """
 
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+import numpy as np
+import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import Dict, Any, List, Optional
+import plotly.io as pio
+from typing import Dict, Any, List, Optional, Callable
+from loguru import logger
 from config.settings import settings
+from utils.cache_manager import _hash_value
+
+# Nome do template registrado em plotly.io.templates
+TEMPLATE_ESTOQUE = "estoque_ti"
 
 def get_plotly_theme() -> Dict[str, Any]:
     """Retorna tema moderno do Plotly harmonizado com o design system"""
@@ -66,6 +78,69 @@ def get_plotly_theme() -> Dict[str, Any]:
         }
     }
 
+def registrar_template() -> str:
+    """
+    Registra o tema como template nomeado do plotly.io (uma vez por processo)
+
+    O template parte do template padrão vigente (o "streamlit", registrado
+    ao importar o Streamlit) com o layout de get_plotly_theme() por cima,
+    então os gráficos só referenciam o nome em vez de montar e aplicar o
+    tema com update_layout a cada figura.
+
+    Returns:
+        Nome do template
+    """
+    if TEMPLATE_ESTOQUE not in pio.templates:
+        template = go.layout.Template(pio.templates[pio.templates.default])
+        template.layout.update(get_plotly_theme()['layout'])
+        pio.templates[TEMPLATE_ESTOQUE] = template
+    return TEMPLATE_ESTOQUE
+
+registrar_template()
+
+_figuras: "OrderedDict[str, go.Figure]" = OrderedDict()
+_figuras_lock = threading.Lock()
+_figuras_stats = {'hits': 0, 'misses': 0}
+
+def memoizar_figura(func: Callable) -> Callable:
+    """
+    Reaproveita a figura quando os dados e parâmetros são os mesmos
+
+    A chave é o hash estrutural dos argumentos (DataFrames pelo conteúdo ou
+    pela versão em attrs['cache_version']). Figuras ficam em um LRU do
+    processo (PLOTLY_FIGURE_CACHE_SIZE) e são compartilhadas entre sessões:
+    quem chama não deve modificá-las.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs) -> go.Figure:
+        hasher = hashlib.blake2b(digest_size=16)
+        _hash_value(hasher, (func.__name__, args, kwargs))
+        chave = hasher.hexdigest()
+        
+        with _figuras_lock:
+            fig = _figuras.get(chave)
+            if fig is not None:
+                _figuras.move_to_end(chave)
+                _figuras_stats['hits'] += 1
+                return fig
+        
+        fig = func(*args, **kwargs)
+        with _figuras_lock:
+            _figuras_stats['misses'] += 1
+            _figuras[chave] = fig
+            while len(_figuras) > settings.PLOTLY_FIGURE_CACHE_SIZE:
+                _figuras.popitem(last=False)
+        logger.debug(f"📊 Figura construída: {func.__name__}")
+        return fig
+    
+    return wrapper
+
+def get_figure_cache_stats() -> Dict[str, int]:
+    """Acertos, construções e figuras em memória do cache de gráficos"""
+    with _figuras_lock:
+        return {**_figuras_stats, 'figuras': len(_figuras)}
+
+@memoizar_figura
 def create_pie_chart(df, values_col: str, names_col: str, title: str, **kwargs) -> go.Figure:
     """Cria gráfico de pizza moderno com paleta harmonizada"""
     fig = px.pie(
@@ -73,12 +148,10 @@ def create_pie_chart(df, values_col: str, names_col: str, title: str, **kwargs)
         values=values_col, 
         names=names_col, 
         title=title,
-        color_discrete_sequence=settings.CHART_COLORS
+        color_discrete_sequence=settings.CHART_COLORS,
+        template=TEMPLATE_ESTOQUE
     )
     
-    # Aplicar tema
-    fig.update_layout(**get_plotly_theme()['layout'])
-    
     # Melhorias visuais modernas
     fig.update_traces(
         textposition='inside', 
@@ -99,6 +172,7 @@ def create_pie_chart(df, values_col: str, names_col: str, title: str, **kwargs)
     
     return fig
 
+@memoizar_figura
 def create_bar_chart(df, x_col: str, y_col: str, title: str, color_col: Optional[str] = None, **kwargs) -> go.Figure:
     """Cria gráfico de barras moderno com paleta harmonizada"""
     if color_col:
@@ -108,7 +182,8 @@ def create_bar_chart(df, x_col: str, y_col: str, title: str, color_col: Optional
             y=y_col, 
             title=title,
             color=color_col,
-            color_discrete_sequence=settings.CHART_COLORS
+            color_discrete_sequence=settings.CHART_COLORS,
+            template=TEMPLATE_ESTOQUE
         )
     else:
         fig = px.bar(
@@ -116,12 +191,10 @@ def create_bar_chart(df, x_col: str, y_col: str, title: str, color_col: Optional
             x=x_col, 
             y=y_col, 
             title=title,
-            color_discrete_sequence=settings.CHART_COLORS
+            color_discrete_sequence=settings.CHART_COLORS,
+            template=TEMPLATE_ESTOQUE
         )
     
-    # Aplicar tema
-    fig.update_layout(**get_plotly_theme()['layout'])
-    
     # Melhorias visuais modernas
     fig.update_traces(
         marker=dict(
@@ -151,30 +224,115 @@ def create_bar_chart(df, x_col: str, y_col: str, title: str, color_col: Optional
     
     return fig
 
+def lttb(x: np.ndarray, y: np.ndarray, limite: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: escolhe `limite` pontos que preservam a forma da série
+
+    O primeiro e o último ponto são mantidos; o restante é dividido em
+    limite-2 faixas e, de cada faixa, fica o ponto que forma o maior
+    triângulo com o ponto escolhido na faixa anterior e a média da próxima.
+
+    Args:
+        x: Posições no eixo X (numéricas e crescentes)
+        y: Valores
+        limite: Número de pontos desejado
+
+    Returns:
+        Índices (crescentes) dos pontos mantidos
+    """
+    n = len(y)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bordas = (np.arange(limite - 1) * ((n - 2) / (limite - 2))).astype(np.int64) + 1
+    bordas[-1] = n - 1
+
+    # Médias de todas as faixas de uma vez (a última "faixa" é o ponto final)
+    tamanhos = np.diff(np.append(bordas, n))
+    medias_x = np.add.reduceat(x, bordas) / tamanhos
+    medias_y = np.add.reduceat(y, bordas) / tamanhos
+
+    indices = np.empty(limite, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for faixa in range(limite - 2):
+        inicio, fim = bordas[faixa], bordas[faixa + 1]
+        media_x, media_y = medias_x[faixa + 1], medias_y[faixa + 1]
+
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(areas.argmax())
+        indices[faixa + 1] = anterior
+
+    return indices
+
+def _posicoes_eixo_x(x_data: List) -> np.ndarray:
+    """Eixo X numérico para o LTTB: datas em dias, números como estão, outros pela posição"""
+    serie = pd.Series(x_data)
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.to_numpy(dtype=np.float64)
+
+    datas = pd.to_datetime(serie, errors='coerce')
+    if datas.notna().all():
+        return (datas - datas.iloc[0]).dt.total_seconds().to_numpy() / 86400.0
+    return np.arange(len(serie), dtype=np.float64)
+
+@memoizar_figura
 def create_line_chart(x_data: List, y_data: List, title: str, x_label: str = "", y_label: str = "", **kwargs) -> go.Figure:
-    """Cria gráfico de linha moderno"""
-    fig = go.Figure()
+    """
+    Cria gráfico de linha moderno
+
+    Séries com mais de PLOTLY_LINHA_MAX_PONTOS pontos são reduzidas por LTTB
+    no servidor, e acima de PLOTLY_WEBGL_MIN_PONTOS (contagem original) o
+    traço passa a ser WebGL (Scattergl) só com linhas. O hover informa a
+    quantidade original de pontos quando houve redução.
+    """
+    total_pontos = len(y_data)
+    hover = '<b>%{x}</b><br>Valor: %{y}'
     
-    fig.add_trace(go.Scatter(
-        x=x_data,
-        y=y_data,
-        mode='lines+markers',
-        name='Tendência',
-        line=dict(
-            color=settings.THEME_COLORS["primary"],
-            width=3,
-            smoothing=1.0  # Suavização da linha
-        ),
-        marker=dict(
-            color=settings.THEME_COLORS["primary"],
-            size=8,
-            line=dict(color='white', width=2)
-        ),
-        hovertemplate='<b>%{x}</b><br>Valor: %{y}<extra></extra>'
-    ))
+    if total_pontos > settings.PLOTLY_LINHA_MAX_PONTOS:
+        indices = lttb(_posicoes_eixo_x(x_data), y_data, settings.PLOTLY_LINHA_MAX_PONTOS)
+        x_data = [x_data[i] for i in indices]
+        y_data = [y_data[i] for i in indices]
+        hover += f'<br><i>{len(indices)} de {total_pontos} pontos (LTTB)</i>'
+    
+    fig = go.Figure(layout={'template': TEMPLATE_ESTOQUE})
+    
+    if total_pontos > settings.PLOTLY_WEBGL_MIN_PONTOS:
+        # WebGL, sem marcadores (Scattergl não tem suavização de linha)
+        fig.add_trace(go.Scattergl(
+            x=x_data,
+            y=y_data,
+            mode='lines',
+            name='Tendência',
+            line=dict(color=settings.THEME_COLORS["primary"], width=2),
+            hovertemplate=hover + '<extra></extra>',
+            meta={'pontos_originais': total_pontos}
+        ))
+    else:
+        fig.add_trace(go.Scatter(
+            x=x_data,
+            y=y_data,
+            mode='lines+markers',
+            name='Tendência',
+            line=dict(
+                color=settings.THEME_COLORS["primary"],
+                width=3,
+                smoothing=1.0  # Suavização da linha
+            ),
+            marker=dict(
+                color=settings.THEME_COLORS["primary"],
+                size=8,
+                line=dict(color='white', width=2)
+            ),
+            hovertemplate=hover + '<extra></extra>',
+            meta={'pontos_originais': total_pontos}
+        ))
     
-    # Aplicar tema
-    fig.update_layout(**get_plotly_theme()['layout'])
     fig.update_layout(
         title=title,
         xaxis_title=x_label,
@@ -184,6 +342,7 @@ def create_line_chart(x_data: List, y_data: List, title: str, x_label: str = "",
     
     return fig
 
+@memoizar_figura
 def create_treemap(df, path_col: str, values_col: str, title: str, **kwargs) -> go.Figure:
     """Cria treemap moderno com bordas arredondadas"""
     fig = px.treemap(
@@ -192,12 +351,10 @@ def create_treemap(df, path_col: str, values_col: str, title: str, **kwargs) ->
         values=values_col,
         title=title,
         color=values_col,
-        color_continuous_scale='Reds'
+        color_continuous_scale='Reds',
+        template=TEMPLATE_ESTOQUE
     )
     
-    # Aplicar tema
-    fig.update_layout(**get_plotly_theme()['layout'])
-    
     # Bordas arredondadas para treemap (recurso moderno)
     fig.update_traces(
         marker=dict(cornerradius=5),
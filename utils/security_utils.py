@@ -3,15 +3,22 @@ Utilitários de segurança para sanitização e validação
 """
 
 import html
+import math
+import os
 import re
+import time
+import sqlite3
 import bcrypt
 import secrets
-from typing import Dict, Any, Optional, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Any, Optional, Union
 from loguru import logger
-from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import OrderedDict
 import streamlit as st
 
+from config.settings import settings
+
 class InputSanitizer:
     """Classe para sanitização de inputs do usuário"""
     
@@ -179,14 +186,197 @@ class PasswordManager:
         """
         return secrets.token_hex(length)
 
+class VerificationQueueFull(Exception):
+    """Fila de verificação de senhas cheia (back-pressure em picos de login)"""
+
+class PasswordVerificationPool:
+    """
+    Pool limitado de threads para verificação (e geração) de hashes bcrypt
+    
+    O bcrypt libera o GIL, então as verificações rodam em paralelo até o
+    número de workers, sem ocupar CPU além disso. Hashes gerados no primeiro
+    login de cada usuário passam pela mesma fila. Quando há mais pedidos
+    pendentes (executando + na fila) do que workers + max_queue, o pedido é
+    recusado imediatamente com VerificationQueueFull em vez de esperar.
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None, max_queue: int = 32, timeout: float = 30.0):
+        """
+        Args:
+            max_workers: Threads de verificação (padrão: número de CPUs)
+            max_queue: Pedidos aguardando além dos que estão executando
+            timeout: Espera máxima por um resultado, em segundos
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._stats = {
+            'completed': 0, 'rejected': 0, 'timeouts': 0, 'peak_pending': 0,
+            'total_wait_s': 0.0, 'total_run_s': 0.0
+        }
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt-verify")
+            return self._executor
+    
+    def verify(self, password: str, password_hash: str) -> bool:
+        """
+        Verifica a senha em um worker do pool
+        
+        Args:
+            password: Senha em texto plano
+            password_hash: Hash armazenado
+        
+        Returns:
+            True se a senha estiver correta
+        
+        Raises:
+            VerificationQueueFull: Se a fila estiver cheia ou o tempo esgotar
+        """
+        return self._run(PasswordManager.verify_password, password, password_hash)
+    
+    def hash(self, password: str) -> str:
+        """
+        Gera o hash bcrypt da senha em um worker do pool (mesma fila das verificações)
+        
+        Args:
+            password: Senha em texto plano
+        
+        Returns:
+            Hash bcrypt
+        
+        Raises:
+            VerificationQueueFull: Se a fila estiver cheia ou o tempo esgotar
+        """
+        return self._run(PasswordManager.hash_password, password)
+    
+    def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Executa func(*args) em um worker com admissão limitada e tempo máximo de espera"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['rejected'] += 1
+            logger.warning(f"🚦 Fila de verificação de senha cheia ({self.max_workers + self.max_queue} pendentes)")
+            raise VerificationQueueFull("Muitos logins simultâneos, tente novamente em instantes")
+        
+        submitted = time.monotonic()
+        with self._lock:
+            self._pending += 1
+            self._stats['peak_pending'] = max(self._stats['peak_pending'], self._pending)
+        
+        def run() -> Any:
+            started = time.monotonic()
+            with self._lock:
+                self._running += 1
+                self._stats['total_wait_s'] += started - submitted
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._stats['total_run_s'] += time.monotonic() - started
+        
+        def release(done) -> None:
+            with self._lock:
+                self._pending -= 1
+                if not done.cancelled():
+                    self._stats['completed'] += 1
+            self._slots.release()
+        
+        future = self._get_executor().submit(run)
+        future.add_done_callback(release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Sobrecarga não é senha errada: desiste do pedido e sinaliza como fila cheia
+            future.cancel()
+            with self._lock:
+                self._stats['timeouts'] += 1
+            logger.error("⏱️ Tempo esgotado aguardando verificação de senha")
+            raise VerificationQueueFull("Tempo esgotado aguardando verificação de senha")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas da fila: profundidade atual, pico, recusas e tempos médios"""
+        with self._lock:
+            completed = self._stats['completed']
+            return {
+                'workers': self.max_workers,
+                'max_pending': self.max_workers + self.max_queue,
+                'running': self._running,
+                'queued': self._pending - self._running,
+                'peak_pending': self._stats['peak_pending'],
+                'completed': completed,
+                'rejected': self._stats['rejected'],
+                'timeouts': self._stats['timeouts'],
+                'avg_wait_ms': (self._stats['total_wait_s'] / completed * 1000) if completed else 0.0,
+                'avg_run_ms': (self._stats['total_run_s'] / completed * 1000) if completed else 0.0
+            }
+
 class RateLimiter:
-    """Sistema de rate limiting para prevenir ataques"""
+    """
+    Rate limiting por janela deslizante aproximada (sliding window counter)
+
+    Cada identificador guarda apenas o índice da janela atual, os contadores
+    da janela atual e da anterior, o fim do bloqueio e o último acesso, ou
+    seja, memória constante por chave. A contagem estimada é
+    anterior × (fração restante da janela anterior) + atual.
+
+    Usa relógio monotônico, é thread-safe e descarta chaves ociosas: as
+    chaves ficam em ordem de último acesso e a limpeza remove do início
+    enquanto estiverem ociosas (custo amortizado O(1)); max_keys limita o
+    total mesmo sob muitos identificadores distintos.
+    """
     
-    def __init__(self, max_requests: int = 30, window_minutes: int = 1):
+    def __init__(self, max_requests: int = 30, window_minutes: int = 1,
+                 block_minutes: int = 5, max_keys: int = 10000):
         self.max_requests = max_requests
         self.window_seconds = window_minutes * 60
-        self.requests = defaultdict(list)
-        self.blocked_ips = {}
+        self.block_seconds = block_minutes * 60
+        self.max_keys = max_keys
+        # Chave ociosa: sem acesso por duas janelas e sem bloqueio ativo
+        self.idle_seconds = max(2 * self.window_seconds, self.block_seconds)
+        self._lock = threading.Lock()
+        # identificador -> [janela, atual, anterior, bloqueado_ate, ultimo_acesso]
+        self._states: "OrderedDict[str, list]" = OrderedDict()
+        self._evicted = 0
+    
+    def _now(self) -> float:
+        return time.monotonic()
+    
+    def _advance(self, state: list, now: float) -> list:
+        """Avança o estado para a janela do instante atual"""
+        window = int(now // self.window_seconds)
+        if state[0] == window - 1:
+            state[2], state[1] = state[1], 0
+        elif state[0] != window:
+            state[1], state[2] = 0, 0
+        state[0] = window
+        return state
+    
+    def _estimate(self, state: list, now: float) -> float:
+        """Requests estimados na janela deslizante que termina agora"""
+        elapsed = (now % self.window_seconds) / self.window_seconds
+        return state[2] * (1.0 - elapsed) + state[1]
+    
+    def _consume(self, identifier: str, state: list, now: float) -> bool:
+        """Aplica a regra ao estado (já avançado) e registra o request se permitido"""
+        state[4] = now
+        if state[3] > now:
+            return False
+        
+        if self._estimate(state, now) >= self.max_requests:
+            state[3] = now + self.block_seconds
+            logger.warning(f"Rate limit excedido para {identifier}. Bloqueado por {self.block_seconds // 60} minutos.")
+            return False
+        
+        state[1] += 1
+        return True
     
     def is_allowed(self, identifier: str) -> bool:
         """
@@ -198,33 +388,13 @@ class RateLimiter:
         Returns:
             True se permitido, False se bloqueado
         """
-        now = datetime.now()
-        
-        # Verifica se está bloqueado
-        if identifier in self.blocked_ips:
-            if now < self.blocked_ips[identifier]:
-                return False
-            else:
-                # Remove do bloqueio se expirou
-                del self.blocked_ips[identifier]
-        
-        # Remove requests antigos
-        cutoff = now - timedelta(seconds=self.window_seconds)
-        self.requests[identifier] = [
-            req_time for req_time in self.requests[identifier] 
-            if req_time > cutoff
-        ]
-        
-        # Verifica se excedeu o limite
-        if len(self.requests[identifier]) >= self.max_requests:
-            # Bloqueia por 5 minutos
-            self.blocked_ips[identifier] = now + timedelta(minutes=5)
-            logger.warning(f"Rate limit excedido para {identifier}. Bloqueado por 5 minutos.")
-            return False
-        
-        # Adiciona request atual
-        self.requests[identifier].append(now)
-        return True
+        now = self._now()
+        with self._lock:
+            state = self._states.pop(identifier, None) or [0, 0, 0, 0.0, now]
+            self._states[identifier] = state  # Reinsere no fim (mais recente)
+            allowed = self._consume(identifier, self._advance(state, now), now)
+            self._evict(now)
+            return allowed
     
     def get_remaining_requests(self, identifier: str) -> int:
         """
@@ -236,15 +406,161 @@ class RateLimiter:
         Returns:
             Número de requests restantes
         """
-        now = datetime.now()
-        cutoff = now - timedelta(seconds=self.window_seconds)
-        
-        current_requests = [
-            req_time for req_time in self.requests[identifier] 
-            if req_time > cutoff
-        ]
-        
-        return max(0, self.max_requests - len(current_requests))
+        now = self._now()
+        with self._lock:
+            state = self._states.get(identifier)
+            if state is None:
+                return self.max_requests
+            if state[3] > now:
+                return 0
+            estimate = self._estimate(self._advance(list(state), now), now)
+        return max(0, self.max_requests - math.ceil(estimate))
+    
+    def _evict(self, now: float) -> None:
+        """Remove chaves ociosas do início da fila e respeita max_keys (chamar com o lock)"""
+        cutoff = now - self.idle_seconds
+        while self._states:
+            identifier, state = next(iter(self._states.items()))
+            if len(self._states) <= self.max_keys and (state[4] >= cutoff or state[3] > now):
+                break
+            del self._states[identifier]
+            self._evicted += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Número de chaves ativas, bloqueadas e descartadas"""
+        now = self._now()
+        with self._lock:
+            return {
+                'keys': len(self._states),
+                'blocked': sum(1 for state in self._states.values() if state[3] > now),
+                'evicted': self._evicted
+            }
+
+class SQLiteRateLimiter(RateLimiter):
+    """
+    RateLimiter com estado em SQLite, compartilhado entre processos
+
+    Mesmo algoritmo e mesmo estado por chave, em uma tabela. Cada decisão é
+    uma transação BEGIN IMMEDIATE (leitura + escrita atômicas entre
+    processos). Usa o relógio do sistema, pois o monotônico não é comparável
+    entre processos. A limpeza de chaves ociosas roda no máximo uma vez por
+    janela.
+    """
+    
+    def __init__(self, db_path: str, max_requests: int = 30, window_minutes: int = 1,
+                 block_minutes: int = 5, max_keys: int = 10000):
+        super().__init__(max_requests, window_minutes, block_minutes, max_keys)
+        self.db_path = db_path
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "identifier TEXT PRIMARY KEY, window INTEGER, current INTEGER, previous INTEGER, "
+                "blocked_until REAL, last_seen REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_limits_last_seen ON rate_limits(last_seen)")
+    
+    def _now(self) -> float:
+        return time.time()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Conexão por thread (sqlite3 não compartilha conexões entre threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def is_allowed(self, identifier: str) -> bool:
+        now = self._now()
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT window, current, previous, blocked_until, last_seen FROM rate_limits WHERE identifier = ?",
+                    (identifier,)
+                ).fetchone()
+                state = self._advance(list(row) if row else [0, 0, 0, 0.0, now], now)
+                allowed = self._consume(identifier, state, now)
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?, ?, ?)",
+                    (identifier, *state)
+                )
+                if now >= self._next_sweep:
+                    self._next_sweep = now + self.window_seconds
+                    self._evict_db(conn, now)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return allowed
+        except Exception as e:
+            # Falha do armazenamento compartilhado não deve derrubar o login: usa o limite local
+            logger.error(f"❌ Erro no rate limit compartilhado: {str(e)}")
+            return super().is_allowed(identifier)
+    
+    def get_remaining_requests(self, identifier: str) -> int:
+        now = self._now()
+        try:
+            row = self._connect().execute(
+                "SELECT window, current, previous, blocked_until, last_seen FROM rate_limits WHERE identifier = ?",
+                (identifier,)
+            ).fetchone()
+        except Exception as e:
+            logger.error(f"❌ Erro no rate limit compartilhado: {str(e)}")
+            return super().get_remaining_requests(identifier)
+        if row is None:
+            return self.max_requests
+        if row[3] > now:
+            return 0
+        return max(0, self.max_requests - math.ceil(self._estimate(self._advance(list(row), now), now)))
+    
+    def _evict_db(self, conn: sqlite3.Connection, now: float) -> None:
+        """Remove chaves ociosas e, acima de max_keys, as de acesso mais antigo"""
+        cursor = conn.execute(
+            "DELETE FROM rate_limits WHERE last_seen < ? AND blocked_until <= ?",
+            (now - self.idle_seconds, now)
+        )
+        self._evicted += cursor.rowcount
+        cursor = conn.execute(
+            "DELETE FROM rate_limits WHERE identifier IN ("
+            "SELECT identifier FROM rate_limits ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+            (self.max_keys,)
+        )
+        self._evicted += cursor.rowcount
+    
+    def get_stats(self) -> Dict[str, Any]:
+        now = self._now()
+        try:
+            keys, blocked = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(blocked_until > ?), 0) FROM rate_limits", (now,)
+            ).fetchone()
+        except Exception as e:
+            logger.error(f"❌ Erro no rate limit compartilhado: {str(e)}")
+            return super().get_stats()
+        return {'keys': keys, 'blocked': blocked, 'evicted': self._evicted}
+
+def create_rate_limiter(max_requests: int, window_minutes: int) -> RateLimiter:
+    """
+    Cria o rate limiter conforme a configuração
+
+    Com RATE_LIMIT_DB_PATH definido, os limites ficam em SQLite e valem para
+    todos os processos do Streamlit; senão, ficam na memória do processo.
+    """
+    if settings.RATE_LIMIT_DB_PATH:
+        try:
+            return SQLiteRateLimiter(settings.RATE_LIMIT_DB_PATH, max_requests, window_minutes,
+                                     max_keys=settings.RATE_LIMIT_MAX_KEYS)
+        except Exception as e:
+            logger.error(f"❌ Rate limit em SQLite indisponível, usando memória: {str(e)}")
+    return RateLimiter(max_requests, window_minutes, max_keys=settings.RATE_LIMIT_MAX_KEYS)
 
 class SecurityValidator:
     """Validador de segurança para dados de entrada"""
@@ -293,6 +609,13 @@ class SecurityValidator:
                 max_val=1000000
             )
         
+        if data.get('estoque_minimo') is not None:
+            validated['estoque_minimo'] = int(sanitizer.sanitize_numeric(
+                data['estoque_minimo'], 
+                min_val=0, 
+                max_val=1000
+            ))
+        
         # Observações (permite mais caracteres especiais)
         if 'observacoes' in data:
             validated['observacoes'] = sanitizer.sanitize_string(
@@ -358,6 +681,14 @@ class SecurityValidator:
         else:
             return sanitizer.sanitize_string(value)
 
+def _create_verification_pool() -> PasswordVerificationPool:
+    return PasswordVerificationPool(
+        max_workers=settings.AUTH_VERIFY_WORKERS or None,
+        max_queue=settings.AUTH_VERIFY_MAX_QUEUE,
+        timeout=settings.AUTH_VERIFY_TIMEOUT_SECONDS
+    )
+
 # Instâncias globais
 rate_limiter = RateLimiter()
+password_verification_pool = _create_verification_pool()
 security_validator = SecurityValidator()
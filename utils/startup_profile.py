@@ -0,0 +1,167 @@
+"""
+Perfil de inicialização: imports do app.py e tempo até a página de login
+
+Uso:
+    python -m utils.startup_profile            # relatório de imports (-X importtime)
+    python -m utils.startup_profile --check    # verificação de regressão (código de saída 1 se falhar)
+
+As medições rodam em subprocessos novos para que nada já importado por este
+processo mascare o custo real de uma sessão fria.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Any, Tuple
+
+from config.settings import settings
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_FILE = os.path.join(APP_DIR, "app.py")
+
+# Módulos que a página de login não pode carregar (só as páginas autenticadas precisam deles)
+MODULOS_PROIBIDOS_LOGIN = (
+    "pandas",
+    "numpy",
+    "openpyxl",
+    "plotly.express",
+    "services.estoque_service",
+    "utils.plotly_utils",
+)
+
+# Executa o app.py até a página de login e devolve tempos e módulos carregados
+_SCRIPT_LOGIN = """
+import sys, time, json
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+importado = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+fim = time.perf_counter()
+print(json.dumps({
+    "import_streamlit_ms": (importado - inicio) * 1000,
+    "login_ms": (fim - importado) * 1000,
+    "excecoes": [str(e.value) for e in at.exception],
+    "campos_login": len(at.text_input),
+    "modulos": sorted(sys.modules),
+}))
+"""
+
+def _executar(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": APP_DIR},
+    )
+
+def medir_login() -> Dict[str, Any]:
+    """
+    Renderiza a página de login (AppTest) em um processo novo
+
+    Returns:
+        Tempos em ms, exceções, número de campos do formulário e módulos carregados
+    """
+    resultado = _executar(["-c", _SCRIPT_LOGIN, APP_FILE])
+    if resultado.returncode != 0:
+        raise RuntimeError(f"Falha ao renderizar a página de login:\n{resultado.stderr[-2000:]}")
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+def coletar_importtime() -> List[Tuple[int, int, int, str]]:
+    """
+    Executa o app.py até a página de login com -X importtime
+
+    Returns:
+        Lista de (self_us, cumulativo_us, nível, módulo) na ordem do relatório do Python
+    """
+    resultado = _executar(["-X", "importtime", "-c", _SCRIPT_LOGIN, APP_FILE])
+    linhas = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        self_us, cumulativo_us, nome = linha[len("import time:"):].split("|")
+        nivel = (len(nome) - len(nome.lstrip())) // 2
+        linhas.append((int(self_us), int(cumulativo_us), nivel, nome.strip()))
+    return linhas
+
+def relatorio_importtime(top: int = 20) -> str:
+    """
+    Relatório dos imports feitos até a página de login
+
+    Args:
+        top: Quantidade de pacotes listados
+
+    Returns:
+        Texto com os pacotes mais caros (tempo próprio somado) e os imports
+        de primeiro nível dos módulos do projeto
+    """
+    linhas = coletar_importtime()
+    projeto = {"app", "auth", "config", "models", "pages", "services", "utils"}
+
+    por_pacote: Dict[str, int] = defaultdict(int)
+    for self_us, _, _, nome in linhas:
+        por_pacote[nome.split(".")[0]] += self_us
+
+    total_us = sum(por_pacote.values())
+    saida = [f"📦 {len(linhas)} módulos importados até a página de login ({total_us / 1000:.0f} ms de import)", ""]
+    saida.append(f"{'pacote':<28}{'ms':>10}")
+    for pacote, us in sorted(por_pacote.items(), key=lambda item: -item[1])[:top]:
+        saida.append(f"{pacote:<28}{us / 1000:>10.1f}")
+
+    saida += ["", f"{'módulo do projeto (cumulativo)':<40}{'ms':>10}"]
+    for _, cumulativo_us, _, nome in linhas:
+        if nome.split(".")[0] in projeto:
+            saida.append(f"{nome:<40}{cumulativo_us / 1000:>10.1f}")
+    return "\n".join(saida)
+
+def verificar_regressao(limite_ms: float = None) -> List[str]:
+    """
+    Verifica a página de login: sem erros, sem módulos pesados e dentro do orçamento
+
+    Args:
+        limite_ms: Tempo máximo do primeiro run até o login (padrão: STARTUP_LOGIN_MAX_MS)
+
+    Returns:
+        Lista de problemas encontrados (vazia = ok)
+    """
+    limite_ms = settings.STARTUP_LOGIN_MAX_MS if limite_ms is None else limite_ms
+    medicao = medir_login()
+    problemas = []
+
+    if medicao["excecoes"]:
+        problemas.append(f"Exceções na página de login: {medicao['excecoes']}")
+    if medicao["campos_login"] < 2:
+        problemas.append("Formulário de login não foi renderizado")
+
+    carregados = set(medicao["modulos"])
+    for modulo in MODULOS_PROIBIDOS_LOGIN:
+        if modulo in carregados:
+            problemas.append(f"Módulo pesado carregado antes do login: {modulo}")
+
+    if medicao["login_ms"] > limite_ms:
+        problemas.append(f"Página de login em {medicao['login_ms']:.0f} ms (limite {limite_ms:.0f} ms)")
+
+    print(f"⏱️ import streamlit: {medicao['import_streamlit_ms']:.0f} ms | "
+          f"até a página de login: {medicao['login_ms']:.0f} ms (limite {limite_ms:.0f} ms)")
+    return problemas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perfil de inicialização do Dashboard Estoque TI")
+    parser.add_argument("--check", action="store_true", help="Falha (código 1) se a página de login regredir")
+    parser.add_argument("--top", type=int, default=20, help="Pacotes listados no relatório")
+    parser.add_argument("--limite-ms", type=float, default=None, help="Sobrescreve STARTUP_LOGIN_MAX_MS")
+    args = parser.parse_args()
+
+    if args.check:
+        problemas = verificar_regressao(args.limite_ms)
+        for problema in problemas:
+            print(f"❌ {problema}")
+        if not problemas:
+            print("✅ Página de login sem regressões")
+        sys.exit(1 if problemas else 0)
+
+    print(relatorio_importtime(args.top))
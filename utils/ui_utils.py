@@ -3,7 +3,6 @@ Utilitários para interface do usuário Streamlit
 """
 
 import streamlit as st
-import pandas as pd
 from typing import Any, List, Dict, Optional
 from loguru import logger
 from config.settings import settings
@@ -196,6 +195,8 @@ def show_confirmation_dialog(message: str, key: str) -> bool:
 
 def format_dataframe_for_display(df):
     """Formata DataFrame para exibição"""
+    import pandas as pd  # Só as páginas com tabelas precisam do pandas
+    
     if df.empty:
         return df
     
@@ -215,6 +216,8 @@ def format_dataframe_for_display(df):
 
 def normalizar_status_equipamento(status: str) -> str:
     """Normaliza status de equipamentos para manter consistência visual"""
+    import pandas as pd
+    
     if not status or pd.isna(status):
         return "Disponível"  # Default
     